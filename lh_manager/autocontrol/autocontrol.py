@@ -99,6 +99,7 @@ def submission_callback(data: dict):
                 for stage in data['stage']:
                     prepare_and_submit_stage(sample, stage, layout)
 
+            samples.mark_changed(sample.id)
             return
 
         return 'sample not found'
@@ -222,12 +223,15 @@ def submit_tasks(tasks: List[AutocontrolTaskContainer], resubmit=False):
             logging.info(f'Autocontrol response: status code {response.status_code}, {response.text}')
             if task.task_type != TaskType.INIT:
                 with active_tasks.lock:
+                    parent_item = active_tasks.pending.get(str(task.id), None)
                     if response.ok:
                         if str(task.id) in active_tasks.pending:
                             taskcontainer.status = SampleStatus.PENDING
                             active_tasks.active.update({str(task.id): active_tasks.pending.pop(str(task.id))})
                     else:
                         taskcontainer.status = SampleStatus.FAILED
+                    if parent_item is not None:
+                        samples.mark_changed(parent_item.id)
 
 @to_thread()
 def cancel_tasks(tasks: List[Task], include_active_queue: bool = False, drop_material: bool = True):
@@ -254,6 +258,8 @@ def cancel_tasks(tasks: List[Task], include_active_queue: bool = False, drop_mat
                 else:
                     m.status = SampleStatus.PENDING
 
+        samples.mark_changed(sample.id)
+
     for task in tasks:
         logging.info('Cancelling task: ' + str(task.id))
         response = requests.post(AUTOCONTROL_URL + '/cancel', headers=DEFAULT_HEADERS, data=json.dumps({'task_id': str(task.id), 'include_active_queue': include_active_queue, 'drop_material': drop_material}))
@@ -334,6 +340,8 @@ def synchronize_status(poll_delay: int = 5):
                     else:
                         m.status = SampleStatus.PENDING
 
+            samples.mark_changed(sample.id)
+
             if (status not in COMPLETED_STATUS):
                 # put it back if not marking complete
                 active_tasks.active.update({id: parent_item})
@@ -76,12 +76,16 @@ class AsyncManagerClient:
     """
 
     samples: Dict[str, Dict] = {}
+    # sample list version of the last get_samples call (for since_version)
+    samples_version: Optional[int] = None
     layout: LHBedLayout = LHBedLayout()
     materials: Dict[str, Material] = {}
 
     def __init__(self, address: str = MANAGER_ADDRESS):
         self.address = address
         self._session: Optional[aiohttp.ClientSession] = None
+        # {endpoint: (ETag, data)} of responses that can be revalidated with If-None-Match
+        self._etag_cache: Dict[str, Tuple[str, Any]] = {}
 
     async def __aenter__(self):
         self._session = aiohttp.ClientSession()
@@ -109,6 +113,28 @@ class AsyncManagerClient:
             if not response.ok:
                 logger.error(f"Request to {endpoint} failed: {data}")
             return data
+
+    async def _get_with_etag(self, endpoint: str) -> Any:
+        """GET request that reuses the previous response if the server reports that it is
+            unchanged (304 Not Modified for its ETag)."""
+        session = await self._get_session()
+        url = urljoin(self.address, endpoint)
+        etag, cached = self._etag_cache.get(endpoint, (None, None))
+        headers = {'If-None-Match': etag} if etag is not None else {}
+        async with session.get(url, headers=headers) as response:
+            if response.status == 304:
+                return cached
+            try:
+                data = await response.json()
+            except aiohttp.ContentTypeError:
+                text = await response.text()
+                raise Exception(f"Failed to decode JSON from {url}. Status: {response.status}. Text: {text}")
+
+            if not response.ok:
+                logger.error(f"Request to {endpoint} failed: {data}")
+            elif 'ETag' in response.headers:
+                self._etag_cache[endpoint] = (response.headers['ETag'], data)
+            return data
         
     async def close(self):
         """Closes the underlying aiohttp session."""
@@ -182,20 +208,57 @@ class AsyncManagerClient:
     # GUI / Sample Management Endpoints
     # =========================================================================
 
-    async def get_samples(self) -> Dict[str, Dict]:
-        """Fetches and caches the list of samples.
+    async def get_samples(self,
+                          offset: int = 0,
+                          limit: Optional[int] = None,
+                          status: Optional[List[str]] = None,
+                          fields: Optional[List[str]] = None,
+                          since_version: Optional[int] = None) -> Dict[str, Dict]:
+        """Fetches samples. Without arguments, fetches and caches the complete sample list.
+
+        Args:
+            offset (int, optional): index of the first sample to return. Defaults to 0.
+            limit (Optional[int], optional): maximum number of samples to return. Defaults to None (all).
+            status (Optional[List[str]], optional): only return samples with these statuses. Defaults to None.
+            fields (Optional[List[str]], optional): sample fields to return, e.g. ['name', 'status',
+                'channel']; 'id' is always returned. Defaults to None (all fields).
+            since_version (Optional[int], optional): only return samples changed since this sample
+                list version (e.g. samples_version). If this is the only argument, the cached
+                sample list is updated. Defaults to None.
 
         Returns:
-            Dict[str, Dict]: Dictionary of samples keyed by sample ID.
+            Dict[str, Dict]: Dictionary of returned samples keyed by sample ID.
         """
-        response = await self._request('GET', '/GUI/GetSamples/')
-        self.samples = {s['id']: s for s in response.get('samples', {}).get('samples', [])}
-        return self.samples
+        params = {'offset': offset or None, 'limit': limit, 'since_version': since_version,
+                  'status': None if status is None else ','.join(status),
+                  # samples are keyed by ID, so the ID is always requested
+                  'fields': None if fields is None else ','.join(fields if 'id' in fields else ['id'] + list(fields))}
+        params = {k: v for k, v in params.items() if v is not None}
+        response = await self._request('GET', '/GUI/GetSamples/', params=params)
+        samples = {s['id']: s for s in response.get('samples', {}).get('samples', [])}
+        if not len(params):
+            self.samples = samples
+        elif list(params.keys()) == ['since_version']:
+            # unchanged samples are kept; deleted samples are missing from the sample order
+            self.samples = {sample_id: samples.get(sample_id, self.samples.get(sample_id))
+                            for sample_id in response.get('ids', [])
+                            if (sample_id in samples) or (sample_id in self.samples)}
+        self.samples_version = response.get('version', None)
+        return samples
 
     async def get_sample_status(self) -> Dict[str, Any]:
         """Fetches the status of all samples."""
         return await self._request('GET', '/GUI/GetSampleStatus/')
 
+    async def get_estimates(self) -> Dict[str, Dict]:
+        """Fetches the estimated times of all samples, their stages and their methods.
+
+        Returns:
+            Dict[str, Dict]: Dictionary of estimates keyed by sample ID.
+        """
+        response = await self._request('GET', '/GUI/GetEstimates/')
+        return response.get('estimates', {})
+
     async def add_sample(self, sample: Sample) -> Tuple[Sample, LHBedLayout]:
         """Adds a new sample (testing endpoint)."""
         response = await self._request('POST', '/webform/AddSample/', json=sample.model_dump())
@@ -317,7 +380,7 @@ class AsyncManagerClient:
 
     async def get_all_devices(self) -> Dict:
         """Gets schema for all devices."""
-        return await self._request('GET', '/GUI/GetAllDevices/')
+        return await self._get_with_etag('/GUI/GetAllDevices/')
 
     async def update_device(self, device_name: str, param_name: str, param_value: Any):
         """Updates a parameter of a device."""
@@ -330,7 +393,7 @@ class AsyncManagerClient:
 
     async def get_all_methods(self) -> Dict:
         """Gets schema for all methods."""
-        return await self._request('GET', '/GUI/GetAllMethods/')
+        return await self._get_with_etag('/GUI/GetAllMethods/')
 
     # =========================================================================
     # LH Interface Endpoints
@@ -370,6 +433,27 @@ class AsyncManagerClient:
         }
         return await self._request('POST', '/LH/CheckFormulation/', json=data)
 
+    async def check_formulations(self,
+                                 targets: List[Tuple[Composition, float]],
+                                 exact_match: bool = True) -> Dict[str, Any]:
+        """Checks if a batch of target compositions can be formulated, individually and together.
+
+        Args:
+            targets (List[Tuple[Composition, float]]): The desired compositions and volumes.
+            exact_match (bool): Whether to require exact match of components.
+
+        Returns:
+            Dict[str, Any]: Dictionary containing 'results' (one dictionary per target, as returned by
+                check_formulation), 'totals' (total volume drawn from each source well), and 'success'.
+        """
+        data = {
+            'targets': [{'target_composition': target_composition.model_dump(),
+                         'target_volume': target_volume}
+                        for target_composition, target_volume in targets],
+            'exact_match': exact_match
+        }
+        return await self._request('POST', '/LH/CheckFormulations/', json=data)
+
     async def get_list_of_sample_lists(self) -> List:
         """Gets list of sample lists."""
         response = await self._request('GET', '/LH/GetListofSampleLists/')
@@ -581,11 +665,15 @@ class ManagerClient:
     """
     
     samples: Dict[str, Dict] = {}
+    # sample list version of the last get_samples call (for since_version)
+    samples_version: Optional[int] = None
     layout: LHBedLayout = LHBedLayout()
     materials: Dict[str, Material] = {}
 
     def __init__(self, address: str = MANAGER_ADDRESS):
         self.address = address
+        # {endpoint: (ETag, data)} of responses that can be revalidated with If-None-Match
+        self._etag_cache: Dict[str, Tuple[str, Any]] = {}
 
     def _request(self, method: str, endpoint: str, **kwargs) -> Any:
         url = urljoin(self.address, endpoint)
@@ -599,6 +687,26 @@ class ManagerClient:
             logger.error(f"Request to {endpoint} failed: {data}")
         return data
 
+    def _get_with_etag(self, endpoint: str) -> Any:
+        """GET request that reuses the previous response if the server reports that it is
+            unchanged (304 Not Modified for its ETag)."""
+        url = urljoin(self.address, endpoint)
+        etag, cached = self._etag_cache.get(endpoint, (None, None))
+        headers = {'If-None-Match': etag} if etag is not None else {}
+        response = requests.get(url, headers=headers)
+        if response.status_code == 304:
+            return cached
+        try:
+            data = response.json()
+        except json.JSONDecodeError:
+            raise Exception(f"Failed to decode JSON from {url}. Status: {response.status_code}. Text: {response.text}")
+
+        if not response.ok:
+            logger.error(f"Request to {endpoint} failed: {data}")
+        elif 'ETag' in response.headers:
+            self._etag_cache[endpoint] = (response.headers['ETag'], data)
+        return data
+
     def initialize(self):
         """Initializes the client by loading materials, layout, and samples."""
         self.load_materials()
@@ -657,20 +765,57 @@ class ManagerClient:
     # GUI / Sample Management Endpoints
     # =========================================================================
 
-    def get_samples(self) -> Dict[str, Dict]:
-        """Returns and caches dictionary of samples.
+    def get_samples(self,
+                    offset: int = 0,
+                    limit: Optional[int] = None,
+                    status: Optional[List[str]] = None,
+                    fields: Optional[List[str]] = None,
+                    since_version: Optional[int] = None) -> Dict[str, Dict]:
+        """Fetches samples. Without arguments, fetches and caches the complete sample list.
+
+        Args:
+            offset (int, optional): index of the first sample to return. Defaults to 0.
+            limit (Optional[int], optional): maximum number of samples to return. Defaults to None (all).
+            status (Optional[List[str]], optional): only return samples with these statuses. Defaults to None.
+            fields (Optional[List[str]], optional): sample fields to return, e.g. ['name', 'status',
+                'channel']; 'id' is always returned. Defaults to None (all fields).
+            since_version (Optional[int], optional): only return samples changed since this sample
+                list version (e.g. samples_version). If this is the only argument, the cached
+                sample list is updated. Defaults to None.
 
         Returns:
-            dict[str, dict]: dictionary of samples with sample id as key
+            Dict[str, Dict]: Dictionary of returned samples keyed by sample ID.
         """
-        response = self._request('GET', '/GUI/GetSamples/')
-        self.samples = {s['id']: s for s in response.get('samples', {}).get('samples', [])}
-        return self.samples
+        params = {'offset': offset or None, 'limit': limit, 'since_version': since_version,
+                  'status': None if status is None else ','.join(status),
+                  # samples are keyed by ID, so the ID is always requested
+                  'fields': None if fields is None else ','.join(fields if 'id' in fields else ['id'] + list(fields))}
+        params = {k: v for k, v in params.items() if v is not None}
+        response = self._request('GET', '/GUI/GetSamples/', params=params)
+        samples = {s['id']: s for s in response.get('samples', {}).get('samples', [])}
+        if not len(params):
+            self.samples = samples
+        elif list(params.keys()) == ['since_version']:
+            # unchanged samples are kept; deleted samples are missing from the sample order
+            self.samples = {sample_id: samples.get(sample_id, self.samples.get(sample_id))
+                            for sample_id in response.get('ids', [])
+                            if (sample_id in samples) or (sample_id in self.samples)}
+        self.samples_version = response.get('version', None)
+        return samples
 
     def get_sample_status(self) -> Dict[str, Any]:
         """Fetches the status of all samples."""
         return self._request('GET', '/GUI/GetSampleStatus/')
 
+    def get_estimates(self) -> Dict[str, Dict]:
+        """Fetches the estimated times of all samples, their stages and their methods.
+
+        Returns:
+            Dict[str, Dict]: Dictionary of estimates keyed by sample ID.
+        """
+        response = self._request('GET', '/GUI/GetEstimates/')
+        return response.get('estimates', {})
+
     def get_layout(self) -> LHBedLayout:
         """Returns and caches bed layout.
 
@@ -823,7 +968,7 @@ class ManagerClient:
 
     def get_all_devices(self) -> Dict:
         """Gets schema for all devices."""
-        return self._request('GET', '/GUI/GetAllDevices/')
+        return self._get_with_etag('/GUI/GetAllDevices/')
 
     def update_device(self, device_name: str, param_name: str, param_value: Any):
         """Updates a parameter of a device."""
@@ -836,7 +981,7 @@ class ManagerClient:
 
     def get_all_methods(self) -> Dict:
         """Gets schema for all methods."""
-        return self._request('GET', '/GUI/GetAllMethods/')
+        return self._get_with_etag('/GUI/GetAllMethods/')
 
     # =========================================================================
     # LH Interface Endpoints
@@ -876,6 +1021,27 @@ class ManagerClient:
         }
         return self._request('POST', '/LH/CheckFormulation/', json=data)
 
+    def check_formulations(self,
+                           targets: List[Tuple[Composition, float]],
+                           exact_match: bool = True) -> Dict[str, Any]:
+        """Checks if a batch of target compositions can be formulated, individually and together.
+
+        Args:
+            targets (List[Tuple[Composition, float]]): The desired compositions and volumes.
+            exact_match (bool): Whether to require exact match of components.
+
+        Returns:
+            Dict[str, Any]: Dictionary containing 'results' (one dictionary per target, as returned by
+                check_formulation), 'totals' (total volume drawn from each source well), and 'success'.
+        """
+        data = {
+            'targets': [{'target_composition': target_composition.model_dump(),
+                         'target_volume': target_volume}
+                        for target_composition, target_volume in targets],
+            'exact_match': exact_match
+        }
+        return self._request('POST', '/LH/CheckFormulations/', json=data)
+
     def get_list_of_sample_lists(self) -> List:
         """Gets list of sample lists."""
         response = self._request('GET', '/LH/GetListofSampleLists/')
@@ -0,0 +1,117 @@
+"""Coalescing Socket.IO event bus"""
+import logging
+import threading
+
+from typing import Any, Callable, Dict, List
+
+from .sio import socketio
+
+# time window (s) within which repeated events are combined into one emit
+COALESCE_WINDOW = 0.1
+
+class EventBus:
+    """Combines repeated Socket.IO update events into a single emit.
+
+        Events published within COALESCE_WINDOW seconds of each other are emitted once, at the
+        end of the window. Each emitted event carries a version that increases by one with
+        every emit of that event, so that clients can detect missed updates and fall back
+        to a full refresh. Events can be registered with a snapshot function and a delta
+        function. The snapshot function is called by publish, in the thread that changed the
+        state, and returns an immutable snapshot of it. When the event is emitted, the delta
+        function is called with the latest snapshot and its result (e.g. the IDs of changed
+        samples) is added to the payload; it must not read the live state.
+    """
+
+    def __init__(self, window: float = COALESCE_WINDOW) -> None:
+
+        self.window = window
+        self._snapshots: Dict[str, Callable[[], Any]] = {}
+        self._deltas: Dict[str, Callable[[Any], Dict[str, Any]]] = {}
+        # latest snapshot of each pending event with a snapshot function; None if it failed
+        self._latest: Dict[str, Any] = {}
+        self._versions: Dict[str, int] = {}
+        # pending events in the order in which they were first published
+        self._pending: List[str] = []
+        self._scheduled: bool = False
+        self.lock = threading.Lock()
+
+    def register(self, event: str, snapshot: Callable[[], Any], delta: Callable[[Any], Dict[str, Any]]) -> None:
+        """Registers snapshot and delta functions for an event
+
+        Args:
+            event (str): event name
+            snapshot (Callable[[], Any]): function returning an immutable snapshot of the state
+                the event reports on. Called by publish
+            delta (Callable[[Any], Dict[str, Any]]): function returning the changes between the
+                snapshot it was last called with and a new snapshot, added to the event payload
+        """
+
+        self._snapshots[event] = snapshot
+        self._deltas[event] = delta
+
+    def publish(self, event: str) -> None:
+        """Schedules an event for emitting at the end of the coalescing window
+
+        Args:
+            event (str): event name
+        """
+
+        with self.lock:
+            if event not in self._pending:
+                self._pending.append(event)
+            snapshot = self._snapshots.get(event, None)
+            if snapshot is not None:
+                # taken under the lock, so that a later snapshot is never replaced by an earlier one
+                try:
+                    self._latest[event] = snapshot()
+                except Exception:
+                    # clients without delta information do a full refresh
+                    logging.exception(f'Could not take snapshot for {event}')
+                    self._latest[event] = None
+            if self._scheduled:
+                return
+            self._scheduled = True
+
+        socketio.start_background_task(self._emit_after_window)
+
+    def _emit_after_window(self) -> None:
+        """Background task: waits for the coalescing window to close, then emits"""
+
+        socketio.sleep(self.window)
+        self.flush()
+
+    def flush(self) -> None:
+        """Emits all pending events"""
+
+        with self.lock:
+            pending, self._pending = self._pending, []
+            self._scheduled = False
+
+            payloads = []
+            for event in pending:
+                version = self._versions.get(event, 0) + 1
+                self._versions[event] = version
+                payload = {'msg': event, 'version': version}
+                snapshot = self._latest.pop(event, None)
+                if snapshot is not None:
+                    try:
+                        payload.update(self._deltas[event](snapshot))
+                    except Exception:
+                        # clients without delta information do a full refresh
+                        logging.exception(f'Could not calculate changes for {event}')
+                payloads.append((event, payload))
+
+        for event, payload in payloads:
+            socketio.emit(event, payload, include_self=True)
+
+    def get_versions(self) -> Dict[str, int]:
+        """Versions of the last emitted events
+
+        Returns:
+            Dict[str, int]: version by event name
+        """
+
+        with self.lock:
+            return dict(self._versions)
+
+event_bus = EventBus()
@@ -8,6 +8,7 @@ from ..liquid_handler.devices import device_manager
 from ..liquid_handler.state import samples, layout
 from ..liquid_handler.samplelist import Sample, SampleStatus, MethodList
 from ..liquid_handler.methods import method_manager
+from ..liquid_handler.estimates import estimate_service
 from ..liquid_handler.bedlayout import Well, WellLocation, Rack
 from ..liquid_handler.layoutmap import Zone, LayoutWell2ZoneWell
 from ..liquid_handler.dryrun import DryRunQueue
@@ -26,7 +27,7 @@ def AddSample() -> Response:
     samples.addSample(new_sample)
 
     # dry run (testing only)
-    test_layout = deepcopy(layout)
+    test_layout = layout.snapshot()
     for method in new_sample.stages['prep'].methods:
         method.execute(test_layout)
 
@@ -53,7 +54,7 @@ def UpdateSample() -> Response:
     else:
         """ replacing sample """
         new_sample = Sample(**sample.model_copy(update=data).model_dump())
-        samples.samples[sample_index] = new_sample
+        samples.replaceSample(sample_index, new_sample)
         return make_response({'sample updated': id}, 200)
 
 @gui_blueprint.route('/GUI/ExplodeSample/', methods=['POST'])
@@ -77,6 +78,7 @@ def ExplodeSample() -> Response:
     current_app.logger.info(sample)
     """ exploding sample """
     sample.stages[stage].explode(layout)
+    samples.mark_changed(sample.id)
     return make_response({'sample exploded': id}, 200)
 
 @gui_blueprint.route('/GUI/DuplicateSample/', methods=['POST'])
@@ -117,7 +119,7 @@ def DuplicateSample() -> Response:
             new_sample.stages[key] = MethodList(methods=mlist.methods)
 
         # add to sample list immediately after the duplicated sample
-        samples.samples.insert(sample_index + 1, new_sample)
+        samples.insertSample(sample_index + 1, new_sample)
 
         return make_response({'sample duplicated': new_sample.id}, 200)
 
@@ -271,7 +273,7 @@ def UpdateDryRunQueue() -> Response:
 def DryRun() -> Response:
     """Performs dry run and returns list of errors
     """
-    test_layout = deepcopy(layout)
+    test_layout = layout.snapshot()
     errors = samples.dryrun(test_layout)
 
     return make_response({'dry run errors': errors}, 200)
@@ -297,38 +299,105 @@ def GetRunQueue() -> Response:
 
 @gui_blueprint.route('/GUI/GetSamples/', methods=['GET'])
 def GetSamples() -> Response:
-    """Gets sample list as dict"""
+    """Gets sample list as dict. Optional query parameters:
+        offset (int): index of the first sample to return
+        limit (int): maximum number of samples to return
+        status (str): comma-separated sample statuses; only samples with these statuses are returned
+        fields (str): comma-separated sample fields to return, e.g. 'id,name,status,channel'
+            ('status' is the sample status)
+        since_version (int): only return samples changed since this container version
+
+        The response contains the container 'version' (to use as since_version), the number
+        of samples before pagination ('total') and, if since_version is given, the IDs of all
+        samples in order ('ids'), from which deleted samples can be inferred.
+    """
 
-    return make_response({'samples': samples.model_dump()}, 200)
+    try:
+        offset = request.args.get('offset', 0, type=int)
+        limit = request.args.get('limit', None, type=int)
+        since_version = request.args.get('since_version', None, type=int)
+        status = request.args.get('status', None, type=str)
+        statuses = None if status is None else [SampleStatus(st) for st in status.split(',')]
+        fields = request.args.get('fields', None, type=str)
+        fields = None if fields is None else fields.split(',')
+    except ValueError as e:
+        return make_response({'result': 'error', 'message': f'bad request format: {e}'}, 400)
+
+    if fields is not None:
+        unknown_fields = [f for f in fields if (f not in Sample.model_fields) and (f != 'status')]
+        if len(unknown_fields):
+            return make_response({'result': 'error', 'message': f'unknown sample fields {unknown_fields}'}, 400)
+
+    # versions are updated by the sample update triggers
+    version = samples.version
+    sample_list = samples.samples if since_version is None else samples.get_changed_since(since_version)
+    if statuses is not None:
+        sample_list = [sample for sample in sample_list if sample.get_status() in statuses]
+    total = len(sample_list)
+    sample_list = sample_list[offset:] if limit is None else sample_list[offset:offset + limit]
+
+    if fields is None:
+        sample_dicts = [sample.model_dump() for sample in sample_list]
+    else:
+        include = set(f for f in fields if f != 'status')
+        sample_dicts = []
+        for sample in sample_list:
+            sample_dict = sample.model_dump(include=include)
+            if 'status' in fields:
+                sample_dict['status'] = sample.get_status()
+            sample_dicts.append(sample_dict)
+
+    response = {'samples': {'samples': sample_dicts, **samples.model_dump(exclude={'samples'})},
+                'version': version,
+                'total': total}
+    if since_version is not None:
+        response['ids'] = [sample.id for sample in samples.samples]
+
+    return make_response(response, 200)
 
 @gui_blueprint.route('/GUI/GetSampleStatus/', methods=['GET'])
 def GetSamplesStatus() -> Response:
     """Gets sample list statuses"""
 
-    status_dict = {}
-    for sample in samples.samples:
-        status = {"status": sample.get_status()}
-        stages = {}
-        for stage_name, stage in sample.stages.items():
-            stage_status = {"status": stage.status}
-            stage_status["methods_complete"] = stage.get_method_completion()
-            stages[stage_name] = stage_status
-        status["stages"] = stages
-        status_dict[sample.id] = status
+    status_dict = {sample.id: sample.get_status_summary() for sample in samples.samples}
 
     return make_response(status_dict, 200)
 
+@gui_blueprint.route('/GUI/GetEstimates/', methods=['GET'])
+def GetEstimates() -> Response:
+    """Gets estimated times of all samples, their stages and their methods"""
+
+    return make_response({'estimates': estimate_service.get_estimates(samples, layout)}, 200)
+
+def _make_etag_response(key: str, content: Tuple[str, str]) -> Response:
+    """Makes a JSON response {key: content} from pre-serialized content and its ETag.
+        Responds with 304 Not Modified if the request's If-None-Match matches the ETag.
+
+    Args:
+        key (str): top-level key of the response
+        content (Tuple[str, str]): JSON text and ETag of the content
+
+    Returns:
+        Response: response
+    """
+
+    text, etag = content
+    response = Response(f'{{"{key}": {text}}}', status=200, mimetype='application/json')
+    response.set_etag(etag)
+
+    return response.make_conditional(request)
+
 @gui_blueprint.route('/GUI/GetAllMethods/', methods=['GET'])
 def GetAllMethodSchema() -> Response:
-    """Gets method fields and pydantic schema of all methods"""
+    """Gets method fields and pydantic schema of all methods. Supports If-None-Match"""
 
-    return make_response({'methods': method_manager.get_all_schema()}, 200)
+    return _make_etag_response('methods', method_manager.get_all_schema_json())
 
 @gui_blueprint.route('/GUI/GetAllDevices/', methods=['GET'])
 def GetAllDeviceSchema() -> Response:
-    """Gets method fields and pydantic schema of all devices"""
+    """Gets method fields and pydantic schema of all devices. Supports If-None-Match"""
 
-    return make_response({'devices': device_manager.get_all_schema()}, 200)
+    return _make_etag_response('devices', device_manager.get_all_schema_json())
 
 @gui_blueprint.route('/GUI/UpdateDevice/', methods=['POST'])
 @trigger_device_update
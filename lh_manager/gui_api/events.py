@@ -1,14 +1,168 @@
 #import socketio as sio
 
-from ..sio import socketio
-from ..liquid_handler.state import save_layout, save_samples, save_devices
+from typing import Any, Dict, Tuple
+
+from ..eventbus import event_bus
+from ..liquid_handler.persistence import persistence_writer
+from ..liquid_handler.estimates import estimate_service
+from ..liquid_handler.samplecontainer import SampleState
+from ..liquid_handler import state     # registers the persistent state with persistence_writer
+
+class SampleChanges:
+    """Finds the samples that changed since the last update_samples event, from the sample
+        versions (see SampleContainer.update_versions)"""
+
+    def __init__(self) -> None:
+
+        # container version and sample order at the last event
+        sample_state = self.snapshot()
+        self._version: int = sample_state.version
+        self._order: Tuple[str, ...] = sample_state.order
+
+    def snapshot(self) -> SampleState:
+        """Snapshot of the sample list, taken when the event is published"""
+
+        return state.samples.get_state()
+
+    def __call__(self, sample_state: SampleState) -> Dict[str, Any]:
+        """Changes since the last call
+
+        Args:
+            sample_state (SampleState): snapshot of the sample list
+
+        Returns:
+            Dict[str, Any]: IDs of 'changed' (new or modified) and 'deleted' samples, and the
+                sample order 'ids' if it changed otherwise
+        """
+
+        order = sample_state.order
+        ids, previous = set(order), set(self._order)
+        changed = list(dict.fromkeys(sample_id for sample_id in order
+                                     if sample_state.sample_versions.get(sample_id, sample_state.version) > self._version))
+        deleted = [sample_id for sample_id in self._order if sample_id not in ids]
+        delta = {'changed': changed, 'deleted': deleted}
+        if order != tuple(sample_id for sample_id in self._order if sample_id in ids) + \
+                    tuple(sample_id for sample_id in order if sample_id not in previous):
+            delta['ids'] = list(order)
+
+        self._version, self._order = sample_state.version, order
+
+        return delta
+
+class SampleStatusChanges:
+    """Finds the sample statuses that changed since the last update_sample_status event. Each
+        snapshot only recalculates the statuses of samples changed since the previous snapshot
+        (see SampleContainer.update_versions)"""
+
+    def __init__(self) -> None:
+
+        # container version and statuses at the last snapshot, and statuses at the last event
+        self._snapshot_version: int = 0
+        self._snapshot_status: Dict[str, dict] = {}
+        self._status: Dict[str, dict] = self.snapshot()
+
+    def snapshot(self) -> Dict[str, dict]:
+        """Statuses of all samples by sample ID, taken when the event is published. The
+            returned dictionary is not modified afterwards"""
+
+        sample_state = state.samples.get_state()
+        status = {sample_id: self._snapshot_status[sample_id] for sample_id in sample_state.order
+                  if sample_id in self._snapshot_status}
+        for sample_id in sample_state.order:
+            if sample_state.sample_versions.get(sample_id, sample_state.version) > self._snapshot_version:
+                _, sample = state.samples.getSampleById(sample_id)
+                if sample is not None:
+                    status[sample_id] = sample.get_status_summary()
+        self._snapshot_version, self._snapshot_status = sample_state.version, status
+
+        return status
+
+    def __call__(self, status: Dict[str, dict]) -> Dict[str, Any]:
+        """Changes since the last call
+
+        Args:
+            status (Dict[str, dict]): snapshot of the sample statuses
+
+        Returns:
+            Dict[str, Any]: new 'status' of samples whose status changed by sample ID, in the
+                format of GetSampleStatus, and IDs of 'deleted' samples
+        """
+
+        changed = {sample_id: sample_status for sample_id, sample_status in status.items()
+                   if (self._status.get(sample_id, None) is not sample_status)
+                   and (self._status.get(sample_id, None) != sample_status)}
+        deleted = [sample_id for sample_id in self._status.keys() if sample_id not in status]
+        self._status = status
+
+        return {'status': changed, 'deleted': deleted}
+
+class LayoutChanges:
+    """Finds the wells that changed since the last update_layout event"""
+
+    def __init__(self) -> None:
+
+        # snapshot (layout version, wells, racks) at the last snapshot and at the last event
+        self._snapshot: Tuple[int, Dict[Tuple[str, int], dict], Dict[str, dict]] | None = None
+        self._version, self._wells, self._racks = self.snapshot()
+
+    def _get_racks(self) -> Dict[str, dict]:
+        """Rack definitions (without wells) by rack ID"""
+
+        return {rack_id: rack.model_dump(mode='json', exclude={'wells'}) for rack_id, rack in state.layout.racks.items()}
+
+    def _get_wells(self) -> Dict[Tuple[str, int], dict]:
+        """Filled wells by location"""
+
+        return {(well.rack_id, well.well_number): well.model_dump(mode='json') for well in state.layout.get_all_wells()}
+
+    def snapshot(self) -> Tuple[int, Dict[Tuple[str, int], dict], Dict[str, dict]]:
+        """Layout version, wells and racks, taken when the event is published. The wells and
+            racks are only serialized again if the layout version has changed"""
+
+        version = state.layout.version
+        if (self._snapshot is None) or (self._snapshot[0] != version):
+            self._snapshot = (version, self._get_wells(), self._get_racks())
+
+        return self._snapshot
+
+    def __call__(self, snapshot: Tuple[int, Dict[Tuple[str, int], dict], Dict[str, dict]]) -> Dict[str, Any]:
+        """Changes since the last call
+
+        Args:
+            snapshot (Tuple[int, Dict[Tuple[str, int], dict], Dict[str, dict]]): snapshot of the layout
+
+        Returns:
+            Dict[str, Any]: layout 'layout_version', new or modified 'changed_wells' (as in
+                GetWells, without zones), locations of 'removed_wells' and whether any rack
+                definitions changed ('racks_changed')
+        """
+
+        version, wells, racks = snapshot
+        if version == self._version:
+            return {'layout_version': version, 'changed_wells': [], 'removed_wells': [], 'racks_changed': False}
+
+        changed = [well for location, well in wells.items() if self._wells.get(location, None) != well]
+        removed = [{'rack_id': rack_id, 'well_number': well_number}
+                   for rack_id, well_number in self._wells.keys() if (rack_id, well_number) not in wells]
+        racks_changed = racks != self._racks
+        self._version, self._wells, self._racks = version, wells, racks
+
+        return {'layout_version': version, 'changed_wells': changed, 'removed_wells': removed,
+                'racks_changed': racks_changed}
+
+sample_changes = SampleChanges()
+sample_status_changes = SampleStatusChanges()
+layout_changes = LayoutChanges()
+event_bus.register('update_samples', sample_changes.snapshot, sample_changes)
+event_bus.register('update_sample_status', sample_status_changes.snapshot, sample_status_changes)
+event_bus.register('update_layout', layout_changes.snapshot, layout_changes)
 
 def trigger_device_update(f):
     """Decorator that announces that devices have changed"""
     def wrap(*args, **kwargs):
         ret_val = f(*args, **kwargs)
-        socketio.emit('update_devices', {'msg': 'update_devices'}, include_self=True)
-        save_devices()
+        event_bus.publish('update_devices')
+        persistence_writer.mark_dirty('devices')
         return ret_val
     wrap.__name__ = f.__name__
     return wrap
@@ -17,8 +171,8 @@ def trigger_layout_update(f):
     """Decorator that announces that layout has changed"""
     def wrap(*args, **kwargs):
         ret_val = f(*args, **kwargs)
-        socketio.emit('update_layout', {'msg': 'update_layout'}, include_self=True)
-        save_layout()
+        event_bus.publish('update_layout')
+        persistence_writer.mark_dirty('layout')
         return ret_val
     wrap.__name__ = f.__name__
     return wrap
@@ -27,7 +181,7 @@ def trigger_run_queue_update(f):
     """Decorator that announces that the run queue has changed"""
     def wrap(*args, **kwargs):
         ret_val = f(*args, **kwargs)
-        socketio.emit('update_run_queue', {'msg': 'update_run_queue'}, include_self=True)
+        event_bus.publish('update_run_queue')
         return ret_val
     wrap.__name__ = f.__name__
     return wrap
@@ -36,8 +190,10 @@ def trigger_samples_update(f):
     """Decorator that announces that samples has changed"""
     def wrap(*args, **kwargs):
         ret_val = f(*args, **kwargs)
-        socketio.emit('update_samples', {'msg': 'update_samples'}, include_self=True)
-        save_samples()
+        state.samples.update_versions()
+        estimate_service.invalidate()
+        event_bus.publish('update_samples')
+        persistence_writer.mark_dirty('samples')
         return ret_val
     wrap.__name__ = f.__name__
     return wrap
@@ -46,8 +202,10 @@ def trigger_sample_status_update(f):
     """Decorator that announces that samples has changed"""
     def wrap(*args, **kwargs):
         ret_val = f(*args, **kwargs)
-        socketio.emit('update_sample_status', {'msg': 'update_sample_status'}, include_self=True)
-        save_samples()
+        state.samples.update_versions()
+        estimate_service.invalidate()
+        event_bus.publish('update_sample_status')
+        persistence_writer.mark_dirty('samples')
         return ret_val
     wrap.__name__ = f.__name__
     return wrap
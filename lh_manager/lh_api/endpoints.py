@@ -5,7 +5,7 @@ import traceback
 
 from flask import make_response, Response, request
 from ..liquid_handler.bedlayout import Composition
-from ..liquid_handler.formulation import solve_formulation
+from ..liquid_handler.formulation import solve_formulation, solve_formulations
 from ..liquid_handler.job import ResultStatus, ValidationStatus
 from ..liquid_handler.lhinterface import LHJob, lh_interface, LHJobHistory, InterfaceStatus
 from ..liquid_handler.state import layout
@@ -145,6 +145,37 @@ def CheckFormulation() -> Response:
     except Exception as e:
         return make_response({'success': False, 'error': str(e)}, 400)
 
+@lh_blueprint.route('/LH/CheckFormulations/', methods=['POST'])
+def CheckFormulations() -> Response:
+    """Checks if a batch of formulations is possible given the current layout, both individually
+        and in terms of the total volume drawn from each source well. Data format:
+        {'targets': [{'target_composition': <Composition>, 'target_volume': <float>}, ...],
+         'exact_match': <bool>}
+    """
+    data = request.get_json(force=True)
+
+    try:
+        targets = [(Composition(**target.get('target_composition', {})), float(target.get('target_volume', 0.0)))
+                   for target in data.get('targets', [])]
+        exact_match = bool(data.get('exact_match', True))
+
+        result = solve_formulations(
+            layout=layout,
+            targets=targets,
+            exact_match=exact_match
+        )
+
+        # Serialize wells in the result
+        for target_result in result['results']:
+            target_result['wells'] = [w.model_dump() for w in target_result['wells']]
+        for total in result['totals']:
+            total['well'] = total['well'].model_dump()
+
+        return make_response(result, 200)
+
+    except Exception as e:
+        return make_response({'success': False, 'error': str(e)}, 400)
+
 @lh_blueprint.route('/LH/GetListofSampleLists/', methods=['GET'])
 def GetListofSampleLists() -> Response:
     """Gets list of sample lists for Gilson LH
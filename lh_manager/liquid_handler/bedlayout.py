@@ -1,8 +1,15 @@
 """Class definitions for bed layout, wells, and compositions"""
-from copy import deepcopy
+import threading
+import weakref
+
+from copy import copy, deepcopy
+from itertools import count
 from uuid import uuid4
-from pydantic import BaseModel, Field
-from typing import Optional, Tuple, List
+from bisect import bisect_left
+from pydantic import BaseModel, Field, PrivateAttr
+from typing import Optional, Tuple, List, Dict
+
+import numpy as np
 
 # ======= Unit conversions ===========
 MASS_UNITS = ['mg/mL', 'mg/L', 'ug/mL']
@@ -19,6 +26,66 @@ mass_conversion = {'mg/mL': 1,
                    'mg/L': 1e-3,
                    'ug/mL': 1e3}
 
+# conversion factors keyed by (from_units, to_units). Each entry is (factor, mw_power), such that
+# the concentration in to_units is concentration * factor * molecular_weight ** mw_power
+UNIT_CONVERSIONS: Dict[Tuple[str, str], Tuple[float, int]] = {}
+for _from_units, _from_conversion in volume_conversion.items():
+    for _to_units, _to_conversion in volume_conversion.items():
+        UNIT_CONVERSIONS[(_from_units, _to_units)] = (_from_conversion / _to_conversion, 0)
+    for _to_units, _to_conversion in mass_conversion.items():
+        UNIT_CONVERSIONS[(_from_units, _to_units)] = (_from_conversion / _to_conversion, 1)
+for _from_units, _from_conversion in mass_conversion.items():
+    for _to_units, _to_conversion in mass_conversion.items():
+        UNIT_CONVERSIONS[(_from_units, _to_units)] = (_from_conversion / _to_conversion, 0)
+    for _to_units, _to_conversion in volume_conversion.items():
+        UNIT_CONVERSIONS[(_from_units, _to_units)] = (_from_conversion / _to_conversion, -1)
+for _units in (VOLUME_UNITS + MASS_UNITS):
+    UNIT_CONVERSIONS[(_units, _units)] = (1.0, 0)
+
+def _unknown_units(units: str, ref_units: str) -> ValueError:
+    """Error for a conversion that is not in UNIT_CONVERSIONS"""
+
+    return ValueError(f'Unknown units {ref_units if units in (VOLUME_UNITS + MASS_UNITS) else units}')
+
+def convert_many(concentrations: np.ndarray,
+                 units: np.ndarray | str,
+                 molecular_weights: np.ndarray | None = None,
+                 ref_units: str = 'M') -> np.ndarray:
+    """Vectorized version of Solute.convert_units
+
+    Args:
+        concentrations (np.ndarray): concentration values
+        units (np.ndarray | str): units of each concentration value (object array), or a single
+            unit for all values. Entries that are None are ignored
+        molecular_weights (np.ndarray | None, optional): molecular weights of each value (NaN if
+            unknown). Defaults to None (all unknown).
+        ref_units (str, optional): reference units. Defaults to M.
+
+    Returns:
+        np.ndarray: concentrations in reference units. NaN where units are None or a
+            molecular weight is required but unknown
+    """
+
+    if ref_units not in (VOLUME_UNITS + MASS_UNITS):
+        raise ValueError(f'Unknown units {ref_units}')
+
+    concentrations = np.asarray(concentrations, dtype=float)
+    units = np.broadcast_to(np.asarray(units, dtype=object), concentrations.shape)
+    if molecular_weights is None:
+        molecular_weights = np.full(concentrations.shape, np.nan)
+    molecular_weights = np.asarray(molecular_weights, dtype=float)
+
+    factors = np.full(concentrations.shape, np.nan)
+    mw_powers = np.zeros(concentrations.shape)
+    for unit in set(units.ravel()) - {None}:
+        conversion = UNIT_CONVERSIONS.get((unit, ref_units), None)
+        if conversion is None:
+            raise _unknown_units(unit, ref_units)
+        crit = (units == unit)
+        factors[crit], mw_powers[crit] = conversion
+
+    return concentrations * factors * molecular_weights ** mw_powers
+
 def volumeunits2massunits(c: float, mw: float):
     """Convert M to mg/mL"""
     return c * mw
@@ -30,6 +97,68 @@ def massunits2volumeunits(c: float, mw: float):
 def is_close(a, b, tol=1e-10):
     return (abs(a - b) < tol)
 
+# ======= Composition keys ===========
+# significant digits retained in quantized composition keys
+KEY_DIGITS = 12
+# maximum number of interned composition keys
+MAX_INTERNED_KEYS = 100000
+
+_interned_keys: Dict[tuple, tuple] = {}
+
+def _intern_key(key: tuple) -> tuple:
+    """Returns a canonical instance of a composition key so that equal keys are usually identical"""
+
+    if len(_interned_keys) >= MAX_INTERNED_KEYS:
+        _interned_keys.clear()
+
+    return _interned_keys.setdefault(key, key)
+
+def _quantize(value: float) -> float:
+    """Rounds to KEY_DIGITS significant digits"""
+
+    return float(f'{value:.{KEY_DIGITS}g}')
+
+# solute concentrations are compared with is_close in the units of one of the solutes, i.e.
+# in canonical units the tolerance is scaled by up to the largest conversion factor
+_KEY_TOLERANCE = 1e-10 * max(list(mass_conversion.values()) + list(volume_conversion.values()))
+# relative rounding error of quantized values
+_KEY_RESOLUTION = 10 ** (1 - KEY_DIGITS)
+
+def keys_may_match(key: tuple, other_key: tuple) -> bool:
+    """Checks whether compositions with quantized keys key and other_key (see Composition.key)
+        can be equal. False guarantees that they are not equal.
+
+    Args:
+        key (tuple): quantized composition key
+        other_key (tuple): quantized composition key
+
+    Returns:
+        bool: False if the compositions are certainly different
+    """
+
+    if key is other_key:
+        return True
+
+    if key[0] != other_key[0]:
+        return False
+
+    # no conclusions for compositions with duplicate components
+    for k in (key, other_key):
+        if (len(k[1]) != len(k[0][0])) or (len(k[2]) != len(k[0][1])):
+            return True
+
+    # solvent fractions are compared exactly
+    if key[1] != other_key[1]:
+        return False
+
+    for (_, units, concentration), (_, other_units, other_concentration) in zip(key[2], other_key[2]):
+        if units == other_units:
+            difference = abs(concentration - other_concentration)
+            if difference > _KEY_TOLERANCE + _KEY_RESOLUTION * max(abs(concentration), abs(other_concentration)):
+                return False
+
+    return True
+
 class Solvent(BaseModel):
     name: str = ''
     fraction: float = 0.0
@@ -56,22 +185,18 @@ class Solute(BaseModel):
         """
         if self.units == ref_units:
             return self.concentration
-        elif (self.units in MASS_UNITS) & (ref_units in MASS_UNITS):
-            ref_conversion = mass_conversion[ref_units]
-            value_conversion = mass_conversion[self.units]
-            return self.concentration * value_conversion / ref_conversion
-        elif (self.units in MASS_UNITS) & (ref_units in VOLUME_UNITS):
-            return self.concentration * mass_conversion[self.units] /  self.molecular_weight / volume_conversion[ref_units]
-        elif (self.units in VOLUME_UNITS) & (ref_units in MASS_UNITS):
-            return self.concentration * volume_conversion[self.units] * self.molecular_weight / mass_conversion[ref_units]
-        elif (self.units in VOLUME_UNITS) & (ref_units in VOLUME_UNITS):
-            ref_conversion = volume_conversion[ref_units]
-            value_conversion = volume_conversion[self.units]
-            return self.concentration * value_conversion / ref_conversion
-        elif (self.units not in (VOLUME_UNITS + MASS_UNITS)):
-            raise ValueError(f'Unknown units {self.units}')
-        elif (ref_units not in (VOLUME_UNITS + MASS_UNITS)):
-            raise ValueError(f'Unknown units {ref_units}')
+
+        conversion = UNIT_CONVERSIONS.get((self.units, ref_units), None)
+        if conversion is None:
+            raise _unknown_units(self.units, ref_units)
+
+        factor, mw_power = conversion
+        if mw_power == 0:
+            return self.concentration * factor
+        elif mw_power > 0:
+            return self.concentration * factor * self.molecular_weight
+        else:
+            return self.concentration * factor / self.molecular_weight
 
     def __eq__(self, value):
         if not isinstance(value, Solute):
@@ -82,11 +207,29 @@ class Solute(BaseModel):
         # to occasionally be None
         return (self.name == value.name) & (is_close(self.concentration, value.convert_units(self.units)))
 
+    def canonical_concentration(self) -> Tuple[str, float]:
+        """Returns concentration in canonical units (M for molar units, mg/mL for mass units)
+            without requiring a molecular weight
+
+        Returns:
+            Tuple[str, float]: canonical units and concentration in those units
+        """
+
+        if self.units in VOLUME_UNITS:
+            return 'M', self.concentration * volume_conversion[self.units]
+        elif self.units in MASS_UNITS:
+            return 'mg/mL', self.concentration * mass_conversion[self.units]
+
+        return self.units, self.concentration
+
 class Composition(BaseModel):
     """Class representing a solution composition"""
     solvents: list[Solvent] = Field(default_factory=list)
     solutes: list[Solute] = Field(default_factory=list)
 
+    # cached (signature, names key, quantized key, exact key); see _get_keys
+    _keys: tuple | None = PrivateAttr(default=None)
+
     def __repr__(self) -> str:
         """Custom representation of composition for metadata"""
 
@@ -114,10 +257,99 @@ class Composition(BaseModel):
         return self.solvents
 
 
+    def _signature(self) -> tuple:
+        """Values of all components that the composition keys depend on. Components are
+            compared by value because component equality is tolerance-based
+
+        Returns:
+            tuple: solvent names and fractions and solute names, concentrations and units
+        """
+
+        return (tuple([(s.name, s.fraction) for s in self.solvents]),
+                tuple([(s.name, s.concentration, s.units, s.molecular_weight) for s in self.solutes]))
+
+    def _get_keys(self) -> tuple:
+        """Gets cached composition keys, recalculating them if the components have changed.
+
+            signature: see _signature. Changes whenever the composition is modified, including
+                in-place changes to its components.
+            names key: sets of names of solvents and solutes with positive amounts. Compositions
+                with different names keys are never equal.
+            quantized key: names key plus normalized solvent fractions and solute concentrations in
+                canonical units, rounded to KEY_DIGITS significant digits.
+            exact key: positive components with unrounded normalized solvent fractions and solute
+                concentrations in their original units. Compositions with equal exact keys are
+                always equal. None if the composition contains duplicate components.
+
+        Returns:
+            tuple: (signature, names key, quantized key, exact key)
+        """
+
+        signature = self._signature()
+        # read the private attribute directly; pydantic's private attribute lookup is
+        # comparatively slow and this is called on every comparison
+        keys = self.__pydantic_private__['_keys']
+        if (keys is not None) and (keys[0] == signature):
+            return keys
+
+        positive_solvents = [s for s in self.solvents if s.fraction > 0]
+        positive_solutes = [s for s in self.solutes if s.concentration > 0]
+        sum_fractions = sum(s.fraction for s in self.solvents)
+        solvent_fractions = [(s.name, s.fraction / sum_fractions) for s in positive_solvents]
+
+        names_key = _intern_key((frozenset(s.name for s in positive_solvents),
+                                 frozenset(s.name for s in positive_solutes)))
+        canonical_solutes = [(s.name, *s.canonical_concentration()) for s in positive_solutes]
+        quantized_key = _intern_key((names_key,
+                                     tuple(sorted((name, _quantize(fraction)) for name, fraction in solvent_fractions)),
+                                     tuple(sorted((name, units, _quantize(conc)) for name, units, conc in canonical_solutes))))
+
+        exact_key = None
+        if (len(names_key[0]) == len(positive_solvents)) & (len(names_key[1]) == len(positive_solutes)):
+            exact_key = _intern_key((tuple(sorted(solvent_fractions)),
+                                     tuple(sorted((s.name, s.units, s.concentration) for s in positive_solutes))))
+
+        keys = (signature, names_key, quantized_key, exact_key)
+        self.__pydantic_private__['_keys'] = keys
+
+        return keys
+
+    @property
+    def key(self) -> tuple:
+        """Canonical key: names of components with positive amounts, normalized solvent fractions, and
+            solute concentrations in canonical units, quantized to KEY_DIGITS significant digits.
+            Equal compositions almost always have equal keys (except for amounts that round
+            differently), so the key can be used to group compositions, but equality should be
+            confirmed with ==."""
+
+        return self._get_keys()[2]
+
+    def __hash__(self) -> int:
+        # only the component names are guaranteed to be identical for equal compositions
+        return hash(self._get_keys()[1])
+
     def __eq__(self, value) -> bool:
         if not isinstance(value, Composition):
             return NotImplemented
-        
+
+        if self is value:
+            return True
+
+        _, names_key, _, exact_key = self._get_keys()
+        _, value_names_key, _, value_exact_key = value._get_keys()
+        if names_key != value_names_key:
+            return False
+        if (exact_key is not None) and (value_exact_key is not None):
+            if exact_key == value_exact_key:
+                return True
+            # solvent fractions are compared exactly
+            if exact_key[0] != value_exact_key[0]:
+                return False
+            # solutes are sorted by (unique) name; concentrations in the same units need no conversion
+            for (_, units, concentration), (_, value_units, value_concentration) in zip(exact_key[1], value_exact_key[1]):
+                if (units == value_units) and not is_close(concentration, value_concentration):
+                    return False
+
         # check solvents. assumes no duplicates
         solvents_same = False
         sum_fractions = sum(s.fraction for s in self.solvents)
@@ -213,6 +445,106 @@ def combine_components(components1: list[str], concs1: list[float], volume1: flo
 
     return new_components, new_concs, volume1 + volume2
 
+def _can_mix_many(volume: float, composition: Composition, solutions: List[Tuple[float, Composition]]) -> bool:
+    """Checks whether mix_compositions reproduces sequential mixing, i.e. that there are no
+        duplicate components, zero total solvent fractions, or zero intermediate volumes (which
+        lead to special cases or errors in Solution.mix_with)"""
+
+    total_volume = volume
+    for i, (v, c) in enumerate([(volume, composition)] + list(solutions)):
+        if i > 0:
+            total_volume += v
+            if total_volume == 0:
+                return False
+        solvent_names = c.get_solvent_names()
+        solute_names = c.get_solute_names()
+        if (len(set(solvent_names)) != len(solvent_names)) or (len(set(solute_names)) != len(solute_names)):
+            return False
+        if len(solvent_names) and (sum(s.fraction for s in c.solvents) == 0):
+            return False
+
+    return True
+
+def mix_compositions(volume: float,
+                     composition: Composition,
+                     solutions: List[Tuple[float, Composition]]) -> Tuple[float, Composition]:
+    """Mixes a sequence of solutions into an initial solution in one calculation. Gives the same
+        result as calling Solution.mix_with for each solution in order, including the priority of
+        the units of the first solution containing each solute, up to floating point rounding:
+        the amounts are summed in a different order, so solvent fractions and solute
+        concentrations can differ in the last digits and the result need not compare equal (==)
+        to the sequentially mixed composition. Solvents are listed in order of first appearance.
+
+    Args:
+        volume (float): initial volume
+        composition (Composition): initial composition
+        solutions (List[Tuple[float, Composition]]): (volume, composition) of solutions to add, in order
+
+    Returns:
+        Tuple[float, Composition]: total volume and composition of the mixture
+    """
+
+    compositions = [composition] + [c for _, c in solutions]
+    volumes = np.array([volume] + [v for v, _ in solutions], dtype=float)
+    total_volumes = np.cumsum(volumes)
+
+    # solvents: index of each solvent name and normalized fractions of each composition
+    solvent_index: Dict[str, int] = {}
+    for c in compositions:
+        for solvent in c.solvents:
+            solvent_index.setdefault(solvent.name, len(solvent_index))
+    fractions = np.zeros((len(compositions), len(solvent_index)))
+    listed = np.zeros((len(compositions), len(solvent_index)), dtype=bool)
+    for i, c in enumerate(compositions):
+        for solvent in c.solvents:
+            fractions[i, solvent_index[solvent.name]] = solvent.fraction
+            listed[i, solvent_index[solvent.name]] = True
+    has_solvents = listed.any(axis=1)
+    fractions[has_solvents] /= fractions[has_solvents].sum(axis=1, keepdims=True)
+
+    # Mixing renormalizes the existing solvent fractions at every step, so solvent-free additions
+    # do not dilute them. In terms of q = (normalized fractions) x (total volume), step i gives
+    #   q_i = (q_(i-1) + g_i v_i) r_i,  r_i = V_i / (V_(i-1) [if solvents present] + v_i [if solvents added]),
+    # so each solution enters the final fractions with weight v_i times the product of later r.
+    # The final step is not renormalized.
+    present = np.logical_or.accumulate(has_solvents)
+    n = len(compositions) - 1
+    solvent_volumes = np.where(present[:-1], total_volumes[:-1], 0.0) + np.where(has_solvents[1:], volumes[1:], 0.0)
+    if np.any((solvent_volumes[:-1] == 0) & present[1:-1]):
+        # as in Composition.get_solvent_fractions
+        raise ZeroDivisionError('float division by zero')
+    ratios = np.divide(total_volumes[1:], solvent_volumes, out=np.ones(n), where=(solvent_volumes != 0))
+    # later_ratios[i] = product of r over steps i + 1, ..., n - 1 (the last step is not renormalized)
+    later_ratios = np.append(np.cumprod(ratios[-2::-1])[::-1], 1.0) if n > 0 else np.ones(1)
+    weights = volumes * np.append(later_ratios[:1], later_ratios)[:n + 1]
+    mixed_fractions = (weights[:, None] * fractions).sum(axis=0) / total_volumes[-1]
+    present = listed.any(axis=0)
+
+    # solutes: amounts accumulate linearly, in the units of the first solution containing each solute
+    solute_index: Dict[str, int] = {}
+    reference_solutes: List[Solute] = []
+    amounts: List[float] = []
+    for c, v in zip(compositions, volumes):
+        for solute in c.solutes:
+            j = solute_index.get(solute.name, None)
+            if j is None:
+                solute_index[solute.name] = len(reference_solutes)
+                reference_solutes.append(solute)
+                amounts.append(solute.concentration * v)
+            else:
+                amounts[j] += solute.convert_units(reference_solutes[j].units) * v
+    concentrations = np.array(amounts, dtype=float) / total_volumes[-1]
+
+    new_composition = Composition(solvents=[Solvent(name=name, fraction=float(mixed_fractions[j]))
+                                            for name, j in solvent_index.items() if present[j]],
+                                  solutes=[Solute(name=solute.name,
+                                                  concentration=float(concentration),
+                                                  molecular_weight=solute.molecular_weight,
+                                                  units=solute.units)
+                                           for solute, concentration in zip(reference_solutes, concentrations)])
+
+    return float(total_volumes[-1]), new_composition
+
 class WellLocation(BaseModel):
     rack_id: Optional[str] = None
     well_number: Optional[int] = None
@@ -247,8 +579,7 @@ class Solution(BaseModel):
         new_solutes: list[Solute] = []
         for solute_name, solute in zip(solutes1, self.composition.solutes):
             if solute_name not in solutes2:
-                new_solute = deepcopy(solute)
-                new_solute.concentration *= self.volume / new_volume
+                new_solute = solute.model_copy(update={'concentration': solute.concentration * self.volume / new_volume})
             else:
                 solute2 = composition.solutes[solutes2.index(solute_name)]
                 new_concentration = (solute.concentration * self.volume + solute2.convert_units(solute.units) * volume) / new_volume
@@ -262,14 +593,33 @@ class Solution(BaseModel):
         for solute_name, solute in zip(solutes2, composition.solutes):
             # check if this solute is already processed
             if solute_name not in solutes1:
-                new_solute = deepcopy(solute)
-                new_solute.concentration *= volume / new_volume
+                new_solute = solute.model_copy(update={'concentration': solute.concentration * volume / new_volume})
                 new_solutes.append(new_solute)
 
         self.volume = new_volume
         self.composition = Composition(solutes=new_solutes,
                                        solvents=[Solvent(name=name, fraction=fraction) for name, fraction in zip(new_solvents, new_fractions)])
 
+    def mix_many(self, solutions: List[Tuple[float, Composition]]) -> None:
+        """Update volume and composition from mixing with a sequence of solutions. Equivalent to
+            calling mix_with for each solution in order up to floating point rounding (see
+            mix_compositions), but calculated in a single step
+
+        Args:
+            solutions (List[Tuple[float, Composition]]): (volume, composition) of solutions to add, in order
+        """
+
+        solutions = list(solutions)
+        if not len(solutions):
+            return
+
+        if not _can_mix_many(self.volume, self.composition, solutions):
+            for volume, composition in solutions:
+                self.mix_with(volume, composition)
+            return
+
+        self.volume, self.composition = mix_compositions(self.volume, self.composition, solutions)
+
 class Well(Solution):
     """Class representing the contents of a single well
     
@@ -284,6 +634,28 @@ class Well(Solution):
     well_number: int
     id: str | None = None
 
+# source of LHBedLayout.version values; shared by all layouts so that versions are never reused
+_layout_versions = count(1)
+
+def _next_layout_version() -> int:
+    """Draws a new layout version"""
+
+    return next(_layout_versions)
+
+# guards the well indices of all layouts, which are updated from request handlers and
+# method execution threads
+_index_lock = threading.RLock()
+
+def _fingerprint(well: Well) -> tuple:
+    """Values of a well that the layout indices and version depend on"""
+
+    return (well.volume, well.id, well.composition._get_keys()[0])
+
+def _is_empty(well: Well) -> bool:
+    """Empty wells have zero volume and no assigned ID"""
+
+    return (well.volume == 0) & (well.id is None)
+
 def find_composition(composition: Composition, wells: List[Well]) -> List[Well]:
     """Finds wells containing the desired composition
 
@@ -317,6 +689,383 @@ class LHBedLayout(BaseModel):
     """Class representing a general LH bed layout"""
     racks: dict[str, Rack] = Field(default_factory=dict)
 
+    # well lookup index {rack_id: {well_number: Well}}, rebuilt lazily for each rack
+    _well_index: Dict[str, Dict[int, Well]] = PrivateAttr(default_factory=dict)
+    # well ID index {rack_id: {well.id: Well}}, rebuilt together with _well_index
+    _id_index: Dict[str, Dict[str, Well]] = PrivateAttr(default_factory=dict)
+    # (rack.wells, len(rack.wells)) at the time each rack was indexed
+    _index_signatures: Dict[str, Tuple[list, int]] = PrivateAttr(default_factory=dict)
+    # sorted well numbers of empty wells {rack_id: [well_number]}, rebuilt together with _well_index
+    _free_wells: Dict[str, List[int]] = PrivateAttr(default_factory=dict)
+    # composition index {rack_id: {Composition names key: {Composition.key: {well_number: Well}}}},
+    # rebuilt together with _well_index
+    _composition_index: Dict[str, Dict[tuple, Dict[tuple, Dict[int, Well]]]] = PrivateAttr(default_factory=dict)
+    # key under which each well is listed in _composition_index {rack_id: {well_number: Composition.key}}
+    _indexed_keys: Dict[str, Dict[int, tuple]] = PrivateAttr(default_factory=dict)
+    # indexed well and its fingerprint (volume, ID and composition) at the time it was indexed
+    # {rack_id: {well_number: (Well, fingerprint)}}
+    _fingerprints: Dict[str, Dict[int, tuple]] = PrivateAttr(default_factory=dict)
+    # well numbers handed out or changed since the free list, ID and composition indices were last reconciled
+    _touched: Dict[str, set] = PrivateAttr(default_factory=dict)
+    # copy-on-write snapshot state (see snapshot): (rack_id, well_number) of wells that
+    # have already been copied from the parent layout
+    _cow: bool = PrivateAttr(default=False)
+    _owned_wells: set = PrivateAttr(default_factory=set)
+    # weak references to snapshots of this layout, which may still share wells with it
+    _snapshots: List[weakref.ref] = PrivateAttr(default_factory=list)
+    # layout version (see version) and rack attributes at the time it was last checked
+    _version: int = PrivateAttr(default_factory=_next_layout_version)
+    _version_racks: tuple = PrivateAttr(default=())
+
+    def __copy__(self):
+        """Shallow copies (e.g. model_copy) start with a fresh index so that copies
+            do not share index dictionaries with the original"""
+
+        copied = super().__copy__()
+        copied._clear_index()
+        copied._owned_wells = set(self._owned_wells)
+        copied._snapshots = []
+        return copied
+
+    def __deepcopy__(self, memo=None):
+        """Deep copies reindex their own wells"""
+
+        copied = super().__deepcopy__(memo)
+        copied._clear_index()
+        copied._snapshots = []
+        return copied
+
+    def snapshot(self) -> "LHBedLayout":
+        """Creates a copy-on-write snapshot of the layout, e.g. for dry runs. The snapshot
+            has its own racks and well lists but initially shares the wells with this layout.
+            A shared well is copied when it is first retrieved from the snapshot (with
+            get_well_and_rack, get_well_by_id, find_composition or get_all_wells), or when
+            this layout is about to modify it (get_well_and_rack and the methods based on it,
+            set_well_id). Neither layout therefore sees changes made through the other, and
+            the cost of the copy scales with the number of wells touched.
+
+        Returns:
+            LHBedLayout: snapshot layout
+        """
+
+        with _index_lock:
+            snapshot = copy(self)
+            snapshot.racks = {rack_id: rack.model_copy(update={'wells': list(rack.wells)})
+                              for rack_id, rack in self.racks.items()}
+            snapshot._cow = True
+            snapshot._owned_wells = set()
+            self._snapshots = [ref for ref in self._snapshots if ref() is not None]
+            self._snapshots.append(weakref.ref(snapshot))
+
+        return snapshot
+
+    def _own_well(self, well: Well) -> Well:
+        """In a snapshot, replaces a shared well with a private copy before it is handed out
+
+        Args:
+            well (Well): well in this layout
+
+        Returns:
+            Well: well that may be modified
+        """
+
+        key = (well.rack_id, well.well_number)
+        if (not self._cow) or (key in self._owned_wells):
+            return well
+
+        with _index_lock:
+            # snapshots of this snapshot may share the well with the parent layout
+            self._detach_from_snapshots(well)
+            wells = self.racks[well.rack_id].wells
+            new_well = deepcopy(well)
+            wells[next(i for i, w in enumerate(wells) if w is well)] = new_well
+            self._well_index[well.rack_id][well.well_number] = new_well
+            id_index = self._id_index[well.rack_id]
+            if (well.id is not None) and (id_index.get(well.id, None) is well):
+                id_index[well.id] = new_well
+            composition_key = self._indexed_keys[well.rack_id].get(well.well_number, None)
+            if composition_key is not None:
+                self._composition_index[well.rack_id][composition_key[0]][composition_key][well.well_number] = new_well
+            fingerprints = self._fingerprints[well.rack_id]
+            if well.well_number in fingerprints:
+                fingerprints[well.well_number] = (new_well, fingerprints[well.well_number][1])
+            self._owned_wells.add(key)
+
+        return new_well
+
+    def _detach(self, well: Well) -> None:
+        """In a snapshot, copies a well that is shared with the parent layout before
+            the parent modifies it (see snapshot)
+
+        Args:
+            well (Well): well of the parent layout
+        """
+
+        with _index_lock:
+            if ((well.rack_id not in self.racks)
+                or ((well.rack_id, well.well_number) in self._owned_wells)
+                or (self._get_rack_index(well.rack_id).get(well.well_number, None) is not well)):
+                return
+
+            self._own_well(well)
+
+    def _detach_from_snapshots(self, well: Well) -> None:
+        """Makes live snapshots of this layout copy a well before it is modified
+
+        Args:
+            well (Well): well of this layout
+        """
+
+        for ref in self._snapshots:
+            snapshot = ref()
+            if snapshot is not None:
+                snapshot._detach(well)
+
+    def _clear_index(self) -> None:
+        """Discards all well lookup indices"""
+
+        self._well_index = {}
+        self._id_index = {}
+        self._index_signatures = {}
+        self._free_wells = {}
+        self._composition_index = {}
+        self._indexed_keys = {}
+        self._fingerprints = {}
+        self._touched = {}
+        self._version = _next_layout_version()
+
+    def _get_rack_index(self, rack_id: str) -> Dict[int, Well]:
+        """Gets the well number index of a rack. The index is rebuilt if the rack's
+            well list has been replaced or resized outside of the layout methods
+            (e.g. after deserialization or a direct assignment to rack.wells)
+
+        Args:
+            rack_id (str): rack to index
+
+        Returns:
+            Dict[int, Well]: index of wells by well_number
+        """
+
+        wells = self.racks[rack_id].wells
+        signature = self._index_signatures.get(rack_id, None)
+        if (signature is None) or (signature[0] is not wells) or (signature[1] != len(wells)):
+            with _index_lock:
+                rack_index: Dict[int, Well] = {}
+                id_index: Dict[str, Well] = {}
+                for well in wells:
+                    # first definition wins, consistent with list.index
+                    rack_index.setdefault(well.well_number, well)
+                    if well.id is not None:
+                        id_index.setdefault(well.id, well)
+                composition_index: Dict[tuple, Dict[tuple, Dict[int, Well]]] = {}
+                indexed_keys: Dict[int, tuple] = {}
+                fingerprints: Dict[int, tuple] = {}
+                for well_number, well in rack_index.items():
+                    key = well.composition.key
+                    composition_index.setdefault(key[0], {}).setdefault(key, {})[well_number] = well
+                    indexed_keys[well_number] = key
+                    fingerprints[well_number] = (well, _fingerprint(well))
+                self._well_index[rack_id] = rack_index
+                self._id_index[rack_id] = id_index
+                self._index_signatures[rack_id] = (wells, len(wells))
+                self._free_wells[rack_id] = sorted(n for n, w in rack_index.items() if _is_empty(w))
+                self._composition_index[rack_id] = composition_index
+                self._indexed_keys[rack_id] = indexed_keys
+                self._fingerprints[rack_id] = fingerprints
+                self._touched[rack_id] = set()
+                self._version = _next_layout_version()
+
+        return self._well_index[rack_id]
+
+    def _get_id_index(self, rack_id: str) -> Dict[str, Well]:
+        """Gets the well ID index of a rack (see _get_rack_index)"""
+
+        self._get_rack_index(rack_id)
+
+        return self._id_index[rack_id]
+
+    def _unindex_id(self, well: Well) -> None:
+        """Removes a well from the ID index of its rack"""
+
+        id_index = self._get_id_index(well.rack_id)
+        if (well.id is not None) and (id_index.get(well.id, None) is well):
+            id_index.pop(well.id)
+
+    def _touch(self, rack_id: str, well_number: int) -> None:
+        """Marks a well whose volume, ID or composition may have changed for the next reconciliation"""
+
+        self._get_rack_index(rack_id)
+        self._touched[rack_id].add(well_number)
+
+    @property
+    def version(self) -> int:
+        """Layout version. Increases whenever the contents of the layout change, i.e. when
+            racks are added, replaced or modified, or wells are added or removed, or when the
+            volume, ID or composition (including in-place changes to its components) of a well
+            obtained with get_well_and_rack has changed. Versions are drawn from a counter
+            shared by all layouts, so layouts (e.g. a snapshot and its parent) never share a
+            version after either has changed.
+
+            Wells are compared with their state when they were last indexed, so reading a well
+            does not change the version. Wells should be modified with the layout methods
+            (add_to_well, remove_from_well, set_well_id, update_well), which update the indices
+            and the version immediately. Changes to a well obtained with get_well_and_rack are
+            detected at the next call to a layout method; changes made later through that
+            reference (e.g. from another thread) are only detected when an index lookup misses
+            and the rack is verified with a full scan (see _verify_rack).
+
+        Returns:
+            int: layout version
+        """
+
+        # read private attributes directly; pydantic's private attribute lookup is comparatively
+        # slow and this is called whenever cached results are looked up
+        private = self.__pydantic_private__
+        with _index_lock:
+            racks = tuple((rack_id, rack, tuple(v for k, v in rack.__dict__.items() if k != 'wells'))
+                          for rack_id, rack in self.racks.items())
+            version_racks = private['_version_racks']
+            if (len(racks) != len(version_racks)) or any((r[0] != v[0]) or (r[1] is not v[1]) or (r[2] != v[2])
+                                                         for r, v in zip(racks, version_racks)):
+                private['_version'] = _next_layout_version()
+                private['_version_racks'] = racks
+
+            # check wells handed out since the last reconciliation for changes
+            for rack_id in self.racks.keys():
+                self._get_rack_index(rack_id)
+                if len(private['_touched'][rack_id]):
+                    self._reconcile(rack_id)
+
+            return private['_version']
+
+    def _reconcile(self, rack_id: str) -> Dict[int, Well]:
+        """Updates the free list, ID index and composition index of a rack for any wells
+            that have been handed out or changed since the last call. The layout version
+            is increased if any of these wells has changed.
+
+        Args:
+            rack_id (str): rack of interest
+
+        Returns:
+            Dict[int, Well]: index of wells by well_number
+        """
+
+        with _index_lock:
+            rack_index = self._get_rack_index(rack_id)
+            touched, self._touched[rack_id] = self._touched[rack_id], set()
+            if not len(touched):
+                return rack_index
+
+            free = self._free_wells[rack_id]
+            id_index = self._id_index[rack_id]
+            composition_index = self._composition_index[rack_id]
+            indexed_keys = self._indexed_keys[rack_id]
+            fingerprints = self._fingerprints[rack_id]
+            changed = False
+            for well_number in touched:
+                well = rack_index.get(well_number, None)
+                fingerprint = None if well is None else _fingerprint(well)
+                indexed = fingerprints.get(well_number, None)
+                if (indexed is not None) and (indexed[0] is well) and (indexed[1] == fingerprint):
+                    # handed out, but not changed
+                    continue
+                changed = True
+
+                # free list
+                empty = (well is not None) and _is_empty(well)
+                i = bisect_left(free, well_number)
+                listed = (i < len(free)) and (free[i] == well_number)
+                if empty and not listed:
+                    free.insert(i, well_number)
+                elif listed and not empty:
+                    free.pop(i)
+
+                # ID index (entries for old IDs are detected in get_well_by_id)
+                if (well is not None) and (well.id is not None):
+                    id_index.setdefault(well.id, well)
+
+                # composition index
+                old_key = indexed_keys.pop(well_number, None)
+                if old_key is not None:
+                    groups = composition_index[old_key[0]]
+                    groups[old_key].pop(well_number, None)
+                    if not len(groups[old_key]):
+                        groups.pop(old_key)
+                        if not len(groups):
+                            composition_index.pop(old_key[0])
+                if well is not None:
+                    key = well.composition.key
+                    composition_index.setdefault(key[0], {}).setdefault(key, {})[well_number] = well
+                    indexed_keys[well_number] = key
+                    fingerprints[well_number] = (well, fingerprint)
+                else:
+                    fingerprints.pop(well_number, None)
+
+            if changed:
+                self._version = _next_layout_version()
+
+        return rack_index
+
+    def _verify_rack(self, rack_id: str) -> bool:
+        """Compares every well in a rack with its indexed state, and rebuilds the indices
+            of the rack (increasing the layout version) if any well has changed since it was
+            indexed. Called when an index lookup misses, in case a well was modified through a
+            reference after the last reconciliation
+
+        Args:
+            rack_id (str): rack to verify
+
+        Returns:
+            bool: True if the indices were rebuilt
+        """
+
+        with _index_lock:
+            rack_index = self._reconcile(rack_id)
+            fingerprints = self._fingerprints[rack_id]
+            if all((well_number in fingerprints) and (fingerprints[well_number][0] is well)
+                   and (fingerprints[well_number][1] == _fingerprint(well))
+                   for well_number, well in rack_index.items()):
+                return False
+
+            self._index_signatures.pop(rack_id, None)
+            self._get_rack_index(rack_id)
+
+        return True
+
+    def _get_free_list(self, rack_id: str) -> List[int]:
+        """Gets the sorted list of empty well numbers in a rack
+
+        Args:
+            rack_id (str): rack of interest
+
+        Returns:
+            List[int]: sorted well numbers of empty wells
+        """
+
+        self._reconcile(rack_id)
+
+        return self._free_wells[rack_id]
+
+    def _pop_filled(self, rack_id: str, free: List[int], i: int) -> bool:
+        """Removes free[i] if that well has been filled since it was last checked (e.g. a
+            reference obtained before the last reconciliation was modified afterwards)
+
+        Returns:
+            bool: True if free[i] was removed
+        """
+
+        if _is_empty(self._well_index[rack_id][free[i]]):
+            return False
+
+        free.pop(i)
+        return True
+
+    def _update_signature(self, rack_id: str) -> None:
+        """Records that the index of rack_id is consistent with its current well list"""
+
+        wells = self.racks[rack_id].wells
+        self._index_signatures[rack_id] = (wells, len(wells))
+
     def add_rack_from_dict(self, name, d: dict):
         """ Add a rack from dictionary definition (i.e. config file)"""
         if 'wells' not in d.keys():
@@ -331,7 +1080,107 @@ class LHBedLayout(BaseModel):
         well.rack_id = rack_id
 
         # add well to appropriate rack
-        self.racks[rack_id].wells.append(well)
+        with _index_lock:
+            wells = self.racks[rack_id].wells
+            rack_index = self._get_rack_index(rack_id)
+            wells.append(well)
+            rack_index.setdefault(well.well_number, well)
+            if well.id is not None:
+                self._id_index[rack_id].setdefault(well.id, well)
+            self._update_signature(rack_id)
+            self._touch(rack_id, well.well_number)
+            self._version = _next_layout_version()
+
+    def set_well_id(self, well: Well, well_id: str | None) -> None:
+        """Assigns an ID to a well in this layout, or clears it if well_id is None.
+            Use instead of setting well.id directly to keep the ID index current.
+
+        Args:
+            well (Well): well in this layout
+            well_id (str | None): new well ID
+        """
+
+        with _index_lock:
+            self._detach_from_snapshots(well)
+            self._unindex_id(well)
+            well.id = well_id
+            if well_id is not None:
+                self._get_id_index(well.rack_id).setdefault(well_id, well)
+            self._touch(well.rack_id, well.well_number)
+
+    def get_well_by_id(self, well_id: str) -> Well | None:
+        """Finds a well by its ID. The well is returned for reading; use get_well_and_rack
+            to obtain wells that are modified
+
+        Args:
+            well_id (str): well ID to find
+
+        Returns:
+            Well | None: first well with matching ID, or None if not found
+        """
+
+        with _index_lock:
+            well = self._find_well_by_id(well_id)
+            if (well is None) and any([self._verify_rack(rack_id) for rack_id in self.racks.keys()]):
+                well = self._find_well_by_id(well_id)
+
+            return None if well is None else self._own_well(well)
+
+    def _find_well_by_id(self, well_id: str) -> Well | None:
+        """Finds a well by its ID using the ID index (see get_well_by_id)"""
+
+        for rack_id in self.racks.keys():
+            self._reconcile(rack_id)
+            id_index = self._id_index[rack_id]
+            well = id_index.get(well_id, None)
+            if (well is not None) and (well.id != well_id):
+                # ID has been changed since the well was indexed; reindex the rack
+                self._index_signatures.pop(rack_id, None)
+                well = self._get_id_index(rack_id).get(well_id, None)
+            if well is not None:
+                return well
+
+        return None
+
+    def find_composition(self, composition: Composition, rack_ids: List[str] | None = None) -> List[Well]:
+        """Finds wells containing the desired composition using the composition index
+            (cf. find_composition). The wells are returned for reading; use get_well_and_rack
+            to obtain wells that are modified
+
+        Args:
+            composition (Composition): target composition
+            rack_ids (List[str] | None, optional): racks to search. Defaults to None (all racks).
+
+        Returns:
+            List[Well]: wells containing that composition, in layout order
+        """
+
+        rack_ids = list(self.racks.keys() if rack_ids is None else rack_ids)
+        with _index_lock:
+            matches = self._find_composition(composition, rack_ids)
+            if (not len(matches)) and any([self._verify_rack(rack_id) for rack_id in rack_ids]):
+                matches = self._find_composition(composition, rack_ids)
+
+            return [self._own_well(well) for well in matches]
+
+    def _find_composition(self, composition: Composition, rack_ids: List[str]) -> List[Well]:
+        """Finds wells containing the desired composition using the composition index (see find_composition)"""
+
+        key = composition.key
+        matches = []
+        for rack_id in rack_ids:
+            self._reconcile(rack_id)
+            groups = self._composition_index[rack_id].get(key[0], {})
+            rack_matches = [well
+                            for group_key, group in groups.items() if keys_may_match(key, group_key)
+                            for well in group.values() if well.composition == composition]
+            if len(rack_matches) > 1:
+                # restore the order of the rack's well list
+                match_ids = set(id(well) for well in rack_matches)
+                rack_matches = [well for well in self.racks[rack_id].wells if id(well) in match_ids]
+            matches += rack_matches
+
+        return matches
 
     def find_next_empty(self, rack_id: str | None = None) -> WellLocation | None:
         """Finds the next empty well in a rack. Requires volume to be zero and an
@@ -344,13 +1193,69 @@ class LHBedLayout(BaseModel):
             WellLocation: location of returned 
         """
 
-        rack = self.racks[rack_id]
-        next_empty = next((w
-                            for w in sorted(rack.wells, key=lambda w: w.well_number)
-                            if (w.volume == 0) & (w.id is None)),
-                        None)
-        if next_empty is not None:
-            return WellLocation(rack_id=rack_id, well_number=next_empty.well_number)
+        free = self._get_free_list(rack_id)
+        while len(free) and self._pop_filled(rack_id, free, 0):
+            pass
+
+        if (not len(free)) and self._verify_rack(rack_id):
+            return self.find_next_empty(rack_id)
+
+        if len(free):
+            return WellLocation(rack_id=rack_id, well_number=free[0])
+
+    def find_empty_block(self, rack_id: str, n: int) -> List[WellLocation] | None:
+        """Finds the first block of n empty wells with consecutive well numbers in a rack.
+            Empty wells are defined as in find_next_empty.
+
+        Args:
+            rack_id (str): target rack
+            n (int): number of wells required
+
+        Returns:
+            List[WellLocation] | None: locations of the wells in the block, or None if no
+                block of that size is available
+        """
+
+        free = self._get_free_list(rack_id)
+        i = 0
+        while i + n <= len(free):
+            # last well of a consecutive block starting at free[i]
+            j = i + n - 1
+            if free[j] - free[i] != j - i:
+                i += 1
+                continue
+            # confirm the block; if a well has been filled, drop it and search again from there
+            if any(self._pop_filled(rack_id, free, k) for k in range(j, i - 1, -1)):
+                continue
+
+            return [WellLocation(rack_id=rack_id, well_number=well_number) for well_number in free[i:j + 1]]
+
+        if self._verify_rack(rack_id):
+            return self.find_empty_block(rack_id, n)
+
+    def reserve_empty_block(self, rack_id: str, well_ids: List[str]) -> List[WellLocation] | None:
+        """Reserves a block of empty wells with consecutive well numbers by assigning them
+            the specified IDs, as infer_location does for single wells.
+
+        Args:
+            rack_id (str): target rack
+            well_ids (List[str]): IDs to assign, in well number order
+
+        Returns:
+            List[WellLocation] | None: locations (with IDs) of the reserved wells, or None if no
+                block of that size is available
+        """
+
+        block = self.find_empty_block(rack_id, len(well_ids))
+        if block is None:
+            return None
+
+        for location, well_id in zip(block, well_ids):
+            well, _ = self.get_well_and_rack(location.rack_id, location.well_number)
+            self.set_well_id(well, well_id)
+            location.id = well_id
+
+        return block
 
     def infer_location(self, well: WellLocation) -> WellLocation | None:
         """Finds the next empty and fills in the inferred well location by ID or by next empty.
@@ -367,7 +1272,7 @@ class LHBedLayout(BaseModel):
             return well
 
         # check for well ID match
-        next_match = next((w for w in self.get_all_wells() if w.id == well.id), None)
+        next_match = self.get_well_by_id(well.id)
 
         # if match found
         if next_match is not None:
@@ -378,42 +1283,125 @@ class LHBedLayout(BaseModel):
             next_empty = self.find_next_empty(well.rack_id)
             if next_empty is not None:
                 target_well, _ = self.get_well_and_rack(next_empty.rack_id, next_empty.well_number)
-                target_well.id = well.id
+                self.set_well_id(target_well, well.id)
 
                 well.rack_id, well.well_number = next_empty.rack_id, next_empty.well_number
                 return well
         
     def get_well_and_rack(self, rack_id: str, well_number: int) -> Tuple[Well, Rack]:
-        """Get well using the GUI (rack, well) specification"""
+        """Get well using the GUI (rack, well) specification. The well may be modified
+            until the next call to a layout method (see version); prefer add_to_well and
+            remove_from_well"""
         rack = self.racks[rack_id]
-        well_numbers = [well.well_number for well in rack.wells]
-        return rack.wells[well_numbers.index(well_number)], rack
+        # read private attributes directly; pydantic's private attribute lookup is comparatively
+        # slow and this is called for every well access
+        private = self.__pydantic_private__
+        with _index_lock:
+            signature = private['_index_signatures'].get(rack_id, None)
+            if (signature is None) or (signature[0] is not rack.wells) or (signature[1] != len(rack.wells)):
+                self._get_rack_index(rack_id)
+            well = private['_well_index'][rack_id].get(well_number, None)
+            if well is None:
+                raise ValueError(f'Well {well_number} not found in rack {rack_id}')
+
+            # caller may change the well; checked at the next reconciliation
+            private['_touched'][rack_id].add(well_number)
+            if private['_cow'] and ((rack_id, well_number) not in private['_owned_wells']):
+                well = self._own_well(well)
+            if len(private['_snapshots']):
+                self._detach_from_snapshots(well)
+
+        return well, rack
     
+    def add_to_well(self, rack_id: str, well_number: int, volume: float, composition: Composition) -> Well:
+        """Mixes a solution into a well (see Solution.mix_with) and updates the well indices and
+            the layout version. Use instead of modifying a well obtained with get_well_and_rack
+
+        Args:
+            rack_id (str): rack of the well
+            well_number (int): well number
+            volume (float): volume to add
+            composition (Composition): composition of the added solution
+
+        Returns:
+            Well: the modified well
+        """
+
+        with _index_lock:
+            well, _ = self.get_well_and_rack(rack_id, well_number)
+            well.mix_with(volume, composition)
+            self._reconcile(rack_id)
+
+        return well
+
+    def remove_from_well(self, rack_id: str, well_number: int, volume: float) -> Well:
+        """Removes a volume from a well and updates the well indices and the layout version.
+            Use instead of modifying a well obtained with get_well_and_rack
+
+        Args:
+            rack_id (str): rack of the well
+            well_number (int): well number
+            volume (float): volume to remove
+
+        Returns:
+            Well: the modified well
+        """
+
+        with _index_lock:
+            well, _ = self.get_well_and_rack(rack_id, well_number)
+            well.volume -= volume
+            self._reconcile(rack_id)
+
+        return well
+
     def get_all_wells(self) -> List[Well]:
-        """Gets all wells in the layout
+        """Gets all wells in the layout for reading; use get_well_and_rack to obtain wells
+            that are modified. In a snapshot, every well is copied from the parent layout
 
         Returns:
             List[Well]: list of all wells
         """
 
-        return [w for rack in self.racks.values() for w in rack.wells]
+        if not self._cow:
+            return [w for rack in self.racks.values() for w in rack.wells]
+
+        with _index_lock:
+            # wells are indexed before they are copied
+            for rack_id in self.racks.keys():
+                self._get_rack_index(rack_id)
+            return [self._own_well(w) for rack in list(self.racks.values()) for w in list(rack.wells)]
 
     def update_well(self, well: Well):
         """Removes existing wells with the same rack_id, well_number
         Then appends the well to the end of that rack.wells """
 
-        wells = self.remove_well_definition(well.rack_id, well.well_number)
-        wells.append(well)
+        with _index_lock:
+            wells = self.remove_well_definition(well.rack_id, well.well_number)
+            wells.append(well)
+            if self._cow:
+                self._owned_wells.add((well.rack_id, well.well_number))
+            self._get_rack_index(well.rack_id)[well.well_number] = well
+            if well.id is not None:
+                self._id_index[well.rack_id].setdefault(well.id, well)
+            self._update_signature(well.rack_id)
+            self._touch(well.rack_id, well.well_number)
+            self._version = _next_layout_version()
 
     def remove_well_definition(self, rack_id: str, well_number: int) -> List[Well]:
         """ Removes existing well definition(s) in rack.wells with matching well_number """
 
-        rack = self.racks[rack_id]
-        wells = rack.wells
-        # removes all existing wells with same well_number (go backwards to pop off the end):
-        for i, existing_well in reversed(list(enumerate(wells))):
-            if existing_well.well_number == well_number:
-                wells.pop(i)
+        with _index_lock:
+            wells = self.racks[rack_id].wells
+            rack_index = self._get_rack_index(rack_id)
+            # removes all existing wells with same well_number (go backwards to pop off the end):
+            for i, existing_well in reversed(list(enumerate(wells))):
+                if existing_well.well_number == well_number:
+                    self._unindex_id(existing_well)
+                    wells.pop(i)
+            rack_index.pop(well_number, None)
+            self._update_signature(rack_id)
+            self._touch(rack_id, well_number)
+            self._version = _next_layout_version()
         return wells
     
     @property
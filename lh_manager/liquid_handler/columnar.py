@@ -0,0 +1,67 @@
+"""Columnar (array-based) representation of the compositions of a list of wells"""
+from typing import Dict, List
+
+import numpy as np
+
+from .bedlayout import Well
+
+class ColumnarWells:
+    """Columnar representation of the compositions of a list of wells, used to vectorize
+        calculations over many wells (see formulation.SourceWells). Each well is a row;
+        solvents and solutes are columns drawn from a vocabulary shared by all wells.
+
+        Solute concentrations are stored in their native units. As Composition assumes, no
+        composition may contain the same component twice (ValueError).
+
+        solvent_names (List[str]): solvent vocabulary
+        solvent_fractions (np.ndarray): wells x solvents array of (unnormalized) fractions
+        solvent_order (np.ndarray): wells x solvents array of positions of each solvent in
+            Composition.solvents; -1 if absent
+        solute_names (List[str]): solute vocabulary
+        solute_concentrations (np.ndarray): wells x solutes array of concentrations in native units
+        solute_units (np.ndarray): wells x solutes object array of units; None if absent
+        solute_molecular_weights (np.ndarray): wells x solutes array of molecular weights;
+            NaN if absent or None
+        solute_order (np.ndarray): wells x solutes array of positions of each solute in
+            Composition.solutes; -1 if absent
+    """
+
+    def __init__(self, wells: List[Well]) -> None:
+
+        solvent_names: Dict[str, int] = {}
+        solute_names: Dict[str, int] = {}
+        for well in wells:
+            for solvent in well.composition.solvents:
+                solvent_names.setdefault(solvent.name, len(solvent_names))
+            for solute in well.composition.solutes:
+                solute_names.setdefault(solute.name, len(solute_names))
+        self.solvent_names = list(solvent_names.keys())
+        self.solute_names = list(solute_names.keys())
+
+        n = len(wells)
+        self.solvent_fractions = np.zeros((n, len(self.solvent_names)))
+        self.solvent_order = np.full((n, len(self.solvent_names)), -1, dtype=int)
+        self.solute_concentrations = np.zeros((n, len(self.solute_names)))
+        self.solute_units = np.full((n, len(self.solute_names)), None, dtype=object)
+        self.solute_molecular_weights = np.full((n, len(self.solute_names)), np.nan)
+        self.solute_order = np.full((n, len(self.solute_names)), -1, dtype=int)
+
+        for i, well in enumerate(wells):
+            for k, solvent in enumerate(well.composition.solvents):
+                j = solvent_names[solvent.name]
+                if self.solvent_order[i, j] >= 0:
+                    raise ValueError(f'Solvent {solvent.name} appears more than once in well {well.well_number} of rack {well.rack_id}')
+                self.solvent_fractions[i, j] = solvent.fraction
+                self.solvent_order[i, j] = k
+            for k, solute in enumerate(well.composition.solutes):
+                j = solute_names[solute.name]
+                if self.solute_order[i, j] >= 0:
+                    raise ValueError(f'Solute {solute.name} appears more than once in well {well.well_number} of rack {well.rack_id}')
+                self.solute_concentrations[i, j] = solute.concentration
+                self.solute_units[i, j] = solute.units
+                if solute.molecular_weight is not None:
+                    self.solute_molecular_weights[i, j] = solute.molecular_weight
+                self.solute_order[i, j] = k
+
+    def __len__(self) -> int:
+        return len(self.solvent_fractions)
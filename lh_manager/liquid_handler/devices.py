@@ -1,6 +1,7 @@
+import hashlib
 import json
 from pydantic import BaseModel
-from typing import Dict, List, Literal, Union, Set, ClassVar
+from typing import Dict, List, Literal, Tuple, Union, Set, ClassVar
 from .job import JobBase
 
 EXCLUDE_FIELDS = set([])
@@ -42,6 +43,9 @@ class DeviceManager:
     def __init__(self) -> None:
 
         self.devices: Dict[str, DevicesType] = {}
+        # schema of all devices, and its JSON serialization and ETag; rebuilt on first use after a registration
+        self._schema: Dict[str, Dict] | None = None
+        self._schema_json: Tuple[str, str] | None = None
 
     @property
     def device_list(self) -> List[DevicesType]:
@@ -55,9 +59,12 @@ class DeviceManager:
         """
 
         self.devices.update({device.device_name: device})
+        self._schema = None
+        self._schema_json = None
 
     def get_all_schema(self) -> Dict[str, Dict]:
-        """Gets the schema of all the devides in the manager
+        """Gets the schema of all the devides in the manager. Calculated once until a device is
+            registered; the result must not be modified.
 
         Returns:
             Dict[str, Dict]: Dictionary of devices names and schema. Schema has fields 'fields', 
@@ -74,7 +81,24 @@ class DeviceManager:
             device_fields[device.device_name] = {'fields': fieldlist, 'device_name': device.device_name, 'schema': device.model_json_schema()}
         """
             
-        return {device.device_name: device.model_dump() for device in self.device_list}
+        if self._schema is None:
+            self._schema = {device.device_name: device.model_dump() for device in self.device_list}
+
+        return self._schema
+
+    def get_all_schema_json(self) -> Tuple[str, str]:
+        """Gets the schema of all the devices (see get_all_schema) serialized to JSON, with an
+            ETag derived from its content
+
+        Returns:
+            Tuple[str, str]: JSON text and ETag
+        """
+
+        if self._schema_json is None:
+            text = json.dumps(self.get_all_schema())
+            self._schema_json = text, hashlib.sha256(text.encode()).hexdigest()
+
+        return self._schema_json
     
     def get_device_by_name(self, device_name: str) -> DevicesType:
         """Gets device object by name
@@ -8,11 +8,96 @@ from .lhmethods import InjectMethod, InjectWithRinse, MixMethod, MixWithRinse, T
 
 from .bedlayout import LHBedLayout, WellLocation
 from .methods import MethodContainer, MethodsType, register, method_manager
+from .status import MethodError
 
 ORIGIN = None
 
+def get_target_wells(first_target_well: WellLocation, number_of_wells: int, layout: LHBedLayout, reserve: bool = False) -> List[WellLocation] | None:
+    """Gets consecutive target wells for a dilution series. If first_target_well does not specify
+        a well number, a block of empty wells in its rack is used instead. If it also has an ID,
+        wells reserved under IDs derived from it are used if they exist; otherwise the next
+        available block is used, and reserved under these IDs if reserve is True so that
+        later calls return the same wells.
+
+    Args:
+        first_target_well (WellLocation): first well of the series
+        number_of_wells (int): number of wells in the series
+        layout (LHBedLayout): current LH layout
+        reserve (bool, optional): reserve the block in the layout. Defaults to False.
+
+    Returns:
+        List[WellLocation] | None: target wells, or None if they cannot be allocated
+    """
+
+    if first_target_well.well_number is not None:
+        return [copy(first_target_well)] + [WellLocation(rack_id=first_target_well.rack_id,
+                                                         well_number=first_target_well.well_number + i)
+                                            for i in range(1, number_of_wells)]
+
+    if first_target_well.rack_id is None:
+        return None
+
+    if first_target_well.id is None:
+        return layout.find_empty_block(first_target_well.rack_id, number_of_wells)
+
+    well_ids = [f'{first_target_well.id}_{i}' for i in range(number_of_wells)]
+    reserved_wells = [layout.get_well_by_id(well_id) for well_id in well_ids]
+    if all(well is not None for well in reserved_wells):
+        return [WellLocation(rack_id=well.rack_id, well_number=well.well_number) for well in reserved_wells]
+
+    if not reserve:
+        return layout.find_empty_block(first_target_well.rack_id, number_of_wells)
+
+    return layout.reserve_empty_block(first_target_well.rack_id, well_ids)
+
+class DilutionContainer(MethodContainer):
+    """Base class for dilution series. get_methods does not modify the layout (e.g. for time
+        estimates); the target wells are reserved when the dilution is executed, exploded or
+        rendered
+    """
+
+    method_name: Literal['DilutionContainer'] = 'DilutionContainer'
+    display_name: Literal['DilutionContainer'] = 'DilutionContainer'
+    first_target_well: WellLocation = Field(default_factory=WellLocation)
+
+    def _find_dilution_volumes(self, layout: LHBedLayout):
+        """Volumes of the dilution series; see subclasses"""
+
+        return [], [], [], False
+
+    def reserve_target_wells(self, layout: LHBedLayout) -> None:
+        """Reserves the target wells of the dilution series (see get_target_wells)
+
+        Args:
+            layout (LHBedLayout): current LH layout
+        """
+
+        total_volumes, _, _, success = self._find_dilution_volumes(layout)
+        if success:
+            get_target_wells(self.first_target_well, len(total_volumes), layout, reserve=True)
+
+    def explode(self, layout: LHBedLayout) -> List[MethodsType]:
+
+        self.reserve_target_wells(layout)
+        return super().explode(layout)
+
+    def execute(self, layout: LHBedLayout) -> MethodError | None:
+
+        self.reserve_target_wells(layout)
+        return super().execute(layout)
+
+    def render_method(self,
+                         sample_name: str,
+                         sample_description: str,
+                         layout: LHBedLayout) -> List[dict]:
+
+        self.reserve_target_wells(layout)
+        return super().render_method(sample_name=sample_name,
+                                     sample_description=sample_description,
+                                     layout=layout)
+
 @register(origin=ORIGIN)
-class SerialDilution(MethodContainer):
+class SerialDilution(DilutionContainer):
 
     # Defined from BaseMethod
     # complete: bool
@@ -86,9 +171,12 @@ class SerialDilution(MethodContainer):
         total_volumes, diluent_fractions, injection_volumes, success = self._find_dilution_volumes(layout)
 
         if success:
-            target_well = copy(self.first_target_well)
+            dilution_wells = get_target_wells(self.first_target_well, len(total_volumes), layout)
+            success = dilution_wells is not None
+
+        if success:
             sample_well = copy(self.sample_source)
-            for total_volume, diluent_fraction in zip(total_volumes, diluent_fractions):
+            for target_well, total_volume, diluent_fraction in zip(dilution_wells, total_volumes, diluent_fractions):
 
                 itransfer_methods = []
                 imix_methods = []
@@ -121,9 +209,8 @@ class SerialDilution(MethodContainer):
                 mix_methods.append(imix_methods)
                 target_wells.append(target_well)
 
-                # update sample (now previous target) and target (next well)
+                # update sample (now previous target)
                 sample_well = copy(target_well)
-                target_well = WellLocation(target_well.rack_id, target_well.well_number + 1)
 
         return transfer_methods, mix_methods, target_wells, injection_volumes, success
 
@@ -179,7 +266,7 @@ class SerialDilutionInject(SerialDilution):
         return methods
 
 @register(origin=ORIGIN)
-class StandardDilution(MethodContainer):
+class StandardDilution(DilutionContainer):
 
     # Defined from BaseMethod
     # complete: bool
@@ -234,8 +321,11 @@ class StandardDilution(MethodContainer):
         total_volumes, diluent_fractions, injection_volumes, success = self._find_dilution_volumes(layout)
 
         if success:
-            target_well = copy(self.first_target_well)
-            for total_volume, diluent_fraction in zip(total_volumes, diluent_fractions):
+            dilution_wells = get_target_wells(self.first_target_well, len(total_volumes), layout)
+            success = dilution_wells is not None
+
+        if success:
+            for target_well, total_volume, diluent_fraction in zip(dilution_wells, total_volumes, diluent_fractions):
 
                 itransfer_methods = []
                 imix_methods = []
@@ -268,9 +358,6 @@ class StandardDilution(MethodContainer):
                 mix_methods.append(imix_methods)
                 target_wells.append(target_well)
 
-                # update target (next well)
-                target_well = WellLocation(target_well.rack_id, target_well.well_number + 1)
-
         return transfer_methods, mix_methods, target_wells, injection_volumes, success
 
     def get_methods(self, layout: LHBedLayout) -> List[MethodsType]:
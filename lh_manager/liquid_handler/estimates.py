@@ -0,0 +1,123 @@
+"""Precomputed time estimates of the sample list"""
+import logging
+
+from threading import Lock
+from typing import Any, Dict, Tuple
+
+from .bedlayout import LHBedLayout
+from .methods import EXCLUDE_FIELDS, MethodsType
+from .samplecontainer import SampleContainer
+from .samplelist import MethodList, Sample
+
+class EstimateService:
+    """Caches time estimates of methods, stages (MethodList) and samples.
+
+        The estimate of each method is cached by method ID, together with the values of its fields
+        and the layout version, because the expansion of method containers and the estimates of
+        other methods may depend on the layout. When a sample changes, only the estimates of the
+        methods that changed are recalculated.
+
+        Sample lists are recognized as unchanged from the identity of their method objects and
+        a revision number that is increased by invalidate, which should be called whenever
+        samples are modified in place.
+    """
+
+    def __init__(self) -> None:
+
+        # {method ID: (field values, layout version, estimated time)}
+        self._methods: Dict[str, Tuple[str, int, float]] = {}
+        self._revision: int = 0
+        # (revision, layout version, sample list structure) of the last result of get_estimates
+        self._last_key: tuple | None = None
+        self._last_estimates: Dict[str, Dict[str, Any]] = {}
+        self.lock = Lock()
+
+    def invalidate(self) -> None:
+        """Announces that samples may have been modified in place, so the method fields are
+            compared again on the next request"""
+
+        with self.lock:
+            self._revision += 1
+
+    def _method_estimate(self, method: MethodsType, layout: LHBedLayout) -> float:
+        """Gets the estimated time of a method from the cache, or recalculates it"""
+
+        fields = method.model_dump_json(exclude=EXCLUDE_FIELDS)
+        version = layout.version
+        cached = self._methods.get(method.id, None)
+        if (cached is not None) and (cached[0] == fields) and (cached[1] == version):
+            return cached[2]
+
+        try:
+            estimate = float(method.estimated_time(layout))
+        except Exception:
+            logging.exception(f'Could not estimate time of method {method.id}')
+            estimate = 0.0
+        self._methods[method.id] = (fields, version, estimate)
+
+        return estimate
+
+    def _stage_estimates(self, stage: MethodList, layout: LHBedLayout) -> Dict[str, Any]:
+        """Estimated times of the methods in a stage and their total (cf. MethodList.estimated_time)"""
+
+        estimates = [(m.id, self._method_estimate(m, layout)) for m in stage.methods]
+
+        # methods with duplicate IDs each count towards the total
+        return {'estimated_time': sum((estimate for _, estimate in estimates), 0.0), 'methods': dict(estimates)}
+
+    def _sample_estimates(self, sample: Sample, layout: LHBedLayout) -> Dict[str, Any]:
+        """Estimated times of the stages of a sample and their total"""
+
+        stages = {stage_name: self._stage_estimates(stage, layout) for stage_name, stage in sample.stages.items()}
+
+        return {'name': sample.name,
+                'estimated_time': sum((stage['estimated_time'] for stage in stages.values()), 0.0),
+                'stages': stages}
+
+    def get_stage_estimate(self, stage: MethodList, layout: LHBedLayout) -> float:
+        """Estimated time of a stage. Equivalent to stage.estimated_time(layout), but cached
+
+        Args:
+            stage (MethodList): stage
+            layout (LHBedLayout): layout to use for the estimate
+
+        Returns:
+            float: total estimated time in default time units
+        """
+
+        with self.lock:
+            return self._stage_estimates(stage, layout)['estimated_time']
+
+    def get_estimates(self, samples: SampleContainer, layout: LHBedLayout) -> Dict[str, Dict[str, Any]]:
+        """Estimated times of all samples
+
+        Args:
+            samples (SampleContainer): sample list
+            layout (LHBedLayout): layout to use for the estimates
+
+        Returns:
+            Dict[str, Dict[str, Any]]: estimates by sample ID. Each has fields 'name', 'estimated_time'
+                and 'stages'; each stage has fields 'estimated_time' and 'methods' (estimated time
+                by method ID). Times are in default time units
+        """
+
+        with self.lock:
+            structure = tuple((sample.id, tuple((stage_name, tuple(id(m) for m in stage.methods))
+                                                for stage_name, stage in sample.stages.items()))
+                              for sample in samples.samples)
+            key = (self._revision, layout.version, structure)
+            if key != self._last_key:
+                self._last_estimates = {sample.id: self._sample_estimates(sample, layout)
+                                        for sample in samples.samples}
+                self._last_key = key
+
+                # forget methods that are no longer in the sample list
+                current = set(method_id for sample in self._last_estimates.values()
+                              for stage in sample['stages'].values()
+                              for method_id in stage['methods'].keys())
+                for method_id in [method_id for method_id in self._methods.keys() if method_id not in current]:
+                    self._methods.pop(method_id)
+
+            return self._last_estimates
+
+estimate_service = EstimateService()
@@ -1,19 +1,38 @@
 from typing import List, Tuple, Literal, Dict, Any, Optional
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from copy import copy, deepcopy
+from threading import Lock
 import logging
+import multiprocessing
 import numpy as np
-from scipy.optimize import nnls
+from scipy.optimize import nnls, linprog, milp, Bounds, LinearConstraint
 from pydantic import Field, validator, SerializeAsAny
 
 from .lhmethods import MixMethod, MixWithRinse, TransferMethod, TransferWithRinse, LHMethodCluster
 
-from .bedlayout import Solute, Solvent, Composition, LHBedLayout, Well, WellLocation, empty
+from .bedlayout import Solute, Solvent, Composition, LHBedLayout, Well, WellLocation, empty, convert_many
+from .columnar import ColumnarWells
 from .layoutmap import Zone, LayoutWell2ZoneWell
 from .samplelist import example_sample_list
-from .methods import MethodContainer, MethodsType, register, method_manager
+from .methods import EXCLUDE_FIELDS, BaseMethod, MethodContainer, MethodsType, register, method_manager
+from .status import MethodError
 
 ORIGIN = None
 ZERO_VOLUME_TOLERANCE = 1e-3
+# maximum number of formulation results cached by solve_formulation
+FORMULATION_CACHE_SIZE = 256
+
+# maximum number of SourceWells cached by get_source_wells
+SOURCE_WELLS_CACHE_SIZE = 8
+
+_formulation_cache: OrderedDict[tuple, Dict[str, Any]] = OrderedDict()
+_source_wells_cache: OrderedDict[tuple, "SourceWells"] = OrderedDict()
+_formulation_cache_lock = Lock()
+
+# jointly solved formulation results held for dry runs (see hold_joint_results):
+# {id(layout): {formulation fields: [(volumes, well locations, success)]}}
+_joint_results: Dict[int, Dict[str, List[Tuple[List[float], List[Tuple[str, int]], bool]]]] = {}
 
 def get_all_wells_in_zones(layout: LHBedLayout, include_zones: List[Zone]) -> List[Well]:
     """Gets all wells in the layout belonging to specific zones"""
@@ -28,52 +47,436 @@ def make_target_vector(target_composition: Composition) -> Tuple[List[str], List
     concentrations_with_units = {name: unit for (name, unit) in zip(solute_names, solute_units)}
     return solvent_names + solute_names, solvent_fractions + solute_concentrations, concentrations_with_units
 
-def select_wells(wells: List[Well], target_names: List[str], exact_match: bool) -> Tuple[List[Well], List[str]]:
-    """Selects wells based on whether they have the appropriate components"""
-    acceptable_wells = []
-    all_components = set()
-    for well in wells:
-        components = well.composition.get_solvent_names() + well.composition.get_solute_names()
-        if exact_match:
-            if all(cmp in target_names for cmp in components):
-                acceptable_wells.append(well)
+class SourceWells:
+    """Candidate source wells for formulations. The components of the wells are extracted once,
+        into arrays (see ColumnarWells), so that selection and source matrix construction can
+        be shared by many target compositions and vectorized over wells.
+
+        If a well contains the same component twice (which ColumnarWells does not represent),
+        or a vectorized calculation hits a case that the per-well calculation handles specially
+        (solvent fractions summing to zero or a missing molecular weight), the per-well
+        calculation is used instead.
+
+    Args:
+        wells (List[Well]): candidate source wells
+    """
+
+    def __init__(self, wells: List[Well]) -> None:
+        self.wells = list(wells)
+        self._positions = {id(well): i for i, well in enumerate(self.wells)}
+        # {well position: (solvent fractions, solutes)}, calculated on first use by the per-well path
+        self._amounts: Dict[int, Tuple[Dict[str, float], Dict[str, Solute]]] = {}
+
+        try:
+            self._columns = ColumnarWells(self.wells)
+        except ValueError:
+            self._columns = None
+
+        if self._columns is not None:
+            columns = self._columns
+            self.all_components = set(columns.solvent_names) | set(columns.solute_names)
+            self._solvent_index = {name: j for j, name in enumerate(columns.solvent_names)}
+            self._solute_index = {name: j for j, name in enumerate(columns.solute_names)}
+            self._has_solvent = (columns.solvent_order >= 0)
+            self._has_solute = (columns.solute_order >= 0)
+            self.components = None
         else:
-            if any(cmp in target_names for cmp in components):
-                acceptable_wells.append(well)
-        all_components.update(components)
-    return acceptable_wells, list(all_components)
+            self.components = [well.composition.get_solvent_names() + well.composition.get_solute_names()
+                               for well in self.wells]
+            self.all_components = set(cmp for components in self.components for cmp in components)
 
-def make_source_matrix(source_names: List[str], wells: List[Well], source_units: Dict[str, str]) -> Tuple[List[list], List[Well]]:
-    """Makes matrix of source wells that contain desired components"""
-    source_matrix = []
-    relevant_wells = []
-    for well in wells:
-        composition = well.composition
-        solvent_names, solvent_fractions = composition.get_solvent_fractions()
-        solute_names = composition.get_solute_names()
+    def select(self, target_names: List[str], exact_match: bool) -> Tuple[List[Well], List[str]]:
+        """Selects wells based on whether they have the appropriate components (see select_wells)"""
+
+        target_names = set(target_names)
+
+        if self._columns is not None:
+            solvent_targets = np.array([name in target_names for name in self._columns.solvent_names], dtype=bool)
+            solute_targets = np.array([name in target_names for name in self._columns.solute_names], dtype=bool)
+            if exact_match:
+                acceptable = ~(self._has_solvent[:, ~solvent_targets].any(axis=1) | self._has_solute[:, ~solute_targets].any(axis=1))
+            else:
+                acceptable = self._has_solvent[:, solvent_targets].any(axis=1) | self._has_solute[:, solute_targets].any(axis=1)
+
+            return [self.wells[i] for i in np.flatnonzero(acceptable)], list(self.all_components)
+
+        acceptable_wells = []
+        for well, components in zip(self.wells, self.components):
+            if exact_match:
+                if all(cmp in target_names for cmp in components):
+                    acceptable_wells.append(well)
+            else:
+                if any(cmp in target_names for cmp in components):
+                    acceptable_wells.append(well)
+
+        return acceptable_wells, list(self.all_components)
+
+    def _get_amounts(self, well: Well) -> Tuple[Dict[str, float], Dict[str, Solute]]:
+        """Gets normalized solvent fractions and solutes of a well, by name (first occurrence wins)"""
+
+        position = self._positions[id(well)]
+        amounts = self._amounts.get(position, None)
+        if amounts is None:
+            composition = well.composition
+            solvent_fractions: Dict[str, float] = {}
+            for name, fraction in zip(*composition.get_solvent_fractions()):
+                solvent_fractions.setdefault(name, fraction)
+            solutes: Dict[str, Solute] = {}
+            for solute in composition.solutes:
+                solutes.setdefault(solute.name, solute)
+            amounts = self._amounts[position] = (solvent_fractions, solutes)
+
+        return amounts
+
+    def get_column(self, well: Well, source_names: List[str], source_units: Dict[str, str]) -> List[float]:
+        """Gets the amounts of the desired components in a well of this object, i.e. its column
+            in the source matrix"""
+
+        solvent_fractions, solutes = self._get_amounts(well)
         col = []
         for name in source_names:
-            if name in solvent_names:
-                col.append(solvent_fractions[solvent_names.index(name)])
-            elif name in solute_names:
-                col.append(composition.solutes[solute_names.index(name)].convert_units(source_units[name]))
+            if name in solvent_fractions:
+                col.append(solvent_fractions[name])
+            elif name in solutes:
+                col.append(solutes[name].convert_units(source_units[name]))
             else:
                 col.append(0)
-        
-        if sum(col):
-            source_matrix.append(col)
-            relevant_wells.append(well)
 
-    source_matrix = [list(x) for x in zip(*source_matrix)]
-    return source_matrix, relevant_wells
+        return col
+
+    def _get_matrix(self, source_names: List[str], wells: List[Well], source_units: Dict[str, str]) -> np.ndarray | None:
+        """Calculates the components x wells source matrix with array operations, one component
+            at a time. Returns None if the per-well calculation is required."""
+
+        columns = self._columns
+        rows = np.array([self._positions[id(well)] for well in wells], dtype=int)
+        matrix = np.zeros((len(source_names), len(rows)))
+
+        has_solvent = self._has_solvent[rows]
+        fractions = columns.solvent_fractions[rows]
+        totals = fractions.sum(axis=1, keepdims=True)
+        if np.any((totals[:, 0] == 0) & has_solvent.any(axis=1)):
+            return None
+        fractions = np.divide(fractions, totals, out=np.zeros_like(fractions), where=(totals != 0))
+
+        for k, name in enumerate(source_names):
+            # solvents take precedence over solutes of the same name
+            filled = np.zeros(len(rows), dtype=bool)
+            j = self._solvent_index.get(name, None)
+            if j is not None:
+                filled = has_solvent[:, j]
+                matrix[k, filled] = fractions[filled, j]
+            j = self._solute_index.get(name, None)
+            if j is not None:
+                use = self._has_solute[rows, j] & ~filled
+                if use.any():
+                    converted = convert_many(columns.solute_concentrations[rows[use], j],
+                                             columns.solute_units[rows[use], j],
+                                             columns.solute_molecular_weights[rows[use], j],
+                                             source_units[name])
+                    if np.isnan(converted).any():
+                        return None
+                    matrix[k, use] = converted
+
+        return matrix
+
+    def make_source_matrix(self, source_names: List[str], wells: List[Well], source_units: Dict[str, str]) -> Tuple[List[list], List[Well]]:
+        """Makes matrix of source wells that contain desired components (see make_source_matrix).
+            wells must be a subset of the wells of this object. Wells without any of the
+            components are pruned."""
+
+        matrix = None
+        if self._columns is not None:
+            try:
+                matrix = self._get_matrix(source_names, wells, source_units)
+            except (KeyError, ValueError):
+                # let the per-well calculation raise the error for the offending well
+                matrix = None
+        if matrix is not None:
+            relevant = np.flatnonzero(matrix.sum(axis=0))
+            return (matrix[:, relevant].tolist() if len(relevant) else []), [wells[i] for i in relevant]
+
+        source_matrix = []
+        relevant_wells = []
+        for well in wells:
+            col = self.get_column(well, source_names, source_units)
+            if sum(col):
+                source_matrix.append(col)
+                relevant_wells.append(well)
+
+        source_matrix = [list(x) for x in zip(*source_matrix)]
+        return source_matrix, relevant_wells
+
+def get_source_wells(layout: LHBedLayout, include_zones: List[Zone]) -> SourceWells:
+    """Gets the candidate source wells in the specified zones of a layout. Cached (up to
+        SOURCE_WELLS_CACHE_SIZE) until the layout version changes. Wells must be modified
+        through LHBedLayout.get_well_and_rack (or replaced with LHBedLayout.update_well) for
+        the change to be detected; see LHBedLayout.version.
+
+    Args:
+        layout (LHBedLayout): LH bed layout
+        include_zones (List[Zone]): zones to include
+
+    Returns:
+        SourceWells: candidate source wells
+    """
+
+    key = (layout.version, tuple(include_zones))
+    with _formulation_cache_lock:
+        sources = _source_wells_cache.get(key, None)
+        if sources is not None:
+            _source_wells_cache.move_to_end(key)
+            return sources
+
+    sources = SourceWells(get_all_wells_in_zones(layout, include_zones))
+    with _formulation_cache_lock:
+        _source_wells_cache[key] = sources
+        while len(_source_wells_cache) > SOURCE_WELLS_CACHE_SIZE:
+            _source_wells_cache.popitem(last=False)
+
+    return sources
+
+def select_wells(wells: List[Well], target_names: List[str], exact_match: bool) -> Tuple[List[Well], List[str]]:
+    """Selects wells based on whether they have the appropriate components"""
+    return SourceWells(wells).select(target_names, exact_match)
+
+def make_source_matrix(source_names: List[str], wells: List[Well], source_units: Dict[str, str]) -> Tuple[List[list], List[Well]]:
+    """Makes matrix of source wells that contain desired components"""
+    return SourceWells(wells).make_source_matrix(source_names, wells, source_units)
+
+def nnls_warm_start(A: np.ndarray, b: np.ndarray, x0: np.ndarray, max_iter: int | None = None) -> Tuple[np.ndarray, float]:
+    """Solves argmin_x ||A x - b|| subject to x >= 0 with the Lawson-Hanson active set method,
+        starting from a feasible point x0 (e.g. the solution of a related problem with some columns
+        deleted) instead of from zero. Columns with positive x0 form the initial passive set.
+
+    Args:
+        A (np.ndarray): M x N matrix
+        b (np.ndarray): M vector
+        x0 (np.ndarray): N vector; negative values are set to zero
+        max_iter (int | None, optional): maximum number of iterations. Defaults to 3 * N.
+
+    Returns:
+        Tuple[np.ndarray, float]: solution x and residual norm ||A x - b|| (as for scipy.optimize.nnls)
+    """
+
+    m, n = A.shape
+    max_iter = 3 * n if max_iter is None else max_iter
+    tol = 10 * np.finfo(float).eps * np.linalg.norm(A, 1) * max(m, n)
+
+    x = np.maximum(np.asarray(x0, dtype=float), 0.0)
+    passive = (x > 0)
+    # columns that failed to enter the passive set since x last changed
+    blocked = np.zeros(n, dtype=bool)
+    added = None
+
+    for _ in range(max_iter):
+        # inner loop: least squares solution on the passive set, stepping back towards x
+        # (and releasing columns) while it has non-positive entries
+        while passive.any():
+            z = np.zeros(n)
+            z[passive] = np.linalg.lstsq(A[:, passive], b, rcond=None)[0]
+            if (added is not None) and (z[added] <= 0):
+                # the new column cannot enter the solution (e.g. numerically dependent)
+                passive[added] = False
+                blocked[added] = True
+                break
+            added = None
+            negative = passive & (z <= 0)
+            if not negative.any():
+                x = z
+                blocked[:] = False
+                break
+            alpha = np.min(x[negative] / (x[negative] - z[negative]))
+            x = x + alpha * (z - x)
+            passive &= (x > tol)
+            x[~passive] = 0.0
+            blocked[:] = False
+
+        # optimality: gradient is non-positive for all columns in the active (zero) set
+        w = A.T @ (b - A @ x)
+        candidates = ~passive & ~blocked & (w > tol)
+        if not candidates.any():
+            break
+        added = int(np.argmax(np.where(candidates, w, -np.inf)))
+        passive[added] = True
+
+    return x, float(np.linalg.norm(A @ x - b))
+
+def solve_sparse_formulation(source_matrix: np.ndarray,
+                             target_vector: np.ndarray,
+                             wells: List[Well],
+                             min_volumes: Dict[str, float],
+                             target_volume: float,
+                             transfer_costs: Tuple[float, float]) -> Dict[str, Any] | None:
+    """Chooses source wells that minimize the total cost of the transfers needed to make a
+        formulation, with a mixed-integer linear program: the composition must be exact, each
+        used well transfers at least ZERO_VOLUME_TOLERANCE and at most its volume minus the
+        rack minimum volume, and each used well costs transfer_costs[0] plus transfer_costs[1]
+        per unit volume. The volumes from the chosen wells are then recalculated with NNLS.
+
+    Args:
+        source_matrix (np.ndarray): components x wells source matrix (see make_source_matrix)
+        target_vector (np.ndarray): target vector (see make_target_vector)
+        wells (List[Well]): source wells, one for each column of source_matrix
+        min_volumes (Dict[str, float]): minimum (dead) volume of each rack
+        target_volume (float): target volume
+        transfer_costs (Tuple[float, float]): (cost per transfer, cost per unit volume transferred)
+
+    Returns:
+        Dict[str, Any] | None: formulation result (see solve_formulation), or None if no solution
+            was found
+    """
+
+    if target_volume <= 0:
+        return None
+
+    n = len(wells)
+    cost_per_transfer, cost_per_volume = transfer_costs
+    # variables: fraction of the target volume from each well, then whether each well is used
+    max_fractions = np.array([max(well.volume - min_volumes[well.rack_id], 0.0) for well in wells]) / target_volume
+    min_fraction = ZERO_VOLUME_TOLERANCE / target_volume
+    identity = np.eye(n)
+    constraints = [LinearConstraint(np.hstack((source_matrix, np.zeros((source_matrix.shape[0], n)))), target_vector, target_vector),
+                   LinearConstraint(np.hstack((identity, -np.diag(max_fractions))), -np.inf, 0.0),
+                   LinearConstraint(np.hstack((identity, -min_fraction * identity)), 0.0, np.inf)]
+    costs = np.concatenate((np.full(n, cost_per_volume * target_volume), np.full(n, cost_per_transfer)))
+    solution = milp(costs,
+                    constraints=constraints,
+                    integrality=np.concatenate((np.zeros(n), np.ones(n))),
+                    bounds=Bounds(0.0, np.concatenate((np.full(n, np.inf), np.ones(n)))))
+    if solution.x is None:
+        logging.info(f'Transfer-minimizing solver failed: {solution.message}')
+        return None
+
+    # recalculate volumes exactly from the chosen wells
+    used = np.flatnonzero(solution.x[n:] > 0.5)
+    sol, res = nnls(source_matrix[:, used], target_vector)
+    if not np.isclose(res, 0.0, atol=1e-9):
+        return None
+
+    volumes = []
+    result_wells = []
+    for i, vol in zip(used, sol):
+        well = wells[i]
+        if (vol * target_volume + min_volumes[well.rack_id]) > well.volume:
+            return None
+        if vol * target_volume > ZERO_VOLUME_TOLERANCE:
+            volumes.append(vol * target_volume)
+            result_wells.append(well)
+
+    return {'success': True, 'error': None, 'volumes': volumes, 'wells': result_wells}
+
+def _formulation_cache_key(layout: LHBedLayout,
+                          target_composition: Composition,
+                          target_volume: float,
+                          exact_match: bool,
+                          include_zones: List[Zone],
+                          transfer_costs: Tuple[float, float] | None = None) -> tuple:
+    """Key identifying a formulation problem. The target composition is described exactly,
+        including component order, units and zero amounts, all of which affect the solver.
+
+    Returns:
+        tuple: (layout version, solvents, solutes, target volume, exact match, zones, transfer costs)
+    """
+
+    return (layout.version,
+            tuple((s.name, s.fraction) for s in target_composition.solvents),
+            tuple((s.name, s.concentration, s.units) for s in target_composition.solutes),
+            target_volume,
+            exact_match,
+            tuple(include_zones),
+            transfer_costs)
 
 def solve_formulation(layout: LHBedLayout,
                       target_composition: Composition,
                       target_volume: float,
                       exact_match: bool = True,
-                      include_zones: List[Zone] = [Zone.SOLVENT, Zone.STOCK, Zone.SAMPLE]) -> Dict[str, Any]:
+                      include_zones: List[Zone] = [Zone.SOLVENT, Zone.STOCK, Zone.SAMPLE],
+                      transfer_costs: Tuple[float, float] | None = None) -> Dict[str, Any]:
+    """
+    Calculates the formulation logic and returns a result dictionary. Results are cached
+    (up to FORMULATION_CACHE_SIZE) until the layout version changes. The version changes when
+    the volume or composition of a well obtained with LHBedLayout.get_well_and_rack changes,
+    including in-place changes to its solvents and solutes, but not when a well is modified
+    through any other reference (e.g. from get_all_wells); replace such wells with
+    LHBedLayout.update_well instead.
+
+    By default, source volumes are whatever non-negative least squares returns. If transfer_costs
+    is given, the source wells are instead chosen to minimize the total cost of the transfers
+    (see solve_sparse_formulation), e.g. the number of transfers or their estimated time.
+
+    Args:
+        transfer_costs (Tuple[float, float] | None, optional): (cost per transfer, cost per unit
+            volume transferred). Defaults to None.
+    
+    Returns:
+        Dict with keys:
+            - success (bool): Whether formulation was successful
+            - error (str | None): Error message if failed
+            - volumes (List[float]): List of volumes required from each well
+            - wells (List[Well]): List of source wells
     """
-    Calculates the formulation logic and returns a result dictionary.
+
+    key = _formulation_cache_key(layout, target_composition, target_volume, exact_match, include_zones, transfer_costs)
+    result = _get_cached_formulation(key)
+    if result is None:
+        result = _solve_formulation(layout, target_composition, target_volume, exact_match, include_zones, transfer_costs)
+        _cache_formulation(key, result)
+
+    return _copy_result(result)
+
+def _get_cached_formulation(key: tuple) -> Dict[str, Any] | None:
+    """Gets a cached formulation result, or None if there is none"""
+
+    with _formulation_cache_lock:
+        result = _formulation_cache.get(key, None)
+        if result is not None:
+            _formulation_cache.move_to_end(key)
+
+    return result
+
+def _cache_formulation(key: tuple, result: Dict[str, Any]) -> None:
+    """Caches a formulation result, discarding the least recently used results if necessary"""
+
+    with _formulation_cache_lock:
+        _formulation_cache[key] = result
+        while len(_formulation_cache) > FORMULATION_CACHE_SIZE:
+            _formulation_cache.popitem(last=False)
+
+def _copy_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Copies the lists of a formulation result, so that callers cannot modify cached results"""
+
+    return {**result, 'volumes': list(result['volumes']), 'wells': list(result['wells'])}
+
+def _solve_formulation(layout: LHBedLayout,
+                       target_composition: Composition,
+                       target_volume: float,
+                       exact_match: bool,
+                       include_zones: List[Zone],
+                       transfer_costs: Tuple[float, float] | None = None) -> Dict[str, Any]:
+    """Calculates a formulation without caching (see solve_formulation)"""
+
+    return _solve_with_sources(get_source_wells(layout, include_zones),
+                               {rack_id: rack.min_volume for rack_id, rack in layout.racks.items()},
+                               target_composition,
+                               target_volume,
+                               exact_match,
+                               transfer_costs)
+
+def _solve_with_sources(sources: SourceWells,
+                        min_volumes: Dict[str, float],
+                        target_composition: Composition,
+                        target_volume: float,
+                        exact_match: bool,
+                        transfer_costs: Tuple[float, float] | None = None) -> Dict[str, Any]:
+    """
+    Calculates the formulation logic from a set of candidate source wells and returns a result
+    dictionary (see solve_formulation).
+
+    Args:
+        sources (SourceWells): candidate source wells
+        min_volumes (Dict[str, float]): minimum (dead) volume of each rack
+        transfer_costs (Tuple[float, float] | None, optional): see solve_formulation
     
     Returns:
         Dict with keys:
@@ -89,8 +492,7 @@ def solve_formulation(layout: LHBedLayout,
     logging.info(f'target vector: {target_vector}')
 
     # 2. Get wells and check components
-    all_wells = get_all_wells_in_zones(layout, include_zones)
-    source_wells, source_components = select_wells(all_wells, target_names, exact_match)
+    source_wells, source_components = sources.select(target_names, exact_match)
 
     if not len(source_wells):
         return {'success': False, 'error': 'Cannot create formulation: no acceptable solutions available', 'volumes': [], 'wells': []}
@@ -100,37 +502,57 @@ def solve_formulation(layout: LHBedLayout,
         if target_name not in source_components:
             return {'success': False, 'error': f'Cannot make formulation: {target_name} is missing', 'volumes': [], 'wells': []}
 
-    # 4. Attempt to solve
-    source_wells_current = list(source_wells) # copy list
-    
-    while True:
-        logging.info(f'Source wells: {source_wells_current}')
-        source_matrix, source_wells_current = make_source_matrix(target_names, source_wells_current, target_units)
-        
-        if not source_wells_current:
-             return {'success': False, 'error': 'Solver failed: Ran out of source wells', 'volumes': [], 'wells': []}
+    # 4. Attempt to solve. The source matrix is built once; wells with insufficient volume are
+    # removed by deleting their columns, and the solver is warm-started from the previous solution
+    source_matrix, source_wells_current = sources.make_source_matrix(target_names, list(source_wells), target_units)
+
+    if not source_wells_current:
+        return {'success': False, 'error': 'Solver failed: Ran out of source wells', 'volumes': [], 'wells': []}
+
+    source_matrix = np.array(source_matrix, dtype=float)
+    target_vector = np.array(target_vector, dtype=float)
+    sol = None
+
+    # components that are absent from both the sources and the target do not affect the solution
+    relevant_rows = (source_matrix != 0).any(axis=1) | (target_vector != 0)
+    source_matrix = source_matrix[relevant_rows]
+    target_vector = target_vector[relevant_rows]
+
+    if transfer_costs is not None:
+        result = solve_sparse_formulation(source_matrix, target_vector, source_wells_current,
+                                          min_volumes, target_volume, transfer_costs)
+        if result is not None:
+            return result
+        logging.info('No transfer-minimizing formulation found; using least squares')
 
-        logging.info(f'Source matrix: {source_matrix}')
+    while True:
+        # deferred formatting; array and well representations are expensive
+        logging.info('Source wells: %s', source_wells_current)
+        logging.info('Source matrix: %s', source_matrix)
 
         # NNLS Solve
-        sol, res = nnls(source_matrix, target_vector)
+        if sol is None:
+            sol, res = nnls(source_matrix, target_vector)
+        else:
+            sol, res = nnls_warm_start(source_matrix, target_vector, sol)
 
         if np.isclose(res, 0.0, atol=1e-9):
-            logging.info(f'Good residual {res:0.0e}, solution {sol}')
+            logging.info('Good residual %0.0e, solution %s', res, sol)
             
             # Check volumes
             source_well_volumes = [well.volume for well in source_wells_current]
             required_volumes = sol * target_volume
             
-            wells_to_remove = []
-            for well, source_well_volume, required_volume in zip(source_wells_current, source_well_volumes, required_volumes):
+            keep = []
+            for i, (well, source_well_volume, required_volume) in enumerate(zip(source_wells_current, source_well_volumes, required_volumes)):
                 # Check if we have enough volume (including dead volume)
-                rack_min = layout.racks[well.rack_id].min_volume
+                rack_min = min_volumes[well.rack_id]
                 if (required_volume + rack_min) > source_well_volume:
                     logging.warning(f'Well {well} insufficient volume (Needs {required_volume} + {rack_min}, has {source_well_volume}). Removing.')
-                    wells_to_remove.append(well)
+                else:
+                    keep.append(i)
             
-            if not wells_to_remove:
+            if len(keep) == len(source_wells_current):
                 # Success!
                 volumes = []
                 result_wells = []
@@ -140,17 +562,107 @@ def solve_formulation(layout: LHBedLayout,
                         result_wells.append(well)
                 return {'success': True, 'error': None, 'volumes': volumes, 'wells': result_wells}
             else:
-                # Remove bad wells and retry
-                for w in wells_to_remove:
-                    if w in source_wells_current:
-                        source_wells_current.remove(w)
-                if not source_wells_current:
+                # Remove all bad wells at once and retry
+                if not len(keep):
                     return {'success': False, 'error': 'Insufficient volume in source wells', 'volumes': [], 'wells': []}
+                source_wells_current = [source_wells_current[i] for i in keep]
+                source_matrix = source_matrix[:, keep]
+                sol = sol[keep]
                 
         else:
             logging.warning(f'Bad residual {res:0.0e}')
             return {'success': False, 'error': f'Cannot solve formulation (Residual: {res:0.0e})', 'volumes': [], 'wells': []}
 
+def _solve_chunk(wells: List[Well],
+                 min_volumes: Dict[str, float],
+                 targets: List[Tuple[Composition, float]],
+                 exact_match: bool) -> List[Dict[str, Any]]:
+    """Solves formulations in a worker process (see solve_formulations). Because the worker
+        operates on copies of the wells, source wells are returned as positions in wells."""
+
+    sources = SourceWells(wells)
+    positions = {id(well): i for i, well in enumerate(wells)}
+    results = []
+    for target_composition, target_volume in targets:
+        result = _solve_with_sources(sources, min_volumes, target_composition, target_volume, exact_match)
+        result['wells'] = [positions[id(well)] for well in result['wells']]
+        results.append(result)
+
+    return results
+
+def solve_formulations(layout: LHBedLayout,
+                       targets: List[Tuple[Composition, float]],
+                       exact_match: bool = True,
+                       include_zones: List[Zone] = [Zone.SOLVENT, Zone.STOCK, Zone.SAMPLE],
+                       processes: int = 0) -> Dict[str, Any]:
+    """
+    Calculates formulations for many targets at once. Candidate source wells are selected, and
+    their components extracted, once for all targets; results are shared with the cache of
+    solve_formulation. Each formulation is solved independently, so the total volume drawn
+    from each source well is checked separately.
+
+    Args:
+        layout (LHBedLayout): LH bed layout
+        targets (List[Tuple[Composition, float]]): target composition and target volume of each formulation
+        exact_match (bool, optional): see solve_formulation. Defaults to True.
+        include_zones (List[Zone], optional): see solve_formulation. Defaults to [Zone.SOLVENT, Zone.STOCK, Zone.SAMPLE].
+        processes (int, optional): if greater than 1, formulations that are not cached are solved
+            in a pool of this many worker processes. The workers are spawned rather than forked,
+            because forking a threaded server can copy locks that other threads hold.
+            Defaults to 0.
+
+    Returns:
+        Dict with keys:
+            - results (List[Dict[str, Any]]): result of each formulation (see solve_formulation)
+            - totals (List[Dict[str, Any]]): for each source well used, 'well' (Well), 'volume'
+                (float; total volume drawn by all formulations) and 'sufficient' (bool; whether the
+                well holds that volume plus the rack minimum volume)
+            - success (bool): whether all formulations are possible, both individually and together
+    """
+
+    keys = [_formulation_cache_key(layout, target_composition, target_volume, exact_match, include_zones)
+            for target_composition, target_volume in targets]
+    results = [_get_cached_formulation(key) for key in keys]
+    missing = [i for i, result in enumerate(results) if result is None]
+
+    if len(missing):
+        sources = get_source_wells(layout, include_zones)
+        wells = sources.wells
+        min_volumes = {rack_id: rack.min_volume for rack_id, rack in layout.racks.items()}
+        missing_targets = [targets[i] for i in missing]
+        if (processes > 1) & (len(missing) > 1):
+            chunks = [list(chunk) for chunk in np.array_split(np.arange(len(missing_targets)), processes) if len(chunk)]
+            with ProcessPoolExecutor(max_workers=len(chunks), mp_context=multiprocessing.get_context('spawn')) as executor:
+                futures = [executor.submit(_solve_chunk, wells, min_volumes, [missing_targets[j] for j in chunk], exact_match)
+                           for chunk in chunks]
+                solved = [result for future in futures for result in future.result()]
+            for result in solved:
+                result['wells'] = [wells[j] for j in result['wells']]
+        else:
+            solved = [_solve_with_sources(sources, min_volumes, target_composition, target_volume, exact_match)
+                      for target_composition, target_volume in missing_targets]
+
+        for i, result in zip(missing, solved):
+            results[i] = result
+            _cache_formulation(keys[i], result)
+
+    results = [_copy_result(result) for result in results]
+
+    # total volume drawn from each source well
+    totals: Dict[int, Dict[str, Any]] = {}
+    for result in results:
+        if result['success']:
+            for well, volume in zip(result['wells'], result['volumes']):
+                total = totals.setdefault(id(well), {'well': well, 'volume': 0.0})
+                total['volume'] += volume
+    for total in totals.values():
+        well = total['well']
+        total['sufficient'] = bool((total['volume'] + layout.racks[well.rack_id].min_volume) <= well.volume)
+
+    success = all(result['success'] for result in results) and all(total['sufficient'] for total in totals.values())
+
+    return {'results': results, 'totals': list(totals.values()), 'success': success}
+
 @register(origin=ORIGIN)
 class Formulation(MethodContainer):
 
@@ -165,10 +677,18 @@ class Formulation(MethodContainer):
     """exact_match(bool, optional): Require an exact match between target composition and what
                 is created. If False, allows other components to be added as long as the target composition
                 is achieved. Defaults to True."""
+    minimize: Literal['none', 'transfers', 'time'] = 'none'
+    """minimize (str, optional): choice of source wells. 'none' uses the least squares solution;
+                'transfers' uses the fewest source wells; 'time' minimizes the total estimated time of
+                the transfers. Defaults to 'none'."""
     transfer_template: SerializeAsAny[TransferMethod] = Field(default_factory=TransferWithRinse)
     mix_template: SerializeAsAny[MixMethod] = Field(default_factory=MixWithRinse)
 
     _formulation_results: Tuple[List[float], List[Well], bool] | None = None
+    # layout version at which _formulation_results were last validated, and the state of the
+    # layout they depend on (see get_formulation_dependencies)
+    _formulation_version: int | None = None
+    _formulation_dependencies: tuple | None = None
 
     @validator('mix_template', 'transfer_template', pre=True)
     def validate_templates(cls, v):
@@ -184,7 +704,8 @@ class Formulation(MethodContainer):
             target_composition=self.target_composition,
             target_volume=self.target_volume,
             exact_match=self.exact_match,
-            include_zones=self.include_zones
+            include_zones=self.include_zones,
+            transfer_costs=self.get_transfer_costs(layout)
         )
         
         if not result['success']:
@@ -195,6 +716,27 @@ class Formulation(MethodContainer):
         
         return self._formulation_results
 
+    def get_transfer_costs(self, layout: LHBedLayout) -> Tuple[float, float] | None:
+        """Costs of transfers for the choice of source wells (see solve_formulation)
+
+        Args:
+            layout (LHBedLayout): LH bed layout
+
+        Returns:
+            Tuple[float, float] | None: (cost per transfer, cost per unit volume), or None to use
+                the least squares solution
+        """
+
+        if self.minimize == 'transfers':
+            return 1.0, 0.0
+        elif self.minimize == 'time':
+            # estimated time of a transfer is linear in its volume
+            fixed_time = self.transfer_template.model_copy(update={'Volume': 0.0}).estimated_time(layout)
+            unit_time = self.transfer_template.model_copy(update={'Volume': 1.0}).estimated_time(layout)
+            return fixed_time, unit_time - fixed_time
+
+        return None
+
     def get_formulation_results(self, layout: LHBedLayout) -> Tuple[List[float], List[Well], bool]:
         """Get cached formulation results, or recalculate
 
@@ -205,10 +747,129 @@ class Formulation(MethodContainer):
             Tuple[List[float], List[Well], bool]: see formulate()
         """
 
-        if self._formulation_results is None:
+        joint_results = self._get_joint_results(layout)
+        if joint_results is not None:
+            return joint_results
+
+        if (self._formulation_results is None) or not self._formulation_results_valid(layout):
             self._formulation_results = self.formulate(layout)
+            self._formulation_version = layout.version
+            self._formulation_dependencies = self.get_formulation_dependencies(layout)
+
         return self._formulation_results
 
+    def get_formulation_dependencies(self, layout: LHBedLayout) -> tuple:
+        """State of the layout that the formulation results depend on: the rack minimum volumes,
+            and the location, volume and composition of every candidate source well in
+            self.include_zones (including the diluent of SoluteFormulation)
+
+        Args:
+            layout (LHBedLayout): LH bed layout
+
+        Returns:
+            tuple: dependencies, to be compared with ==
+        """
+
+        min_volumes = tuple((rack_id, rack.min_volume) for rack_id, rack in layout.racks.items())
+        # composition keys are quantized, which is far below the precision of the solution
+        wells = tuple((well.rack_id, well.well_number, well.volume, well.composition.key)
+                      for well in get_source_wells(layout, self.include_zones).wells)
+
+        return min_volumes, wells
+
+    def _formulation_results_valid(self, layout: LHBedLayout) -> bool:
+        """Checks whether the cached formulation results still apply to the layout. They are
+            recalculated only if the layout has changed since they were last validated and one
+            of their dependencies has changed"""
+
+        version = layout.version
+        if version == self._formulation_version:
+            return True
+
+        if self.get_formulation_dependencies(layout) != self._formulation_dependencies:
+            return False
+
+        self._formulation_version = version
+        return True
+
+    def _joint_key(self) -> str:
+        """Key identifying the formulation among jointly solved formulations (see hold_joint_results)"""
+
+        return self.model_dump_json(exclude=EXCLUDE_FIELDS)
+
+    def _get_joint_results(self, layout: LHBedLayout) -> Tuple[List[float], List[Well], bool] | None:
+        """Gets jointly solved results held for layout, with the wells resolved in layout
+
+        Args:
+            layout (LHBedLayout): LH bed layout
+
+        Returns:
+            Tuple[List[float], List[Well], bool] | None: see formulate(); None if no results are held
+        """
+
+        if not len(_joint_results):
+            return None
+
+        with _formulation_cache_lock:
+            results = _joint_results.get(id(layout), {}).get(self._joint_key(), None)
+            if not results:
+                return None
+            volumes, locations, success = results[0]
+
+        return list(volumes), [layout.get_well_and_rack(rack_id, well_number)[0] for rack_id, well_number in locations], success
+
+    def get_cached_methods(self, layout: LHBedLayout) -> List[BaseMethod]:
+        """Cached version of get_methods (see MethodContainer.get_cached_methods). Expansions
+            using held joint results are not cached"""
+
+        if self._get_joint_results(layout) is not None:
+            return self.get_methods(layout)
+
+        return super().get_cached_methods(layout)
+
+    def execute(self, layout: LHBedLayout) -> MethodError | None:
+        """Executes the formulation. Held joint results (see hold_joint_results) are used
+            once; an identical formulation executed later uses the next results"""
+
+        error = super().execute(layout)
+        with _formulation_cache_lock:
+            results = _joint_results.get(id(layout), {}).get(self._joint_key(), None)
+            if results:
+                results.pop(0)
+
+        return error
+
+    def get_formulation_constraints(self, layout: LHBedLayout, sources: SourceWells) -> Tuple[np.ndarray, np.ndarray, List[Well], str | None]:
+        """Linear constraints on the volumes drawn from candidate source wells, for solving several
+            formulations together (see solve_joint_formulations)
+
+        Args:
+            layout (LHBedLayout): LH bed layout
+            sources (SourceWells): candidate source wells from self.include_zones
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray, List[Well], str | None]: matrix A, vector b and candidate
+                wells, such that the formulation is made by drawing volumes v from the wells with
+                A @ v == b, and an error message if the formulation cannot be made at all
+        """
+
+        target_names, target_vector, target_units = make_target_vector(self.target_composition)
+        source_wells, source_components = sources.select(target_names, self.exact_match)
+        no_solution = (np.zeros((0, 0)), np.zeros(0), [])
+
+        if not len(source_wells):
+            return *no_solution, 'Cannot create formulation: no acceptable solutions available'
+
+        for target_name in target_names:
+            if target_name not in source_components:
+                return *no_solution, f'Cannot make formulation: {target_name} is missing'
+
+        source_matrix, source_wells = sources.make_source_matrix(target_names, source_wells, target_units)
+        if not source_wells:
+            return *no_solution, 'Solver failed: Ran out of source wells'
+
+        return np.array(source_matrix, dtype=float), np.array(target_vector, dtype=float) * self.target_volume, source_wells, None
+
     def get_expected_composition(self, layout: LHBedLayout) -> Composition:
         """Calculates the expected composition from the formulation
 
@@ -220,8 +881,7 @@ class Formulation(MethodContainer):
 
         if success:
             mix_well = Well(rack_id='', volume=0, composition=Composition(), well_number=0)
-            for volume, well in zip(volumes, wells):
-                mix_well.mix_with(volume, well.composition)
+            mix_well.mix_many([(volume, well.composition) for volume, well in zip(volumes, wells)])
             return mix_well.composition
         else:
             return Composition()
@@ -299,7 +959,7 @@ class Formulation(MethodContainer):
     def get_all_wells(self, layout):
         return get_all_wells_in_zones(layout, self.include_zones)
 
-@register
+@register(origin=ORIGIN)
 class SoluteFormulation(Formulation):
     """Subclass of Formulation. In target_composition, specify only the solutes
         of interest; any missing volume will be filled in with the diluent."""
@@ -318,7 +978,7 @@ class SoluteFormulation(Formulation):
         if not success:
              return [], [], False
 
-        diluent_well = next((well for well in self.get_all_wells(layout) if well.composition == self.diluent), None)
+        diluent_well = self.get_diluent_well(layout)
         
         if diluent_well is None:        
             logging.error(f'Diluent ({self.diluent}) not available on bed')
@@ -338,5 +998,165 @@ class SoluteFormulation(Formulation):
 
         return volumes, wells, True
 
+    def get_diluent_well(self, layout: LHBedLayout) -> Well | None:
+        """Finds a well containing the diluent in one of the included zones
+
+        Args:
+            layout (LHBedLayout): LH bed layout
+
+        Returns:
+            Well | None: diluent well, or None if the diluent is not available
+        """
+
+        return next((well for well in layout.find_composition(self.diluent)
+                     if LayoutWell2ZoneWell(well.rack_id, well.well_number)[0] in self.include_zones), None)
+
+    def get_formulation_constraints(self, layout: LHBedLayout, sources: SourceWells) -> Tuple[np.ndarray, np.ndarray, List[Well], str | None]:
+        """Adds the diluent to the constraints of Formulation: the volumes, including the diluent
+            volume, must add up to the target volume"""
+
+        A, b, wells, error = super().get_formulation_constraints(layout, sources)
+        if error is not None:
+            return A, b, wells, error
+
+        diluent_well = self.get_diluent_well(layout)
+        if diluent_well is None:
+            return A, b, wells, f'Diluent ({self.diluent}) not available on bed'
+
+        target_names, _, target_units = make_target_vector(self.target_composition)
+        diluent_column = SourceWells([diluent_well]).get_column(diluent_well, target_names, target_units)
+        A = np.vstack((np.column_stack((A, diluent_column)), np.ones(A.shape[1] + 1)))
+        b = np.append(b, self.target_volume)
+
+        return A, b, wells + [diluent_well], None
+
+def find_formulations(methods: List[MethodsType], layout: LHBedLayout) -> List[Formulation]:
+    """Finds the formulations in a list of methods, including those in the expansions of
+        method containers
+
+    Args:
+        methods (List[MethodsType]): methods to search
+        layout (LHBedLayout): LH bed layout used to expand method containers
+
+    Returns:
+        List[Formulation]: formulations, in execution order
+    """
+
+    formulations = []
+    for m in methods:
+        if isinstance(m, Formulation):
+            formulations.append(m)
+        elif isinstance(m, MethodContainer):
+            formulations += find_formulations(m.get_cached_methods(layout), layout)
+
+    return formulations
+
+def hold_joint_results(layout: LHBedLayout, formulations: List[Formulation], results: List[Dict[str, Any]]) -> None:
+    """Holds jointly solved formulation results (see solve_joint_formulations) for a dry run on
+        layout. Until release_joint_results is called, formulations with the same fields as
+        one of formulations use the held results when expanded on this layout (and only this
+        layout), instead of being solved individually. Identical formulations use the results
+        in order, each as it is executed. Wells are held by location and resolved in the layout
+        when the results are used.
+
+    Args:
+        layout (LHBedLayout): layout of the dry run
+        formulations (List[Formulation]): formulations, in execution order
+        results (List[Dict[str, Any]]): result of each formulation (see solve_formulation)
+    """
+
+    held: Dict[str, list] = {}
+    for formulation, result in zip(formulations, results):
+        held.setdefault(formulation._joint_key(), []).append((list(result['volumes']),
+                                                               [(well.rack_id, well.well_number) for well in result['wells']],
+                                                               result['success']))
+
+    with _formulation_cache_lock:
+        _joint_results[id(layout)] = held
+
+def release_joint_results(layout: LHBedLayout) -> None:
+    """Releases results held by hold_joint_results for layout
+
+    Args:
+        layout (LHBedLayout): layout of the dry run
+    """
+
+    with _formulation_cache_lock:
+        _joint_results.pop(id(layout), None)
+
+def solve_joint_formulations(layout: LHBedLayout, formulations: List[Formulation]) -> Dict[str, Any]:
+    """
+    Solves several formulations together, e.g. all formulations in a run queue, so that the total
+    volume drawn from each source well by all of them does not exceed the volume in the well minus
+    the rack minimum volume. Uses a single linear program that minimizes the total volume drawn.
+
+    Args:
+        layout (LHBedLayout): LH bed layout
+        formulations (List[Formulation]): formulations to solve
+
+    Returns:
+        Dict with keys:
+            - success (bool): Whether all formulations can be made together
+            - error (str | None): Error message if failed
+            - results (List[Dict[str, Any]]): result of each formulation (see solve_formulation);
+                empty if failed
+    """
+
+    sources: Dict[tuple, SourceWells] = {}
+    constraints = []
+    for i, formulation in enumerate(formulations):
+        zones = tuple(formulation.include_zones)
+        if zones not in sources:
+            sources[zones] = get_source_wells(layout, formulation.include_zones)
+        A, b, wells, error = formulation.get_formulation_constraints(layout, sources[zones])
+        if error is not None:
+            return {'success': False, 'error': f'Formulation {i} ({formulation.display_name}): {error}', 'results': []}
+        constraints.append((A, b, wells))
+
+    if not len(constraints):
+        return {'success': True, 'error': None, 'results': []}
+
+    # equality constraints: block diagonal, one block per formulation
+    n_rows = sum(A.shape[0] for A, _, _ in constraints)
+    n_columns = sum(A.shape[1] for A, _, _ in constraints)
+    A_eq = np.zeros((n_rows, n_columns))
+    b_eq = np.zeros(n_rows)
+    # capacity constraints: total volume drawn from each well
+    well_rows: Dict[int, int] = {}
+    capacities = []
+    column_wells = []
+    row, column = 0, 0
+    for A, b, wells in constraints:
+        A_eq[row:row + A.shape[0], column:column + A.shape[1]] = A
+        b_eq[row:row + A.shape[0]] = b
+        for well in wells:
+            if id(well) not in well_rows:
+                well_rows[id(well)] = len(capacities)
+                capacities.append(max(well.volume - layout.racks[well.rack_id].min_volume, 0.0))
+            column_wells.append(well_rows[id(well)])
+        row += A.shape[0]
+        column += A.shape[1]
+    A_ub = np.zeros((len(capacities), n_columns))
+    A_ub[column_wells, np.arange(n_columns)] = 1.0
+
+    solution = linprog(np.ones(n_columns), A_ub=A_ub, b_ub=capacities, A_eq=A_eq, b_eq=b_eq, bounds=(0, None), method='highs')
+    if solution.status != 0:
+        logging.warning(f'Joint formulation failed: {solution.message}')
+        return {'success': False, 'error': f'Cannot make formulations together: {solution.message}', 'results': []}
+
+    results = []
+    column = 0
+    for A, _, wells in constraints:
+        volumes = []
+        result_wells = []
+        for well, volume in zip(wells, solution.x[column:column + A.shape[1]]):
+            if volume > ZERO_VOLUME_TOLERANCE:
+                volumes.append(float(volume))
+                result_wells.append(well)
+        results.append({'success': True, 'error': None, 'volumes': volumes, 'wells': result_wells})
+        column += A.shape[1]
+
+    return {'success': True, 'error': None, 'results': results}
+
 if __name__ == '__main__':
     pass # Test code
\ No newline at end of file
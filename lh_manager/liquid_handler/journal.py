@@ -0,0 +1,304 @@
+"""Append-only change journal for persisting the sample list"""
+import json
+import logging
+import os
+import threading
+import time
+
+from pathlib import Path
+from typing import Any, Dict, List
+
+from .persistence import atomic_write
+from .samplecontainer import SampleState
+
+# minimum interval between fsyncs of the journal (s); records are flushed to the OS immediately
+FSYNC_INTERVAL = 1.0
+# the journal is compacted into the snapshot when it grows larger than the snapshot, and
+# at least this large (bytes)
+COMPACTION_MIN_SIZE = 1_000_000
+
+class _Replay:
+    """Serialized SampleContainer to which journal records are applied. The positions of
+        the samples are indexed by ID, so that put and delete records are applied in constant
+        time; deleted samples are left as None until the end of the replay
+
+    Args:
+        data (Dict[str, Any]): serialized SampleContainer (modified)
+    """
+
+    def __init__(self, data: Dict[str, Any]) -> None:
+
+        self.data = data
+        self.samples: List[dict | None] = data.setdefault('samples', [])
+        self._reindex()
+
+    def _reindex(self) -> None:
+        """Rebuilds the positions of the samples {id: [positions]}"""
+
+        self.positions: Dict[Any, List[int]] = {}
+        for i, sample in enumerate(self.samples):
+            if sample is not None:
+                self.positions.setdefault(sample.get('id'), []).append(i)
+
+    def apply(self, record: Dict[str, Any]) -> None:
+        """Applies a journal record"""
+
+        op = record['op']
+        if op == 'put':
+            sample = record['sample']
+            positions = self.positions.get(sample['id'], None)
+            if positions is None:
+                self.positions[sample['id']] = [len(self.samples)]
+                self.samples.append(sample)
+            else:
+                self.samples[positions[0]] = sample
+        elif op == 'delete':
+            for i in self.positions.pop(record['id'], []):
+                self.samples[i] = None
+        elif op == 'order':
+            by_id = {s.get('id'): s for s in self.samples if s is not None}
+            self.samples = [by_id[sample_id] for sample_id in record['ids'] if sample_id in by_id]
+            self._reindex()
+        elif op == 'container':
+            self.data.update(record['fields'])
+        else:
+            logging.warning(f'Unknown journal record {op}; ignored')
+
+    def finish(self) -> Dict[str, Any]:
+        """Removes deleted samples
+
+        Returns:
+            Dict[str, Any]: serialized SampleContainer
+        """
+
+        self.data['samples'] = [s for s in self.samples if s is not None]
+
+        return self.data
+
+class SampleJournal:
+    """Persists a SampleContainer as a snapshot (the full container, in the same format as
+        SampleContainer.model_dump_json) and an append-only journal of changes since the snapshot.
+
+        Each call to record writes one compact JSON line per sample that was added, changed or
+        deleted since the previous call, plus the sample order and the other container fields
+        if these changed. Changes are found from the versions of the recorded SampleState (see
+        SampleContainer.update_versions), so samples are not serialized again. The journal is fsynced at most every FSYNC_INTERVAL seconds. When it
+        grows larger than the snapshot, it is compacted in a background thread: the journal is
+        rotated and a new snapshot is written atomically.
+
+        Records contain complete samples, so replaying a record more than once (e.g. a rotated
+        journal left over from an interrupted compaction) gives the same result.
+
+    Args:
+        snapshot_path (Path): snapshot file
+        journal_path (Path): journal file
+    """
+
+    def __init__(self, snapshot_path: Path, journal_path: Path) -> None:
+
+        self.snapshot_path = Path(snapshot_path)
+        self.journal_path = Path(journal_path)
+        # journal being compacted into the snapshot
+        self.rotated_path = self.journal_path.with_name(self.journal_path.name + '.compacting')
+        self.lock = threading.Lock()
+
+        # persisted state: container version, sample order and other container fields
+        self._version: int = 0
+        self._order: List[str] = []
+        self._container: str = ''
+        self._attached: bool = False
+
+        self._file = None
+        self._journal_size: int = 0
+        self._snapshot_size: int = 0
+        self._last_fsync: float = 0.0
+        self._fsync_timer: threading.Timer | None = None
+        self._compacting: threading.Thread | None = None
+        self._compact_pending: bool = False
+
+    def load(self) -> Dict[str, Any] | None:
+        """Loads the snapshot and replays the journal
+
+        Returns:
+            Dict[str, Any] | None: serialized SampleContainer, or None if nothing has been saved
+        """
+
+        data = None
+        if self.snapshot_path.exists():
+            with open(self.snapshot_path, 'r') as f:
+                data = json.load(f)
+            self._snapshot_size = self.snapshot_path.stat().st_size
+
+        for path in (self.rotated_path, self.journal_path):
+            if not path.exists():
+                continue
+            replay = _Replay({} if data is None else data)
+            with open(path, 'r') as f:
+                for i, line in enumerate(f):
+                    if not line.strip():
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # incomplete last record of an interrupted write
+                        logging.warning(f'Could not read record {i} of {path}; ignored')
+                        continue
+                    replay.apply(record)
+            data = replay.finish()
+            self._compact_pending = True
+
+        return data
+
+    def attach(self, state: SampleState) -> None:
+        """Sets the state of the sample list that is persisted. Must be called with the state of
+            the loaded (or newly initialized) sample list before record. The first call to record
+            writes a new snapshot, which replaces anything saved previously
+
+        Args:
+            state (SampleState): state of the sample list (see SampleContainer.get_state)
+        """
+
+        with self.lock:
+            self._version, self._order, self._container = state.version, list(state.order), state.container
+            self._attached = True
+            self._compact_pending = True
+
+    def record(self, state: SampleState) -> None:
+        """Appends the changes to the sample list since the last call to the journal
+
+        Args:
+            state (SampleState): state of the sample list (see SampleContainer.get_state)
+        """
+
+        with self.lock:
+            if not self._attached:
+                self._version, self._order, self._container = state.version, list(state.order), state.container
+                self._attached = True
+                self._compact_pending = True
+
+            order = list(state.order)
+            ids = set(order)
+            if len(ids) != len(order):
+                # duplicate sample IDs cannot be represented in the journal
+                self._version, self._order, self._container = state.version, order, state.container
+                self._compact(state)
+                return
+
+            lines = []
+            for sample_id, sample_json in zip(order, state.samples_json):
+                if state.sample_versions.get(sample_id, state.version) > self._version:
+                    lines.append(f'{{"op":"put","sample":{sample_json}}}')
+            previous = set(self._order)
+            for sample_id in self._order:
+                if sample_id not in ids:
+                    lines.append(json.dumps({'op': 'delete', 'id': sample_id}, separators=(',', ':')))
+            if order != [sample_id for sample_id in self._order if sample_id in ids] + \
+                        [sample_id for sample_id in order if sample_id not in previous]:
+                lines.append(json.dumps({'op': 'order', 'ids': order}, separators=(',', ':')))
+            if state.container != self._container:
+                lines.append(f'{{"op":"container","fields":{state.container}}}')
+
+            if len(lines):
+                self._append('\n'.join(lines) + '\n')
+
+            # only after the records were written, so that a failed record can be retried
+            self._version, self._order, self._container = state.version, order, state.container
+
+            if self._compact_pending or (self._journal_size > max(COMPACTION_MIN_SIZE, self._snapshot_size)):
+                self._compact(state)
+
+    def _append(self, text: str) -> None:
+        """Appends text to the journal, syncing it at most every FSYNC_INTERVAL"""
+
+        if self._file is None:
+            self.journal_path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.journal_path, 'a')
+            self._journal_size = self._file.tell()
+            if self._journal_size > 0:
+                with open(self.journal_path, 'rb') as f:
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b'\n':
+                        # do not continue an incomplete record
+                        text = '\n' + text
+        self._file.write(text)
+        self._file.flush()
+        self._journal_size += len(text)
+
+        now = time.monotonic()
+        if now - self._last_fsync >= FSYNC_INTERVAL:
+            self._fsync()
+        elif self._fsync_timer is None:
+            self._fsync_timer = threading.Timer(FSYNC_INTERVAL - (now - self._last_fsync), self.sync)
+            self._fsync_timer.daemon = True
+            self._fsync_timer.start()
+
+    def _fsync(self) -> None:
+        """Syncs the journal to disk"""
+
+        if self._file is not None:
+            os.fsync(self._file.fileno())
+        self._last_fsync = time.monotonic()
+        if self._fsync_timer is not None:
+            self._fsync_timer.cancel()
+            self._fsync_timer = None
+
+    def sync(self) -> None:
+        """Syncs the journal to disk"""
+
+        with self.lock:
+            self._fsync()
+
+    def _compact(self, state: SampleState) -> None:
+        """Rotates the journal and writes a snapshot of state in a background thread. Must be
+            called with the lock held"""
+
+        if (self._compacting is not None) and self._compacting.is_alive():
+            # try again after the current compaction
+            self._compact_pending = True
+            return
+
+        snapshot = '{"samples":[' + ','.join(state.samples_json) + '],' + state.container[1:]
+
+        # records appended from now on go to a new journal
+        if self._file is not None:
+            self._fsync()
+            self._file.close()
+            self._file = None
+        if self.journal_path.exists():
+            if self.rotated_path.exists():
+                # a previous snapshot could not be written; keep all records since the last one
+                with open(self.journal_path, 'r') as src, open(self.rotated_path, 'a') as dst:
+                    dst.write(src.read())
+                os.remove(self.journal_path)
+            else:
+                os.replace(self.journal_path, self.rotated_path)
+        self._journal_size = 0
+        self._snapshot_size = len(snapshot)
+        self._compact_pending = False
+
+        self._compacting = threading.Thread(target=self._write_snapshot, args=(snapshot,), daemon=True)
+        self._compacting.start()
+
+    def _write_snapshot(self, snapshot: str) -> None:
+        """Writes the snapshot and removes the rotated journal"""
+
+        try:
+            self.snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+            atomic_write(self.snapshot_path, snapshot)
+            if self.rotated_path.exists():
+                os.remove(self.rotated_path)
+        except OSError:
+            logging.exception(f'Could not write snapshot {self.snapshot_path}')
+
+    def close(self) -> None:
+        """Waits for a running compaction and syncs and closes the journal"""
+
+        compacting = self._compacting
+        if compacting is not None:
+            compacting.join()
+
+        with self.lock:
+            if self._file is not None:
+                self._fsync()
+                self._file.close()
+                self._file = None
@@ -1,13 +1,11 @@
-import logging
-
 from .bedlayout import LHBedLayout, WellLocation, Well
 from .status import MethodError
 from .layoutmap import LayoutWell2ZoneWell, Zone
-from .methods import BaseMethod, MethodType, register, MethodsType, method_manager, UnknownMethod
+from .methods import BaseMethod, MethodType, register, MethodsType, method_manager
 from .devices import DeviceBase, device_manager
 from ..waste_manager.wastedata import WasteItem, WATER
 
-from pydantic import BaseModel, validator, ValidationError
+from pydantic import BaseModel, validator
 
 from dataclasses import field
 from typing import List, Literal, ClassVar
@@ -120,21 +118,7 @@ class LHMethodCluster(BaseLHMethod):
     @validator('methods')
     def validate_methods(cls, v):
 
-        if not isinstance(v, list):
-            raise ValueError(f"{v} must be a list")
-
-        for i, iv in enumerate(v):
-            if isinstance(iv, dict):
-                try:
-                    v[i] = method_manager.get_method_by_name(iv['method_name']).model_validate(iv)
-                except ValidationError:
-                    logging.warning(f'Attempted to process unknown method with data {iv}')
-                    v[i] = UnknownMethod(method_data=iv)
-            else:
-                if not (isinstance(iv, BaseMethod)):
-                    raise ValueError(f"{iv} must be derived from BaseMethod")
-
-        return v
+        return method_manager.validate_methods(v)
 
     def explode(self, layout: LHBedLayout):
         methods = []
@@ -168,7 +152,7 @@ class SetWellID(BaseMethod):
     def execute(self, layout: LHBedLayout) -> MethodError | None:
 
         well, _ = layout.get_well_and_rack(self.well.rack_id, self.well.well_number)
-        well.id = self.well_id
+        layout.set_well_id(well, self.well_id)
         
 
 class InjectMethod(BaseLHMethod):
@@ -199,7 +183,7 @@ class InjectMethod(BaseLHMethod):
                                       error=f"Injection of volume {self.sample_volume} requested but well {source_well.well_number} in {source_well.rack_id} rack contains only {source_well.volume}"
                                       )
 
-        source_well.volume -= self.sample_volume
+        layout.remove_from_well(source_well.rack_id, source_well.well_number, self.sample_volume)
 
 
 class MixMethod(BaseLHMethod):
@@ -231,7 +215,7 @@ class MixMethod(BaseLHMethod):
                                       error=f"Mix with volume {required_volume} requested but well {target_well.well_number} in {target_well.rack_id} rack contains only {target_well.volume}"
                                       )
         
-        target_well.volume -= self.extra_volume
+        layout.remove_from_well(target_well.rack_id, target_well.well_number, self.extra_volume)
 
 class TransferMethod(BaseLHMethod):
     """Special class for methods that change the sample composition"""
@@ -263,7 +247,7 @@ class TransferMethod(BaseLHMethod):
                                       error=f"Well {source_well.well_number} in {source_well.rack_id} \
                                       rack contains {source_well.volume} but needs {self.transfer_volume}")
 
-        source_well.volume -= self.transfer_volume
+        layout.remove_from_well(source_well.rack_id, source_well.well_number, self.transfer_volume)
 
         if (target_well.volume + self.Volume) > target_rack.max_volume:
             return MethodError(name=self.display_name,
@@ -271,7 +255,7 @@ class TransferMethod(BaseLHMethod):
                                       )
 
         # Perform mix. Note that target_well volume is also changed by this operation
-        target_well.mix_with(self.Volume, source_well.composition)
+        layout.add_to_well(target_well.rack_id, target_well.well_number, self.Volume, source_well.composition)
 
 
 @register(origin=ORIGIN)
@@ -341,7 +325,7 @@ class TransferWithRinse(TransferMethod):
         return self.Volume / self.Flow_Rate + self.Volume / self.Aspirate_Flow_Rate + self.Air_Gap / 0.3 + base_time + rinse_time
 
     def execute(self, layout):
-        layout.carrier_well.volume -= (self.Outside_Rinse_Volume + self.Inside_Rinse_Volume)
+        layout.remove_from_well('Carrier', 1, self.Outside_Rinse_Volume + self.Inside_Rinse_Volume)
         return super().execute(layout)
 
     def waste(self, layout: LHBedLayout) -> WasteItem:
@@ -423,8 +407,8 @@ class MixWithRinse(MixMethod):
                                       error=f"Mix with volume {self.Volume} requested but well {target_well.well_number} in {target_well.rack_id} rack contains only {target_well.volume}"
                                       )
 
-        target_well.volume -= self.Extra_Volume
-        layout.carrier_well.volume -= (self.Outside_Rinse_Volume + self.Inside_Rinse_Volume)
+        layout.remove_from_well(target_well.rack_id, target_well.well_number, self.Extra_Volume)
+        layout.remove_from_well('Carrier', 1, self.Outside_Rinse_Volume + self.Inside_Rinse_Volume)
     
     def waste(self, layout: LHBedLayout) -> WasteItem:
         inferred_target_well = layout.infer_location(self.Target)
@@ -503,7 +487,7 @@ class InjectWithRinse(InjectMethod):
         return self.Volume / self.Aspirate_Flow_Rate + self.Volume / self.Flow_Rate + self.Air_Gap / 0.3 + base_time + rinse_time
 
     def execute(self, layout):
-        layout.carrier_well.volume -= self.Outside_Rinse_Volume + 0.5
+        layout.remove_from_well('Carrier', 1, self.Outside_Rinse_Volume + 0.5)
         return super().execute(layout)
 
     def waste(self, layout: LHBedLayout) -> WasteItem:
@@ -579,7 +563,7 @@ class Prime(BaseLHMethod):
         return 2 * float(self.Repeats) * float(self.Volume) / flow_rate + base_time
     
     def execute(self, layout):
-        layout.carrier_well.volume -= self.Volume * self.Repeats
+        layout.remove_from_well('Carrier', 1, self.Volume * self.Repeats)
         return super().execute(layout)
 
     def waste(self, layout: LHBedLayout) -> WasteItem:
@@ -639,7 +623,7 @@ class ROADMAP_QCMD_LoadLoop(InjectMethod):
         return self.Volume / self.Aspirate_Flow_Rate + self.Volume / self.Flow_Rate + self.Air_Gap / 0.3 + base_time + rinse_time
 
     def execute(self, layout):
-        layout.carrier_well.volume -= self.Outside_Rinse_Volume + 0.5
+        layout.remove_from_well('Carrier', 1, self.Outside_Rinse_Volume + 0.5)
         return super().execute(layout)
 
     def waste(self, layout: LHBedLayout) -> WasteItem:
@@ -718,7 +702,7 @@ class ROADMAP_QCMD_DirectInject(InjectMethod):
         return self.Volume / self.Aspirate_Flow_Rate + self.Volume / self.Injection_Flow_Rate + self.Air_Gap / 0.3 + base_time + rinse_time
 
     def execute(self, layout):
-        layout.carrier_well.volume -= self.Outside_Rinse_Volume + 0.5
+        layout.remove_from_well('Carrier', 1, self.Outside_Rinse_Volume + 0.5)
         return super().execute(layout)
 
     def waste(self, layout: LHBedLayout) -> WasteItem:
@@ -139,6 +139,8 @@ class JobQueue(BaseModel):
             else:
                 logging.error(f'Received ValidationStatus {result}; this should not happen')
 
+            samples.mark_changed(sample.id)
+
     def update_job_result(self, job: LHJob, method_number: int, method_name: str, result: ResultStatus) -> None:
         """Update job; if it's successful, remove from active list; otherwise,
             update sample stage status
@@ -161,6 +163,7 @@ class JobQueue(BaseModel):
                 self.jobs.pop(job.id)
                 sample.stages[job.parent.stage].update_status()
                 method.execute(layout)
+                samples.mark_changed(sample.id)
                 self.clear_active_job()
                 return
             elif job.get_result_status() == ResultStatus.FAIL:
@@ -168,10 +171,12 @@ class JobQueue(BaseModel):
                 # TODO: Handle errors here
                 self.jobs.pop(job.id)
                 sample.stages[job.parent.stage].status = SampleStatus.FAILED
+                samples.mark_changed(sample.id)
                 self.clear_active_job()
                 return
             else:
                 self.jobs[job.id] = job
+                samples.mark_changed(sample.id)
 
     def clear_active_job(self) -> None:
         """Clears the active job
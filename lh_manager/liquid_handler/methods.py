@@ -1,9 +1,13 @@
 import functools
+import hashlib
+import json
 import logging
 
-from pydantic import BaseModel, Field, validator
+from collections import OrderedDict
+from threading import Lock
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError, validator
 from enum import Enum
-from typing import Any, Dict, List, Literal, Union
+from typing import Annotated, Any, Dict, List, Literal, Tuple, Union
 from uuid import uuid4
 
 from .bedlayout import LHBedLayout
@@ -11,6 +15,31 @@ from .status import MethodError, SampleStatus
 
 EXCLUDE_FIELDS = set(["method_name", "display_name", "complete", "method_type", "id", "tasks", "status"])
 
+# maximum number of method container expansions cached by MethodContainer.get_cached_methods
+METHODS_CACHE_SIZE = 256
+
+_methods_cache: OrderedDict[tuple, list] = OrderedDict()
+_methods_cache_lock = Lock()
+
+def _renew_ids(method: "BaseMethod") -> "BaseMethod":
+    """Assigns new IDs to a method and the methods nested in its fields
+
+    Args:
+        method (BaseMethod): method to modify
+
+    Returns:
+        BaseMethod: the method
+    """
+
+    method.id = str(uuid4())
+    for name in type(method).model_fields.keys():
+        value = getattr(method, name)
+        for item in (value if isinstance(value, list) else [value]):
+            if isinstance(item, BaseMethod):
+                _renew_ids(item)
+
+    return method
+
 ## ========== Base Methods specification =============
 
 class MethodType(str, Enum):
@@ -104,15 +133,66 @@ class MethodContainer(BaseMethod):
 
         return []
 
+    def get_cached_methods(self, layout: LHBedLayout) -> List[BaseMethod]:
+        """Cached version of get_methods. Expansions are cached (up to METHODS_CACHE_SIZE) by
+            method type, the values of the method fields (excluding EXCLUDE_FIELDS, also in
+            nested methods) and the layout version, so that executing, estimating and rendering
+            the same container on an unchanged layout expands it once.
+
+            Each call returns independent copies of the cached submethods, which can be modified.
+            As if get_methods had been called, the copies (and methods nested in them) have new
+            IDs, so that identical containers do not share submethod IDs.
+
+        Args:
+            layout (LHBedLayout): layout to use for generating method list
+
+        Returns:
+            List[BaseMethod]: list of base methods
+        """
+
+        key = (type(self).__name__, self._cache_fields(), layout.version)
+        with _methods_cache_lock:
+            methods = _methods_cache.get(key, None)
+            if methods is not None:
+                _methods_cache.move_to_end(key)
+                return [_renew_ids(m.model_copy(deep=True)) for m in methods]
+
+        methods = self.get_methods(layout)
+        with _methods_cache_lock:
+            _methods_cache[key] = [m.model_copy(deep=True) for m in methods]
+            while len(_methods_cache) > METHODS_CACHE_SIZE:
+                _methods_cache.popitem(last=False)
+
+        return methods
+
+    def _cache_fields(self) -> str:
+        """Serialized method fields identifying the expansion (see get_cached_methods)"""
+
+        def strip(value: Any) -> Any:
+            if isinstance(value, dict):
+                # nested methods carry their own (random) IDs and status
+                exclude = EXCLUDE_FIELDS if 'method_name' in value else set()
+                return {k: strip(v) for k, v in value.items() if k not in exclude}
+            if isinstance(value, list):
+                return [strip(v) for v in value]
+            return value
+
+        return json.dumps(strip(self.model_dump(mode='json', exclude=EXCLUDE_FIELDS)), sort_keys=True)
+
+    def explode(self, layout: LHBedLayout) -> List[BaseMethod]:
+        """Independent copies of the submethods, which can be modified (e.g. by MethodList.explode)"""
+
+        return self.get_cached_methods(layout)
+
     def execute(self, layout: LHBedLayout) -> MethodError | None:
         """Returns the error if any of the submethods give errors"""
-        for m in self.get_methods(layout):
+        for m in self.get_cached_methods(layout):
             error = m.execute(layout)
             if error is not None:
                 return MethodError(f'{self.display_name}.{error.name}', error.error)
 
     def estimated_time(self, layout: LHBedLayout) -> float:
-        return sum(m.estimated_time(layout) for m in self.get_methods(layout))
+        return sum(m.estimated_time(layout) for m in self.get_cached_methods(layout))
     
     def render_method(self,
                          sample_name: str,
@@ -120,7 +200,7 @@ class MethodContainer(BaseMethod):
                          layout: LHBedLayout) -> List[dict]:
         
         rendered_methods = []
-        for m in self.get_methods(layout):
+        for m in self.get_cached_methods(layout):
             rendered_methods += m.render_method(sample_name=sample_name,
                                                    sample_description=sample_description,
                                                    layout=layout)
@@ -159,6 +239,11 @@ class MethodManager:
     def __init__(self) -> None:
 
         self.methods: dict[str, RegisteredMethod] = {}
+        # validator for lists of registered methods, rebuilt on first use after a registration
+        self._adapter: TypeAdapter | None = None
+        # schema of all methods, and its JSON serialization and ETag; rebuilt on first use after a registration
+        self._schema: Dict[str, Dict] | None = None
+        self._schema_json: Tuple[str, str] | None = None
 
     def register(self, method: MethodsType, display: bool = True, origin: str | None = None) -> None:
         """Registers a method in the manager
@@ -169,16 +254,96 @@ class MethodManager:
         """
         rmethod = RegisteredMethod(method, display=display, origin=origin)
         self.methods[rmethod.name] = rmethod
+        self._adapter = None
+        self._schema = None
+        self._schema_json = None
+
+    def get_adapter(self) -> TypeAdapter:
+        """Gets a TypeAdapter that validates a list of method dicts in a single pass, using
+            a union of all registered methods discriminated by method_name
+
+        Returns:
+            TypeAdapter: list validator
+        """
+
+        adapter = self._adapter
+        if adapter is None:
+            methods = tuple(rm.method for rm in self.methods.values())
+            if len(methods) > 1:
+                method_type = Annotated[Union[methods], Field(discriminator='method_name')]
+            else:
+                method_type = methods[0] if len(methods) else BaseMethod
+            adapter = self._adapter = TypeAdapter(List[method_type])
+
+        return adapter
+
+    def validate_methods(self, methods: list) -> list:
+        """Converts method dicts in a list to method objects. Dicts that cannot be validated
+            as a registered method are converted to UnknownMethod.
+
+        Args:
+            methods (list): list of method dicts or method objects
+
+        Returns:
+            list: list of method objects
+        """
+
+        if not isinstance(methods, list):
+            raise ValueError(f"{methods} must be a list")
+
+        # fast path: validate all dicts together
+        if all(isinstance(m, dict) for m in methods):
+            try:
+                adapter = self.get_adapter()
+            except Exception:
+                # e.g. registered methods that cannot be combined in a discriminated union
+                logging.exception('Could not build method list validator')
+            else:
+                try:
+                    return adapter.validate_python(methods)
+                except ValidationError:
+                    pass
+
+        for i, iv in enumerate(methods):
+            if isinstance(iv, dict):
+                try:
+                    methods[i] = self.get_method_by_name(iv['method_name']).model_validate(iv)
+                except ValidationError:
+                    logging.warning(f'Attempted to process unknown method with data {iv}')
+                    methods[i] = UnknownMethod(method_data=iv)
+            else:
+                if not (isinstance(iv, BaseMethod)):
+                    raise ValueError(f"{iv} must be derived from BaseMethod")
+
+        return methods
 
     def get_all_schema(self) -> Dict[str, Dict]:
-        """Gets the schema of all the methods in the manager
+        """Gets the schema of all the methods in the manager. Calculated once until another
+            method is registered; the result must not be modified.
 
         Returns:
             Dict[str, Dict]: Dictionary of method names and schema. Schema has fields 'fields', 
                                 'display_name', and 'schema'; the last is the pydantic schema
         """
 
-        return {k: rm.get_schema() for k, rm in self.methods.items()}
+        if self._schema is None:
+            self._schema = {k: rm.get_schema() for k, rm in self.methods.items()}
+
+        return self._schema
+
+    def get_all_schema_json(self) -> Tuple[str, str]:
+        """Gets the schema of all the methods (see get_all_schema) serialized to JSON, with an
+            ETag derived from its content
+
+        Returns:
+            Tuple[str, str]: JSON text and ETag
+        """
+
+        if self._schema_json is None:
+            text = json.dumps(self.get_all_schema())
+            self._schema_json = text, hashlib.sha256(text.encode()).hexdigest()
+
+        return self._schema_json
     
     def get_method_by_name(self, method_name: str) -> MethodsType:
         """Gets method object by name
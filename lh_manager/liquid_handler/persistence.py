@@ -0,0 +1,173 @@
+"""Background writer for persistent state"""
+import atexit
+import logging
+import os
+import threading
+import time
+
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+# minimum interval between writes of the persistent state (s)
+FLUSH_INTERVAL = 0.5
+# interval between attempts to save state that could not be saved (s)
+RETRY_INTERVAL = 5.0
+
+def atomic_write(path: Path, text: str) -> None:
+    """Writes a file atomically: the text is written to a temporary file, which is synced
+        and then renamed over the target
+
+    Args:
+        path (Path): file to write
+        text (str): file contents
+    """
+
+    path = Path(path)
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'w') as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+class PersistenceWriter:
+    """Writes persistent state (samples, layout, devices, waste) in a background thread.
+
+        Each kind of state is registered with a function that takes an immutable snapshot of
+        it (e.g. its JSON serialization) and a function that saves a snapshot. Request handlers
+        mark state as dirty, which takes the snapshot in the calling thread, so that the writer
+        thread never reads state that is being modified. The writer thread saves the latest
+        snapshot of all dirty state at most every FLUSH_INTERVAL seconds, so that a burst of
+        changes results in a single write. Snapshots that could not be saved are retried after
+        RETRY_INTERVAL seconds, unless a newer snapshot has been taken in the meantime. Dirty
+        state is also saved on shutdown.
+    """
+
+    def __init__(self, flush_interval: float = FLUSH_INTERVAL, retry_interval: float = RETRY_INTERVAL) -> None:
+
+        self.flush_interval = flush_interval
+        self.retry_interval = retry_interval
+        self._snapshots: Dict[str, Callable[[], Any]] = {}
+        self._savers: Dict[str, Callable[[Any], None]] = {}
+        self._closers: List[Callable[[], None]] = []
+        # latest snapshot of each dirty state
+        self._dirty: Dict[str, Any] = {}
+        self._condition = threading.Condition()
+        self._thread: threading.Thread | None = None
+        self._stopped: bool = False
+        # serializes calls to the save functions (writer thread and flush)
+        self._save_lock = threading.Lock()
+
+    def register(self, name: str, snapshot: Callable[[], Any], save: Callable[[Any], None],
+                 close: Callable[[], None] | None = None) -> None:
+        """Registers a kind of persistent state
+
+        Args:
+            name (str): name of the state
+            snapshot (Callable[[], Any]): function that returns an immutable snapshot of the
+                state. Called by mark_dirty in the thread that modified the state
+            save (Callable[[Any], None]): function that saves a snapshot. Called in the writer thread
+            close (Callable[[], None] | None, optional): function called on shutdown, after
+                the state has been saved. Defaults to None.
+        """
+
+        self._snapshots[name] = snapshot
+        self._savers[name] = save
+        if close is not None:
+            self._closers.append(close)
+
+    def mark_dirty(self, name: str) -> None:
+        """Takes a snapshot of a registered state and schedules it for saving
+
+        Args:
+            name (str): name of the state
+        """
+
+        if name not in self._savers:
+            raise KeyError(f'Unknown persistent state {name}')
+
+        with self._condition:
+            # snapshots are taken under the lock, so that a later snapshot is never replaced
+            # by an earlier one
+            try:
+                self._dirty[name] = self._snapshots[name]()
+            except Exception:
+                logging.exception(f'Could not take snapshot of {name}')
+                return
+            stopped = self._stopped
+            if not stopped:
+                if (self._thread is None) or (not self._thread.is_alive()):
+                    self._thread = threading.Thread(target=self._run, name='persistence-writer', daemon=True)
+                    self._thread.start()
+                else:
+                    self._condition.notify()
+
+        if stopped:
+            # no writer thread after shutdown; save immediately
+            self.flush()
+
+    def _run(self) -> None:
+        """Writer thread: waits for dirty state, then saves it no more often than flush_interval,
+            or retry_interval after a failed save"""
+
+        last_flush = 0.0
+        interval = self.flush_interval
+        while True:
+            with self._condition:
+                while not self._dirty and not self._stopped:
+                    self._condition.wait()
+                if self._stopped:
+                    return
+
+            # coalesce changes arriving within the interval
+            delay = last_flush + interval - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+
+            interval = self.flush_interval if self.flush() else self.retry_interval
+            last_flush = time.monotonic()
+
+    def flush(self) -> bool:
+        """Saves all dirty state. State that could not be saved remains dirty
+
+        Returns:
+            bool: True if all dirty state was saved
+        """
+
+        success = True
+        with self._save_lock:
+            with self._condition:
+                dirty, self._dirty = self._dirty, {}
+
+            for name, data in dirty.items():
+                try:
+                    self._savers[name](data)
+                except Exception:
+                    logging.exception(f'Could not save {name}')
+                    success = False
+                    with self._condition:
+                        # keep a newer snapshot taken in the meantime
+                        self._dirty.setdefault(name, data)
+
+        return success
+
+    def close(self) -> None:
+        """Stops the writer thread and saves all dirty state"""
+
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+
+        thread = self._thread
+        if (thread is not None) and (thread is not threading.current_thread()):
+            thread.join()
+
+        self.flush()
+        for close in self._closers:
+            try:
+                close()
+            except Exception:
+                logging.exception('Could not close persistent state')
+
+persistence_writer = PersistenceWriter()
+atexit.register(persistence_writer.close)
@@ -1,6 +1,6 @@
 import logging
 
-from .bedlayout import LHBedLayout, Composition, WellLocation, Well, find_composition, InferredWellLocation
+from .bedlayout import LHBedLayout, Composition, WellLocation, Well, InferredWellLocation
 from .methods import BaseMethod, register, MethodContainer, MethodsType, MethodType
 from .formulation import Formulation, SoluteFormulation
 from .distributionmethods import BaseDistributionMethod
@@ -16,20 +16,20 @@ from pydantic import Field
 
 ORIGIN = 'ROADMAP'
 
-def find_well_and_volume(composition: Composition, volume: float, wells: List[Well]) -> Tuple[Well | None, str | None]:
+def find_well_and_volume(composition: Composition, volume: float, layout: LHBedLayout) -> Tuple[Well | None, str | None]:
     """Finds the well with the target composition and the most available volume
 
     Args:
         composition (Composition): target composition
         volume (float): volume required
-        wells (List[Well]): list of wells to search
+        layout (LHBedLayout): layout to search
 
     Returns:
         Tuple[Well | None, str | None]: selected well and error
     """
 
     # find all wells containing target composition
-    well_candidates = find_composition(composition, wells)
+    well_candidates = layout.find_composition(composition)
     if not len(well_candidates):
         return None, f'no target wells with composition {composition} found'
     
@@ -121,7 +121,7 @@ class ROADMAP_QCMD_MakeBilayer(MethodContainer):
         else:
 
             required_volume = minimum_volume + extra_volume + rinse_volume
-            lipid_prep_well, error = find_well_and_volume(self.Bilayer_Solvent, required_volume, layout.get_all_wells())
+            lipid_prep_well, error = find_well_and_volume(self.Bilayer_Solvent, required_volume, layout)
             if lipid_prep_well is None:
                 logging.error('Error: insufficient or nonexistent bilayer solvent. Aborting.')
                 return []
@@ -139,7 +139,7 @@ class ROADMAP_QCMD_MakeBilayer(MethodContainer):
 
         # ==== Lipids in solvent ====
         required_volume = minimum_volume + extra_volume + self.Lipid_Injection_Volume
-        lipid_mixing_well, error = find_well_and_volume(self.Bilayer_Composition, required_volume, layout.get_all_wells())
+        lipid_mixing_well, error = find_well_and_volume(self.Bilayer_Composition, required_volume, layout)
         if lipid_mixing_well is None:
             lipid_mixing_well = InferredWellLocation(rack_id='Mix')
 
@@ -196,7 +196,7 @@ class ROADMAP_QCMD_MakeBilayer(MethodContainer):
 
         else:        
             required_volume = minimum_volume + extra_volume + self.Buffer_Injection_Volume
-            buffer_mixing_well, error = find_well_and_volume(self.Buffer_Composition, required_volume, layout.get_all_wells())
+            buffer_mixing_well, error = find_well_and_volume(self.Buffer_Composition, required_volume, layout)
             if buffer_mixing_well is None:
                 buffer_mixing_well = InferredWellLocation(rack_id='Mix')
 
@@ -409,7 +409,7 @@ class ROADMAP_DirectInjectPrime(BaseLHMethod, BaseInjectionSystemMethod):
         return self.Volume / self.Flow_Rate
     
     def execute(self, layout):
-        layout.carrier_well.volume -= self.Volume
+        layout.remove_from_well('Carrier', 1, self.Volume)
         return super().execute(layout)
 
     def waste(self, layout: LHBedLayout) -> WasteItem:
@@ -527,7 +527,7 @@ class ROADMAP_QCMD_LoopInjectandMeasure(MethodContainer):
         required_volume = self.Volume + minimum_volume + extra_volume
 
         # select well with sufficient volume
-        target_well, error = find_well_and_volume(self.Target_Composition, required_volume, layout.get_all_wells())
+        target_well, error = find_well_and_volume(self.Target_Composition, required_volume, layout)
         if error is not None:
             logging.warning(f'Warning in {self.method_name}' + error + ', aborting')
             return []
@@ -596,7 +596,7 @@ class ROADMAP_QCMD_DirectInjectandMeasure(MethodContainer):
         required_volume = self.Volume + minimum_volume + extra_volume
 
         # select well with sufficient volume
-        target_well, error = find_well_and_volume(self.Target_Composition, required_volume, layout.get_all_wells())
+        target_well, error = find_well_and_volume(self.Target_Composition, required_volume, layout)
         if error is not None:
             logging.warning(f'Warning in {self.method_name}: ' + error + ', aborting')
             return []
@@ -1,15 +1,37 @@
 import logging
+import threading
 
 from typing import List, Tuple, Dict
-from dataclasses import field
-from pydantic import BaseModel
+from dataclasses import dataclass, field
+from pydantic import BaseModel, PrivateAttr
 from .history import History
 from .samplelist import Sample, SampleStatus
 from .bedlayout import LHBedLayout
 from .dryrun import DryRunQueue
+from .formulation import find_formulations, hold_joint_results, release_joint_results, solve_joint_formulations
 from .items import Item
 from .status import MethodError
 
+# guards the change tracking state of sample containers (see SampleContainer.update_versions)
+_versions_lock = threading.Lock()
+
+@dataclass(frozen=True)
+class SampleState:
+    """Serialized state of a SampleContainer at a container version (see SampleContainer.get_state)
+
+        version (int): container version
+        order (Tuple[str, ...]): sample IDs in sample order
+        samples_json (Tuple[str, ...]): serialized samples in sample order
+        sample_versions (Dict[str, int]): container version at which each sample last changed
+        container (str): serialized container without the samples
+    """
+
+    version: int
+    order: Tuple[str, ...]
+    samples_json: Tuple[str, ...]
+    sample_versions: Dict[str, int]
+    container: str
+
 class SampleContainer(BaseModel):
     """Specialized sample dictionary allowing convenient referencing by sample ID or sample name"""
 
@@ -18,6 +40,28 @@ class SampleContainer(BaseModel):
     dryrun_queue: DryRunQueue = field(default_factory=DryRunQueue)
     max_LH_id: int = 1
 
+    # positions of samples by ID and by name {id: index}, {name: index} (first occurrence wins).
+    # Samples whose ID or name is changed in place are only reindexed when looked up by the old value
+    _id_index: Dict[str, int] = PrivateAttr(default_factory=dict)
+    _name_index: Dict[str, int] = PrivateAttr(default_factory=dict)
+    # (samples, len(samples)) at the time the indices were built; None if they must be rebuilt
+    _index_signature: Tuple[list, int] | None = PrivateAttr(default=None)
+
+    # change tracking (see update_versions): container version, version at which each sample
+    # last changed, serialized samples and sample objects by ID, sample order, serialized samples
+    # in sample order and serialized container without the samples at the last update
+    _version: int = PrivateAttr(default=0)
+    _sample_versions: Dict[str, int] = PrivateAttr(default_factory=dict)
+    _serialized: Dict[str, str] = PrivateAttr(default_factory=dict)
+    _serialized_samples: Dict[str, Sample] = PrivateAttr(default_factory=dict)
+    _order: Tuple[str, ...] = PrivateAttr(default=())
+    _samples_json: Tuple[str, ...] = PrivateAttr(default=())
+    _container: str = PrivateAttr(default='')
+    # IDs of samples changed since the last update (see mark_changed)
+    _changed_ids: set = PrivateAttr(default_factory=set)
+    # (samples, len(samples)) at the last update; None if all samples must be serialized again
+    _versions_signature: Tuple[list, int] | None = PrivateAttr(default=None)
+
     def _getIDs(self) -> list[str]:
 
         return [s.id for s in self.samples]
@@ -26,14 +70,168 @@ class SampleContainer(BaseModel):
 
         return [s.name for s in self.samples]
 
+    def _reindex(self) -> None:
+        """Rebuilds the ID and name indices"""
+
+        n = len(self.samples)
+        # iterate backwards so that the first occurrence wins, consistent with a linear search
+        self._id_index = {s.id: n - 1 - i for i, s in enumerate(reversed(self.samples))}
+        self._name_index = {s.name: n - 1 - i for i, s in enumerate(reversed(self.samples))}
+        self._index_signature = (self.samples, n)
+
+    def _check_index(self) -> None:
+        """Rebuilds the indices if the sample list has been replaced or resized outside of
+            the SampleContainer methods (e.g. after deserialization)"""
+
+        signature = self._index_signature
+        if (signature is None) or (signature[0] is not self.samples) or (signature[1] != len(self.samples)):
+            self._reindex()
+
+    def _lookup(self, index_name: str, attribute: str, value: str) -> int | None:
+        """Finds the position of the first sample with attribute == value. Hits are verified, so
+            that samples replaced or modified in place cause a rebuild of the indices"""
+
+        self._check_index()
+        position = getattr(self, index_name).get(value, None)
+        if (position is not None) and (getattr(self.samples[position], attribute) != value):
+            self._reindex()
+            position = getattr(self, index_name).get(value, None)
+
+        return position
+
+    def mark_changed(self, sample_id: str) -> None:
+        """Announces that a sample has been modified in place (e.g. a status update), so
+            that it is serialized again at the next update (see update_versions). Call after
+            the modification is complete
+
+        Args:
+            sample_id (str): ID of the modified sample
+        """
+
+        with _versions_lock:
+            self._changed_ids.add(sample_id)
+
+    def update_versions(self) -> int:
+        """Compares the samples that changed since the last call with their previous state and
+            increments the container version if any sample was added, modified or deleted, or
+            the sample order or the other container fields changed.
+
+            Only samples announced with mark_changed, or added, inserted or replaced through the
+            SampleContainer methods (or otherwise replaced by a new Sample object), are
+            serialized; samples modified in place must therefore be announced with mark_changed.
+            All samples are serialized if the sample list itself has been replaced (e.g. after
+            deserialization). Should be called once after the samples are modified (e.g. by
+            the GUI update triggers), not on every read.
+
+            The accessors (version, get_changed_since, get_state) call update_versions only if
+            samples were announced, added, inserted, replaced or deleted since the last call.
+
+        Returns:
+            int: container version
+        """
+
+        with _versions_lock:
+            return self._update_versions()
+
+    def _update_versions(self) -> int:
+        """update_versions; must be called with _versions_lock held"""
+
+        order = tuple(s.id for s in self.samples)
+        signature = self._versions_signature
+        full = (signature is None) or (signature[0] is not self.samples) or (len(set(order)) != len(order))
+        changed_ids, self._changed_ids = self._changed_ids, set()
+        if full:
+            samples_json = tuple(s.model_dump_json() for s in self.samples)
+            serialized = dict(zip(order, samples_json))
+            changed = [sample_id for sample_id, sample_json in serialized.items()
+                       if self._serialized.get(sample_id, None) != sample_json]
+        else:
+            serialized = {}
+            changed = []
+            for sample in self.samples:
+                if (sample.id in changed_ids) or (self._serialized_samples.get(sample.id, None) is not sample):
+                    sample_json = sample.model_dump_json()
+                    if self._serialized.get(sample.id, None) != sample_json:
+                        changed.append(sample.id)
+                else:
+                    sample_json = self._serialized[sample.id]
+                serialized[sample.id] = sample_json
+            samples_json = tuple(serialized[sample_id] for sample_id in order)
+        container = self.model_dump_json(exclude={'samples'})
+        if len(changed) or (order != self._order) or (container != self._container):
+            self._version += 1
+            for sample_id in changed:
+                self._sample_versions[sample_id] = self._version
+            for sample_id in [sample_id for sample_id in self._sample_versions.keys() if sample_id not in serialized]:
+                self._sample_versions.pop(sample_id)
+        self._serialized, self._order, self._samples_json, self._container = serialized, order, samples_json, container
+        self._serialized_samples = {s.id: s for s in self.samples}
+        self._versions_signature = (self.samples, len(self.samples))
+
+        return self._version
+
+    def _check_versions(self) -> None:
+        """Updates the versions if samples have been announced with mark_changed, or the sample
+            list has been modified through the SampleContainer methods, replaced or resized since
+            the last update. Must be called with _versions_lock held"""
+
+        signature = self._versions_signature
+        if ((signature is None) or (signature[0] is not self.samples) or (signature[1] != len(self.samples))
+            or len(self._changed_ids)):
+            self._update_versions()
+
+    @property
+    def version(self) -> int:
+        """Container version at the last update (see update_versions)"""
+
+        with _versions_lock:
+            self._check_versions()
+            return self._version
+
+    def get_changed_since(self, version: int) -> List[Sample]:
+        """Samples changed since a container version (see update_versions)
+
+        Args:
+            version (int): container version. If larger than the current version (e.g. from
+                before a restart), all samples are returned
+
+        Returns:
+            List[Sample]: samples added or modified after the container version, in sample order
+        """
+
+        with _versions_lock:
+            self._check_versions()
+            current = self._version
+            if version > current:
+                return list(self.samples)
+
+            return [s for s in self.samples if self._sample_versions.get(s.id, current) > version]
+
+    def get_state(self) -> SampleState:
+        """Serialized state of the container at the last update (see update_versions). The
+            state is immutable and can be used in other threads (e.g. for persistence)
+
+        Returns:
+            SampleState: container state
+        """
+
+        with _versions_lock:
+            self._check_versions()
+            return SampleState(version=self._version,
+                               order=self._order,
+                               samples_json=self._samples_json,
+                               sample_versions=dict(self._sample_versions),
+                               container=self._container)
+
     def getSampleById(self, id: str) -> Tuple[int, Sample] | Tuple[None, None]:
-        return next(((i,s) for i,s in enumerate(self.samples) if s.id == id), (None, None))
+        position = self._lookup('_id_index', 'id', id)
+        return (position, self.samples[position]) if position is not None else (None, None)
 
     def getSamplebyName(self, name: str, status: SampleStatus | None = None) -> Sample | None:
         """Return sample with specific name"""
-        names = self._getNames()
-        if name in names:
-            sample = self.samples[names.index(name)]
+        position = self._lookup('_name_index', 'name', name)
+        if position is not None:
+            sample = self.samples[position]
             return sample if (sample.get_status() == status) | (status is None) else None
         else:
             return None
@@ -41,15 +239,50 @@ class SampleContainer(BaseModel):
 
     def addSample(self, sample: Sample) -> None:
         """Sample appender that checks for proper ID value"""
-        if sample.id in self._getIDs():
+        if self._lookup('_id_index', 'id', sample.id) is not None:
             logging.warning(f'Warning: id {sample.id} already taken. Sample not added.')
         else:
             self.samples.append(sample)
+            position = len(self.samples) - 1
+            self._id_index[sample.id] = position
+            self._name_index.setdefault(sample.name, position)
+            self._index_signature = (self.samples, len(self.samples))
+            self.mark_changed(sample.id)
+
+    def insertSample(self, index: int, sample: Sample) -> None:
+        """Inserts a sample at a position in the sample list (e.g. after the sample it was
+            duplicated from)
+
+        Args:
+            index (int): position
+            sample (Sample): sample to insert
+        """
+
+        self.samples.insert(index, sample)
+        self._index_signature = None
+        self.mark_changed(sample.id)
+
+    def replaceSample(self, index: int, sample: Sample) -> None:
+        """Replaces the sample at a position in the sample list
+
+        Args:
+            index (int): position
+            sample (Sample): new sample
+        """
+
+        self.samples[index] = sample
+        self._index_signature = None
+        self.mark_changed(sample.id)
     
     def deleteSample(self, sample: Sample) -> None:
         """Special remover that also updates index object"""
-        
-        self.samples.pop(self.samples.index(sample))
+
+        position = self._lookup('_id_index', 'id', sample.id)
+        if (position is None) or (self.samples[position] is not sample):
+            position = self.samples.index(sample)
+        self.samples.pop(position)
+        self._index_signature = None
+        self.mark_changed(sample.id)
 
     def archiveSample(self, sample: Sample) -> None:
         """Moves sample to history archive
@@ -73,11 +306,28 @@ class SampleContainer(BaseModel):
         """
         errors: List[Tuple[Item, List[MethodError]]] = []
         self.validate_queue(self.dryrun_queue)
-        for item in self.dryrun_queue.stages:
-            _, sample = self.getSampleById(item.id)
-            new_errors = sample.stages[item.stage].execute(layout)
-            if not all (v is None for v in new_errors):
-                errors.append((item, new_errors))
+
+        # assign source wells of all formulations in the queue, including those nested in
+        # method containers, together, so that they do not jointly exhaust a source well. The
+        # results are held for this dry run's layout only. If that fails, formulations are
+        # solved one at a time.
+        formulations = find_formulations([m for item in self.dryrun_queue.stages
+                                          for m in self.getSampleById(item.id)[1].stages[item.stage].methods],
+                                         layout)
+        joint_result = solve_joint_formulations(layout, formulations)
+        if joint_result['success']:
+            hold_joint_results(layout, formulations, joint_result['results'])
+        else:
+            logging.info(f'Formulations solved individually: {joint_result["error"]}')
+
+        try:
+            for item in self.dryrun_queue.stages:
+                _, sample = self.getSampleById(item.id)
+                new_errors = sample.stages[item.stage].execute(layout)
+                if not all (v is None for v in new_errors):
+                    errors.append((item, new_errors))
+        finally:
+            release_joint_results(layout)
 
         return errors
     
@@ -1,6 +1,6 @@
 import logging
 
-from pydantic import BaseModel, validator, Field, ValidationError
+from pydantic import BaseModel, validator, Field
 from enum import Enum
 from uuid import uuid4
 from typing import Dict, List, Union, Any
@@ -10,7 +10,7 @@ from .lhmethods import Sleep
 from .bedlayout import LHBedLayout
 from .lhinterface import DATE_FORMAT
 from .status import MethodError, SampleStatus
-from .methods import MethodsType, BaseMethod, method_manager, UnknownMethod
+from .methods import MethodsType, method_manager
 from datetime import datetime
 
 class MethodList(BaseModel):
@@ -24,21 +24,7 @@ class MethodList(BaseModel):
     @validator('methods', 'active')
     def validate_methods(cls, v):
 
-        if not isinstance(v, list):
-            raise ValueError(f"{v} must be a list")
-
-        for i, iv in enumerate(v):
-            if isinstance(iv, dict):
-                try:
-                    v[i] = method_manager.get_method_by_name(iv['method_name']).model_validate(iv)
-                except ValidationError:
-                    logging.warning(f'Attempted to process unknown method with data {iv}')
-                    v[i] = UnknownMethod(method_data=iv)
-            else:
-                if not (isinstance(iv, BaseMethod)):
-                    raise ValueError(f"{iv} must be derived from BaseMethod")
-
-        return v
+        return method_manager.validate_methods(v)
 
     @property
     def run_jobs(self) -> List[str]:
@@ -183,6 +169,19 @@ class Sample(BaseModel):
             logging.warning('Warning: undefined sample status. This should never happen!')
             return None
 
+    def get_status_summary(self) -> dict:
+        """Status of the sample and its stages, as reported by the GUI API
+
+        Returns:
+            dict: {'status': <sample status>, 'stages': {<stage name>: {'status': <stage status>,
+                'methods_complete': <method completion>}}}
+        """
+
+        return {'status': self.get_status(),
+                'stages': {stage_name: {'status': stage.status,
+                                        'methods_complete': stage.get_method_completion()}
+                           for stage_name, stage in self.stages.items()}}
+
 #example_method = TransferWithRinse('Test sample', 'Description of a test sample', Zone.SOLVENT, '1', '1000', '2', Zone.MIX, '1')
 Sample.model_rebuild()  # type: ignore
 example_sample_list: List[Sample] = []
@@ -3,17 +3,22 @@ import json
 import logging
 import os
 from pathlib import Path
-from .samplecontainer import SampleContainer
+from .samplecontainer import SampleContainer, SampleState
 from .samplelist import example_sample_list
 from . import lhmethods, formulation, qcmd, dilution, injectionmethods, qcmdmethods, roadmapmethods
 from .layoutmap import racks
 from .bedlayout import LHBedLayout, example_wells
 from .items import Item
+from .journal import SampleJournal
+from .persistence import atomic_write, persistence_writer
 from .devices import device_manager
 from .notify import notifier
 from ..app_config import parser, config
 
 LOG_PATH, LAYOUT_LOG, SAMPLES_LOG, DEVICES_LOG = config.persistent_path, config.layout_path, config.samples_path, config.devices_path
+SAMPLES_JOURNAL = Path(SAMPLES_LOG).with_suffix('.journal')
+
+samples_journal = SampleJournal(SAMPLES_LOG, SAMPLES_JOURNAL)
 
 def load_state():
 
@@ -24,8 +29,10 @@ def load_state():
             layout = LHBedLayout(**json.load(open(LAYOUT_LOG, 'r')))
 
     if not parser.parse_args().noload_samples:
-        if os.path.exists(SAMPLES_LOG):
-            samples = SampleContainer(**json.load(open(SAMPLES_LOG, 'r')))
+        # snapshot with the changes in the journal applied
+        sample_data = samples_journal.load()
+        if sample_data is not None:
+            samples = SampleContainer(**sample_data)
 
     if os.path.exists(DEVICES_LOG):
         device_data = json.load(open(DEVICES_LOG, 'r'))
@@ -39,20 +46,22 @@ def make_persistent_dir():
     if not os.path.exists(LOG_PATH):
         os.mkdir(LOG_PATH)
     
-def save_layout():
+def save_layout(layout_json: str):
     make_persistent_dir()
-    with open(LAYOUT_LOG, 'w') as f:
-        f.write(layout.model_dump_json(indent=2))
+    atomic_write(LAYOUT_LOG, layout_json)
 
-def save_samples():
+def save_samples(state: SampleState):
     make_persistent_dir()
-    with open(SAMPLES_LOG, 'w') as f:
-        f.write(samples.model_dump_json(indent=2))
+    samples_journal.record(state)
 
-def save_devices():
+def save_devices(devices_json: str):
     make_persistent_dir()
-    with open(DEVICES_LOG, 'w') as f:
-        f.write(json.dumps(device_manager.get_all_schema(), indent=2))
+    atomic_write(DEVICES_LOG, devices_json)
+
+# snapshots are taken by persistence_writer.mark_dirty and saved in the background
+persistence_writer.register('layout', lambda: layout.model_dump_json(indent=2), save_layout)
+persistence_writer.register('samples', lambda: samples.get_state(), save_samples, close=samples_journal.close)
+persistence_writer.register('devices', lambda: json.dumps(device_manager.get_all_schema(), indent=2), save_devices)
 
 logging.info('loading state!')
 layout, samples = load_state()
@@ -71,6 +80,7 @@ if samples is None:
         samples.addSample(example_sample)
 
 samples.n_channels = parser.parse_args().channels
+samples_journal.attach(samples.get_state())
 
     ## ======= Initialize bed layout =========
 if layout is None:
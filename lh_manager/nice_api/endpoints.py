@@ -5,6 +5,7 @@ from ..liquid_handler.lhqueue import validate_format, submit_handler
 from ..liquid_handler.samplelist import SampleStatus
 from ..liquid_handler.state import samples, layout
 from ..liquid_handler.history import History
+from ..liquid_handler.estimates import estimate_service
 from ..gui_api.events import trigger_sample_status_update, trigger_run_queue_update
 
 from . import nice_blueprint
@@ -34,6 +35,7 @@ def _run_sample(data: dict) -> str | None:
             sample.stages[stage].status = SampleStatus.PENDING
             # TODO: figure out the NICE queue here
 
+        samples.mark_changed(sample.id)
         return
 
     return 'sample not found'
@@ -148,7 +150,7 @@ def DryRunSamplewithUUID() -> Response:
                 methodlist = sample.stages[stage]
                 if methodlist.status in (SampleStatus.PENDING, SampleStatus.INACTIVE):
                     # NOTE: Formulation methods will return zero for this, leading to inaccurate estimates
-                    totaltime = methodlist.estimated_time(layout)
+                    totaltime = estimate_service.get_stage_estimate(methodlist, layout)
 
             return make_response({'result': 'success', 'time estimate': totaltime}, 200)
         else:
@@ -198,9 +200,10 @@ def Inactivate() -> Response:
     
         Ignores request data."""
 
-    active_stage_list = [sample.stages[stage_name] for sample in samples.samples for stage_name in sample.stages if sample.stages[stage_name].status in (SampleStatus.ACTIVE, SampleStatus.PENDING)]
-    for stage in active_stage_list:
+    active_stage_list = [(sample, sample.stages[stage_name]) for sample in samples.samples for stage_name in sample.stages if sample.stages[stage_name].status in (SampleStatus.ACTIVE, SampleStatus.PENDING)]
+    for sample, stage in active_stage_list:
         stage.status = SampleStatus.INACTIVE
+        samples.mark_changed(sample.id)
 
     return make_response({'result': 'success', 'number_operations_inactivated': len(active_stage_list), 'message': f'{len(active_stage_list)} pending LH operations canceled'}, 200)
 
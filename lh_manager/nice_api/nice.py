@@ -12,6 +12,7 @@ from ..gui_api.events import trigger_sample_status_update, trigger_layout_update
 from ..liquid_handler.lhqueue import submit_handler, ActiveTasks
 from ..liquid_handler.lhmethods import lhdevice
 from ..liquid_handler.methods import MethodsType
+from ..liquid_handler.dilution import DilutionContainer
 from ..liquid_handler.state import samples, layout
 from ..liquid_handler.items import Item
 from ..liquid_handler.samplecontainer import SampleStatus
@@ -48,6 +49,9 @@ def submission_callback(data: dict):
             # prepare methods
             all_methods: List[MethodsType] = []
             for m in sample.stages[stage].methods:
+                if isinstance(m, DilutionContainer):
+                    # get_methods does not reserve the target wells of dilution series
+                    m.reserve_target_wells(layout)
                 all_methods += m.get_methods(layout)
 
             # render all the methods
@@ -70,7 +74,8 @@ def submission_callback(data: dict):
 
                 # submit to LHqueue (marks status as pending)
                 LHqueue.submit(job)
-        
+
+        samples.mark_changed(sample.id)
         return
     
     return 'sample not found'
@@ -93,6 +98,8 @@ def mark_complete(job: LHJob):
         for method in sample.stages[parent_item.stage].methods:
             method.execute(layout)
 
+    samples.mark_changed(sample.id)
+
 class JobQueue(BaseModel):
     """Hub for interfacing (upstream) samples object to (downstream) running of jobs.
         Use submit_callbacks to link submission to downstream activities. Also provides
@@ -135,6 +142,7 @@ class JobQueue(BaseModel):
 
                     _, sample = samples.getSampleById(job.parent.id)
                     sample.stages[job.parent.stage].status = SampleStatus.PENDING
+                    samples.mark_changed(sample.id)
                     active_tasks.active.update({str(job.id): active_tasks.pending.pop(str(job.id))})
 
                     # route the job appropriately, e.g. self.submit_callbacks.append(lh_interface.activate_job)
@@ -187,6 +195,7 @@ class JobQueue(BaseModel):
                     self.active_job = self.jobs.pop(0)
                     _, sample = samples.getSampleById(self.active_job.parent.id)
                     sample.stages[self.active_job.parent.stage].status = SampleStatus.ACTIVE
+                    samples.mark_changed(sample.id)
                     lh_interface.activate_job(self.active_job)
 
     def clear_active_job(self) -> None:
@@ -205,6 +214,7 @@ class JobQueue(BaseModel):
                 job = self.jobs.pop(0)
                 _, sample = samples.getSampleById(job.parent.id)
                 sample.stages[job.parent.stage].status = SampleStatus.INACTIVE
+                samples.mark_changed(sample.id)
 
 
     def pause(self) -> None:
@@ -115,8 +115,7 @@ def GetWasteReport() -> Response:
         timestamp_table = waste_history.get_timestamp_table()
 
     total_waste = WasteItem()
-    for item in wasteitems:
-        total_waste.mix_with(item.volume, item.composition)
+    total_waste.mix_many([(item.volume, item.composition) for item in wasteitems])
 
     # nicely formatted report. Converts solutes into g/mL
     first_time, last_time = next((b[1], b[2]) for b in timestamp_table if b[0] == data['bottle_id'])
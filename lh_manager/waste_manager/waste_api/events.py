@@ -1,14 +1,15 @@
 #import socketio as sio
 
-from ...sio import socketio
-from .waste import waste_layout
+from ...eventbus import event_bus
+from . import waste     # registers the waste layout with persistence_writer
+from ...liquid_handler.persistence import persistence_writer
 
 def trigger_waste_update(f):
     """Decorator that announces that layout has changed"""
     def wrap(*args, **kwargs):
         ret_val = f(*args, **kwargs)
-        socketio.emit('update_waste', {'msg': 'update_waste'}, include_self=True)
-        waste_layout.save_waste()
+        event_bus.publish('update_waste')
+        persistence_writer.mark_dirty('waste')
         return ret_val
     wrap.__name__ = f.__name__
     return wrap
\ No newline at end of file
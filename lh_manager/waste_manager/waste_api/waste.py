@@ -9,6 +9,7 @@ from uuid import uuid4
 
 from ...liquid_handler.devices import device_manager, DeviceBase
 from ...liquid_handler.bedlayout import LHBedLayout, Rack, Well, Composition
+from ...liquid_handler.persistence import atomic_write, persistence_writer
 from ...app_config import config
 from ..wastedata import WasteItem
 
@@ -36,8 +37,7 @@ class WasteLayout(LHBedLayout):
     _database_path: str = WASTE_HISTORY
 
     def save_waste(self):
-        with open(WASTE_LOG, 'w') as f:
-            f.write(self.model_dump_json(indent=2))
+        atomic_write(WASTE_LOG, self.model_dump_json(indent=2))
 
     def empty_waste(self):
         new_carboy = Well(rack_id=WASTE_RACK,
@@ -47,15 +47,13 @@ class WasteLayout(LHBedLayout):
                     id=str(uuid4()))
         
         self.update_well(new_carboy)
-        self.save_waste()
 
     @property
     def carboy(self):
         return self.racks[WASTE_RACK].wells[0]
 
     def add_waste(self, new_waste: WasteItem):
-        self.carboy.mix_with(new_waste.volume, new_waste.composition)
-        self.save_waste()
+        self.add_to_well(WASTE_RACK, self.carboy.well_number, new_waste.volume, new_waste.composition)
         self.update_history(new_waste=new_waste)
 
     def update_history(self, new_waste: WasteItem):
@@ -87,11 +85,14 @@ def load_waste():
 
         layout = WasteLayout(racks={WASTE_RACK: waste_rack})
         layout.empty_waste()
+        layout.save_waste()
 
     return layout
 
  ## ======= Initialize bed layout =========
 waste_layout = load_waste()
+persistence_writer.register('waste', lambda: waste_layout.model_dump_json(indent=2),
+                            lambda waste_json: atomic_write(WASTE_LOG, waste_json))
 
 class WasteHistory:
     table_name = 'waste_history'
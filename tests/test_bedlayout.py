@@ -0,0 +1,269 @@
+import numpy as np
+import pytest
+
+from lh_manager.liquid_handler.bedlayout import LHBedLayout, Rack, Well, Composition, Solvent, Solute, WellLocation, convert_many
+from lh_manager.liquid_handler.lhmethods import TransferMethod
+
+h2o = Composition(solvents=[Solvent(name='H2O', fraction=1.0)])
+d2o = Composition(solvents=[Solvent(name='D2O', fraction=1.0)])
+
+def make_layout() -> LHBedLayout:
+    layout = LHBedLayout(racks={'Mix': Rack(columns=2, rows=3, max_volume=10, wells=[], height=1, width=1,
+                                            x_translate=0, y_translate=0)})
+    for well_number in range(1, 7):
+        layout.add_well_to_rack('Mix', Well(rack_id='Mix', well_number=well_number, volume=1.0,
+                                            composition=h2o.model_copy(deep=True)))
+
+    return layout
+
+def test_snapshot_lookups_return_owned_well():
+    layout = make_layout()
+    snapshot = layout.snapshot()
+
+    well, _ = snapshot.get_well_and_rack('Mix', 1)
+    well.volume = 5.0
+    again, _ = snapshot.get_well_and_rack('Mix', 1)
+
+    assert again is well
+    assert again.volume == 5.0
+    assert layout.get_well_and_rack('Mix', 1)[0].volume == 1.0
+
+def test_snapshot_self_transfer():
+    layout = make_layout()
+    snapshot = layout.snapshot()
+    snapshot.get_well_and_rack('Mix', 1)[0].volume = 6.0
+
+    transfer = TransferMethod(Source=WellLocation(rack_id='Mix', well_number=1),
+                              Target=WellLocation(rack_id='Mix', well_number=1),
+                              Volume=0.1)
+    assert transfer.execute(snapshot) is None
+
+    assert snapshot.get_well_and_rack('Mix', 1)[0].volume == 6.0
+    assert layout.get_well_and_rack('Mix', 1)[0].volume == 1.0
+
+def test_snapshot_copies_well_once():
+    layout = make_layout()
+    snapshot = layout.snapshot()
+
+    for _ in range(3):
+        snapshot.get_well_and_rack('Mix', 2)[0].volume += 1.0
+
+    assert snapshot.get_well_and_rack('Mix', 2)[0].volume == 4.0
+    assert sum(w is not o for w, o in zip(snapshot.racks['Mix'].wells, layout.racks['Mix'].wells)) == 1
+
+def test_snapshot_isolated_from_parent_changes():
+    layout = make_layout()
+    snapshot = layout.snapshot()
+    nested = snapshot.snapshot()
+
+    layout.add_to_well('Mix', 1, 2.0, d2o)
+    layout.remove_from_well('Mix', 2, 1.0)
+    layout.set_well_id(layout.get_well_and_rack('Mix', 3)[0], 'sample')
+    layout.add_well_to_rack('Mix', Well(rack_id='Mix', well_number=7, volume=0.0, composition=Composition()))
+
+    for snap in (snapshot, nested):
+        assert [w.volume for w in snap.get_all_wells()] == [1.0] * 6
+        assert snap.get_well_by_id('sample') is None
+        assert [w.well_number for w in snap.find_composition(h2o)] == [1, 2, 3, 4, 5, 6]
+    assert layout.get_well_and_rack('Mix', 1)[0].volume == 3.0
+
+def test_snapshot_reads_return_copies():
+    layout = make_layout()
+    layout.set_well_id(layout.get_well_and_rack('Mix', 1)[0], 'sample')
+    snapshot = layout.snapshot()
+
+    snapshot.get_well_by_id('sample').volume = 2.0
+    snapshot.find_composition(h2o)[1].volume = 3.0
+    snapshot.get_all_wells()[2].volume = 4.0
+
+    assert [w.volume for w in snapshot.get_all_wells()][:3] == [2.0, 3.0, 4.0]
+    assert [w.volume for w in layout.get_all_wells()] == [1.0] * 6
+
+def test_version_ignores_reads():
+    layout = make_layout()
+    version = layout.version
+    layout.get_well_and_rack('Mix', 1)
+    layout.find_composition(h2o)
+
+    assert layout.version == version
+
+def test_version_detects_well_changes():
+    layout = make_layout()
+    version = layout.version
+
+    well, _ = layout.get_well_and_rack('Mix', 1)
+    well.composition.solvents[0].name = 'D2O'
+
+    assert layout.version != version
+    assert [w.well_number for w in layout.find_composition(d2o)] == [1]
+
+def test_add_to_well_updates_index_and_version():
+    layout = make_layout()
+    version = layout.version
+
+    layout.add_to_well('Mix', 2, 100.0, d2o)
+    layout.remove_from_well('Mix', 3, 1.0)
+
+    assert layout.version != version
+    assert [w.well_number for w in layout.find_composition(h2o)] == [1, 3, 4, 5, 6]
+    assert layout.find_next_empty('Mix').well_number == 3
+
+def test_change_after_reconciliation_found_on_index_miss():
+    layout = make_layout()
+    well, _ = layout.get_well_and_rack('Mix', 1)
+    version = layout.version
+
+    # modified through a reference after the layout has reconciled it (e.g. by another thread)
+    well.composition = d2o
+
+    assert [w.well_number for w in layout.find_composition(d2o)] == [1]
+    assert layout.version != version
+
+def test_well_lookup_follows_well_list_changes():
+    layout = make_layout()
+    layout.get_well_and_rack('Mix', 6)
+
+    layout.update_well(Well(rack_id='Mix', well_number=2, volume=3.0, composition=d2o))
+    layout.remove_well_definition('Mix', 6)
+
+    assert layout.get_well_and_rack('Mix', 2)[0].volume == 3.0
+    with pytest.raises(ValueError):
+        layout.get_well_and_rack('Mix', 6)
+
+def test_well_lookup_rebuilt_after_well_list_replaced():
+    layout = make_layout()
+    layout.get_well_and_rack('Mix', 1)
+
+    layout.racks['Mix'].wells = [Well(rack_id='Mix', well_number=1, volume=2.0, composition=h2o.model_copy(deep=True)),
+                                 Well(rack_id='Mix', well_number=1, volume=5.0, composition=h2o.model_copy(deep=True))]
+
+    # first definition wins
+    assert layout.get_well_and_rack('Mix', 1)[0].volume == 2.0
+    with pytest.raises(ValueError):
+        layout.get_well_and_rack('Mix', 2)
+
+def test_well_id_index_follows_set_well_id():
+    layout = make_layout()
+    well, _ = layout.get_well_and_rack('Mix', 2)
+    layout.set_well_id(well, 'first')
+    assert layout.get_well_by_id('first') is well
+
+    layout.set_well_id(well, 'second')
+
+    assert layout.get_well_by_id('first') is None
+    assert layout.get_well_by_id('second') is well
+
+def test_well_id_changed_in_place_is_found():
+    layout = make_layout()
+    well, _ = layout.get_well_and_rack('Mix', 3)
+    layout.set_well_id(well, 'first')
+
+    well.id = 'second'
+
+    assert layout.get_well_by_id('first') is None
+    assert layout.get_well_by_id('second') is well
+
+def test_infer_location_uses_well_id():
+    layout = make_layout()
+    layout.remove_from_well('Mix', 4, 1.0)
+    layout.remove_from_well('Mix', 5, 1.0)
+
+    location = layout.infer_location(WellLocation(rack_id='Mix', id='target'))
+    assert location.well_number == 4
+
+    # a second location with the same ID resolves to the same well
+    again = layout.infer_location(WellLocation(rack_id='Mix', id='target'))
+    assert again.well_number == 4
+    assert layout.infer_location(WellLocation(rack_id='Mix', id='other')).well_number == 5
+
+def test_free_list_follows_fills_and_ids():
+    layout = make_layout()
+    for well_number in (2, 3, 5, 6):
+        layout.remove_from_well('Mix', well_number, 1.0)
+    assert layout.find_next_empty('Mix').well_number == 2
+
+    layout.add_to_well('Mix', 2, 1.0, h2o)
+    layout.set_well_id(layout.get_well_and_rack('Mix', 3)[0], 'reserved')
+
+    assert layout.find_next_empty('Mix').well_number == 5
+
+def test_free_list_skips_well_filled_through_reference():
+    layout = make_layout()
+    layout.remove_from_well('Mix', 2, 1.0)
+    well, _ = layout.get_well_and_rack('Mix', 2)
+    assert layout.find_next_empty('Mix').well_number == 2
+
+    well.volume = 1.0
+
+    assert layout.find_next_empty('Mix') is None
+
+def test_reserve_empty_block():
+    layout = make_layout()
+    for well_number in (2, 4, 5, 6):
+        layout.remove_from_well('Mix', well_number, 1.0)
+
+    block = layout.reserve_empty_block('Mix', ['a', 'b'])
+
+    assert [location.well_number for location in block] == [4, 5]
+    assert layout.get_well_by_id('b').well_number == 5
+    assert layout.find_empty_block('Mix', 2) is None
+    assert layout.find_next_empty('Mix').well_number == 2
+
+def test_composition_keys_are_canonical():
+    first = Composition(solvents=[Solvent(name='H2O', fraction=1.0), Solvent(name='D2O', fraction=3.0)],
+                        solutes=[Solute(name='NaCl', concentration=0.1, units='M', molecular_weight=58.44),
+                                 Solute(name='KCl', concentration=0.0, units='M')])
+    second = Composition(solvents=[Solvent(name='D2O', fraction=0.75), Solvent(name='H2O', fraction=0.25)],
+                         solutes=[Solute(name='NaCl', concentration=100.0, units='mM', molecular_weight=58.44)])
+    mass = Composition(solvents=[Solvent(name='D2O', fraction=0.75), Solvent(name='H2O', fraction=0.25)],
+                       solutes=[Solute(name='NaCl', concentration=5.844, units='mg/mL', molecular_weight=58.44)])
+
+    assert first == second
+    assert first.key == second.key
+    assert hash(first) == hash(second)
+    assert len({first, second}) == 1
+    # keys use canonical units without molecular weights, so only equality and hashes agree
+    assert first == mass
+    assert hash(first) == hash(mass)
+
+def test_composition_key_follows_in_place_change():
+    composition = Composition(solutes=[Solute(name='NaCl', concentration=0.1, units='M')])
+    other = composition.model_copy(deep=True)
+    key = composition.key
+
+    composition.solutes[0].concentration = 0.2
+
+    assert composition.key != key
+    assert composition != other
+
+def test_composition_index_follows_well_list_changes():
+    layout = make_layout()
+    assert len(layout.find_composition(h2o)) == 6
+
+    layout.update_well(Well(rack_id='Mix', well_number=2, volume=1.0, composition=d2o.model_copy(deep=True)))
+    layout.remove_well_definition('Mix', 3)
+    layout.add_well_to_rack('Mix', Well(rack_id='Mix', well_number=7, volume=1.0, composition=d2o.model_copy(deep=True)))
+
+    assert [w.well_number for w in layout.find_composition(h2o)] == [1, 4, 5, 6]
+    assert [w.well_number for w in layout.find_composition(d2o)] == [2, 7]
+    assert [w.well_number for w in layout.find_composition(d2o, rack_ids=['Mix'])] == [2, 7]
+
+@pytest.mark.parametrize('units, ref_units, expected', [('mM', 'M', 0.2),
+                                                         ('M', 'uM', 2e5),
+                                                         ('mg/L', 'mg/mL', 0.2),
+                                                         ('mg/mL', 'M', 0.004),
+                                                         ('M', 'mg/mL', 10.0),
+                                                         ('nM', 'mg/L', 0.01)])
+def test_convert_units(units, ref_units, expected):
+    solute = Solute(name='X', concentration=200.0 if units in ('mM', 'mg/L', 'nM') else 0.2,
+                    units=units, molecular_weight=50.0)
+
+    assert solute.convert_units(ref_units) == pytest.approx(expected)
+    assert convert_many([solute.concentration], [units], [50.0], ref_units)[0] == pytest.approx(expected)
+
+def test_convert_units_errors():
+    with pytest.raises(ValueError):
+        Solute(name='X', concentration=1.0, units='M').convert_units('mol/L')
+    converted = convert_many([1.0, 1.0, 1.0], np.array(['M', 'mg/mL', None], dtype=object), ref_units='mM')
+    assert converted[0] == 1000.0
+    assert np.isnan(converted[1]) and np.isnan(converted[2])
@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+from lh_manager.liquid_handler.bedlayout import Well, Composition, Solvent, Solute
+from lh_manager.liquid_handler.columnar import ColumnarWells
+
+def make_well(well_number: int, composition: Composition) -> Well:
+    return Well(rack_id='Stock', well_number=well_number, volume=1.0, composition=composition)
+
+def test_columns_share_vocabulary():
+    wells = [make_well(1, Composition(solvents=[Solvent(name='H2O', fraction=0.5), Solvent(name='D2O', fraction=0.5)],
+                                      solutes=[Solute(name='KCl', concentration=0.1, units='M', molecular_weight=74.55)])),
+             make_well(2, Composition(solvents=[Solvent(name='D2O', fraction=1.0)],
+                                      solutes=[Solute(name='peptide', concentration=2.0, units='mg/mL')])),
+             make_well(3, Composition())]
+
+    columns = ColumnarWells(wells)
+
+    assert len(columns) == 3
+    assert columns.solvent_names == ['H2O', 'D2O']
+    assert columns.solute_names == ['KCl', 'peptide']
+    np.testing.assert_array_equal(columns.solvent_fractions, [[0.5, 0.5], [0.0, 1.0], [0.0, 0.0]])
+    np.testing.assert_array_equal(columns.solvent_order, [[0, 1], [-1, 0], [-1, -1]])
+    np.testing.assert_array_equal(columns.solute_concentrations, [[0.1, 0.0], [0.0, 2.0], [0.0, 0.0]])
+    assert columns.solute_units.tolist() == [['M', None], [None, 'mg/mL'], [None, None]]
+    assert columns.solute_molecular_weights[0, 0] == 74.55
+    assert np.isnan(columns.solute_molecular_weights[1, 1])
+    np.testing.assert_array_equal(columns.solute_order, [[0, -1], [-1, 0], [-1, -1]])
+
+def test_duplicate_component_rejected():
+    well = make_well(1, Composition.model_construct(solvents=[Solvent(name='H2O', fraction=0.5),
+                                                              Solvent(name='H2O', fraction=0.5)],
+                                                    solutes=[]))
+
+    with pytest.raises(ValueError):
+        ColumnarWells([well])
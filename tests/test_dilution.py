@@ -0,0 +1,38 @@
+from lh_manager.liquid_handler.bedlayout import LHBedLayout, Rack, Well, Composition, Solvent, WellLocation
+from lh_manager.liquid_handler.dilution import SerialDilution
+from lh_manager.liquid_handler.layoutmap import racks
+
+def make_layout() -> LHBedLayout:
+    layout = LHBedLayout(racks={k: Rack(**v, wells=[]) for k, v in racks.items()})
+    h2o = Composition(solvents=[Solvent(name='H2O', fraction=1.0)])
+    for well_number in range(1, 11):
+        layout.add_well_to_rack('Mix', Well(rack_id='Mix', well_number=well_number, volume=0.0, composition=Composition()))
+    layout.add_well_to_rack('Solvent', Well(rack_id='Solvent', well_number=1, volume=100.0, composition=h2o))
+    layout.add_well_to_rack('Carrier', Well(rack_id='Carrier', well_number=1, volume=1000.0, composition=h2o))
+
+    return layout
+
+def make_dilution() -> SerialDilution:
+    return SerialDilution(first_target_well=WellLocation(rack_id='Mix', id='series'), number_of_dilutions=3,
+                          sample_source=WellLocation(rack_id='Solvent', well_number=1),
+                          diluent_source=WellLocation(rack_id='Solvent', well_number=1))
+
+def test_get_methods_does_not_reserve_wells():
+    layout = make_layout()
+    version = layout.version
+
+    methods = make_dilution().get_methods(layout)
+
+    assert len(methods)
+    assert layout.version == version
+    assert all(well.id is None for well in layout.racks['Mix'].wells)
+
+def test_reserved_wells_are_used_by_get_methods():
+    layout = make_layout()
+    dilution = make_dilution()
+
+    dilution.reserve_target_wells(layout)
+
+    assert [well.id for well in layout.racks['Mix'].wells[:3]] == ['series_0', 'series_1', 'series_2']
+    targets = set(m.Target.well_number for m in dilution.get_methods(layout) if hasattr(m, 'Target'))
+    assert targets == {1, 2, 3}
@@ -0,0 +1,42 @@
+from types import SimpleNamespace
+
+from lh_manager.liquid_handler.bedlayout import LHBedLayout, Rack, Well, Composition, Solvent
+from lh_manager.liquid_handler.estimates import EstimateService
+from lh_manager.liquid_handler.methods import BaseMethod
+
+class CarrierVolumeMethod(BaseMethod):
+    """Method whose estimate depends on the layout"""
+
+    def estimated_time(self, layout: LHBedLayout) -> float:
+        return layout.carrier_well.volume
+
+def make_layout() -> LHBedLayout:
+    layout = LHBedLayout(racks={'Carrier': Rack(columns=1, rows=1, max_volume=1000, wells=[], height=1, width=1,
+                                                x_translate=0, y_translate=0)})
+    layout.add_well_to_rack('Carrier', Well(rack_id='Carrier', well_number=1, volume=100.0,
+                                            composition=Composition(solvents=[Solvent(name='H2O', fraction=1.0)])))
+
+    return layout
+
+def test_estimate_follows_layout_changes():
+    layout = make_layout()
+    stage = SimpleNamespace(methods=[CarrierVolumeMethod()])
+    service = EstimateService()
+
+    assert service.get_stage_estimate(stage, layout) == 100.0
+
+    layout.remove_from_well('Carrier', 1, 40.0)
+
+    assert service.get_stage_estimate(stage, layout) == 60.0
+
+def test_estimate_cached_while_layout_unchanged():
+    layout = make_layout()
+    method = CarrierVolumeMethod()
+    stage = SimpleNamespace(methods=[method])
+    service = EstimateService()
+    service.get_stage_estimate(stage, layout)
+
+    # a cached estimate is returned as long as the method and the layout are unchanged
+    service._methods[method.id] = service._methods[method.id][:2] + (1.0,)
+
+    assert service.get_stage_estimate(stage, layout) == 1.0
@@ -0,0 +1,91 @@
+import importlib
+import sys
+import types
+
+import pytest
+
+import lh_manager.liquid_handler as liquid_handler
+from lh_manager.liquid_handler.bedlayout import LHBedLayout
+from lh_manager.liquid_handler.samplecontainer import SampleContainer
+from lh_manager.liquid_handler.samplelist import Sample
+from lh_manager.liquid_handler.status import SampleStatus
+
+@pytest.fixture
+def samples(monkeypatch):
+    """Sample list of a stand-in for the persistent state module, which is not loaded"""
+
+    state = types.ModuleType('lh_manager.liquid_handler.state')
+    state.samples = SampleContainer()
+    for name in ('a', 'b', 'c'):
+        state.samples.addSample(Sample(name=name, description='d'))
+    state.layout = LHBedLayout(racks={})
+    monkeypatch.setitem(sys.modules, 'lh_manager.liquid_handler.state', state)
+    monkeypatch.setattr(liquid_handler, 'state', state, raising=False)
+    events = importlib.import_module('lh_manager.gui_api.events')
+    monkeypatch.setattr(events, 'state', state)
+
+    return state.samples
+
+def test_sample_changes_follow_versions(samples):
+    from lh_manager.gui_api.events import SampleChanges
+
+    changes = SampleChanges()
+    changed, deleted = samples.samples[0], samples.samples[2]
+    changed.description = 'changed'
+    samples.mark_changed(changed.id)
+    samples.deleteSample(deleted)
+    samples.update_versions()
+
+    assert changes(changes.snapshot()) == {'changed': [changed.id], 'deleted': [deleted.id]}
+    assert changes(changes.snapshot()) == {'changed': [], 'deleted': []}
+
+    samples.samples.reverse()
+    samples.update_versions()
+    assert changes(changes.snapshot()) == {'changed': [], 'deleted': [], 'ids': [s.id for s in samples.samples]}
+
+def test_sample_status_changes(samples):
+    from lh_manager.gui_api.events import SampleStatusChanges
+
+    changes = SampleStatusChanges()
+    deleted = samples.samples[1]
+    samples.deleteSample(deleted)
+    samples.samples[0].description = 'changed'
+    samples.mark_changed(samples.samples[0].id)
+    samples.update_versions()
+
+    assert changes(changes.snapshot()) == {'status': {}, 'deleted': [deleted.id]}
+
+    sample = samples.samples[1]
+    stage = next(iter(sample.stages.values()))
+    stage.status = SampleStatus.ERROR
+    samples.mark_changed(sample.id)
+    samples.update_versions()
+    assert changes(changes.snapshot()) == {'status': {sample.id: sample.get_status_summary()}, 'deleted': []}
+    assert changes(changes.snapshot()) == {'status': {}, 'deleted': []}
+
+class FakeSocketIO:
+    """Records emits instead of sending them; background tasks are not started"""
+
+    def __init__(self) -> None:
+        self.emitted = []
+
+    def start_background_task(self, target):
+        pass
+
+    def emit(self, event, payload, include_self=False):
+        self.emitted.append((event, payload))
+
+def test_event_delta_uses_snapshot_taken_on_publish(monkeypatch):
+    import lh_manager.eventbus as eventbus
+
+    socketio = FakeSocketIO()
+    monkeypatch.setattr(eventbus, 'socketio', socketio)
+    bus = eventbus.EventBus()
+    live = {'value': 1}
+    bus.register('update', lambda: dict(live), lambda snapshot: {'value': snapshot['value']})
+
+    bus.publish('update')
+    live['value'] = 2
+    bus.flush()
+
+    assert socketio.emitted == [('update', {'msg': 'update', 'version': 1, 'value': 1})]
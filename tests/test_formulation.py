@@ -0,0 +1,198 @@
+import numpy as np
+import pytest
+
+from scipy.optimize import nnls
+
+from lh_manager.liquid_handler.bedlayout import LHBedLayout, Rack, Well, Composition, Solvent, Solute, WellLocation
+from lh_manager.liquid_handler.layoutmap import racks
+from lh_manager.liquid_handler.formulation import (Formulation, SourceWells, nnls_warm_start, solve_formulation, solve_formulations, solve_joint_formulations,
+                                                   find_formulations, hold_joint_results, release_joint_results)
+from lh_manager.liquid_handler.methods import MethodContainer
+
+def make_layout() -> LHBedLayout:
+    layout = LHBedLayout(racks={k: Rack(**v, wells=[]) for k, v in racks.items()})
+    layout.add_well_to_rack('Solvent', Well(rack_id='Solvent', well_number=1, volume=100.0,
+                                            composition=Composition(solvents=[Solvent(name='H2O', fraction=1.0)])))
+    layout.add_well_to_rack('Stock', Well(rack_id='Stock', well_number=1, volume=20.0,
+                                          composition=Composition(solvents=[Solvent(name='H2O', fraction=1.0)],
+                                                                  solutes=[Solute(name='NaCl', concentration=1.0, units='M')])))
+
+    return layout
+
+def test_cached_formulation_follows_in_place_composition_change():
+    layout = make_layout()
+    target = Composition(solvents=[Solvent(name='H2O', fraction=1.0)],
+                         solutes=[Solute(name='NaCl', concentration=0.1, units='M')])
+
+    result = solve_formulation(layout, target, 5.0)
+    assert result['success']
+    assert sum(v for v, w in zip(result['volumes'], result['wells']) if w.rack_id == 'Stock') == pytest.approx(0.5)
+
+    stock, _ = layout.get_well_and_rack('Stock', 1)
+    stock.composition.solutes[0].concentration = 0.5
+
+    result = solve_formulation(layout, target, 5.0)
+    assert result['success']
+    assert sum(v for v, w in zip(result['volumes'], result['wells']) if w.rack_id == 'Stock') == pytest.approx(1.0)
+
+def test_solve_formulations_in_worker_processes():
+    layout = make_layout()
+    targets = [(Composition(solvents=[Solvent(name='H2O', fraction=1.0)],
+                            solutes=[Solute(name='NaCl', concentration=c, units='M')]), 5.0)
+               for c in (0.1, 0.2, 0.3)]
+
+    result = solve_formulations(layout, targets, processes=2)
+
+    assert result['success']
+    for (target, volume), formulation in zip(targets, result['results']):
+        assert all(well is layout.get_well_and_rack(well.rack_id, well.well_number)[0] for well in formulation['wells'])
+        stock_volume = sum(v for v, w in zip(formulation['volumes'], formulation['wells']) if w.rack_id == 'Stock')
+        assert stock_volume == pytest.approx(volume * target.solutes[0].concentration)
+
+def test_solve_formulations_checks_total_volume():
+    layout = make_layout()
+    stock = Composition(solvents=[Solvent(name='H2O', fraction=1.0)],
+                        solutes=[Solute(name='NaCl', concentration=1.0, units='M')])
+    targets = [(stock, 10.0), (stock, 10.0)]
+
+    result = solve_formulations(layout, targets)
+
+    # each formulation is possible, but not both together
+    assert all(formulation['success'] for formulation in result['results'])
+    assert not result['success']
+    (total,) = result['totals']
+    assert total['well'].rack_id == 'Stock'
+    assert total['volume'] == pytest.approx(20.0)
+    assert not total['sufficient']
+
+    single = solve_formulation(layout, stock, 10.0)
+    assert single['volumes'] == pytest.approx(result['results'][0]['volumes'])
+
+@pytest.mark.parametrize('seed', range(5))
+def test_nnls_warm_start_matches_nnls(seed):
+    rng = np.random.default_rng(seed)
+    A = rng.random((4, 6))
+    b = A @ np.maximum(rng.normal(size=6), 0.0) + 0.1 * rng.random(4)
+    x_ref, res_ref = nnls(A, b)
+
+    for x0 in (np.zeros(6), rng.random(6), x_ref):
+        x, res = nnls_warm_start(A, b, x0)
+        assert res == pytest.approx(res_ref, abs=1e-9)
+        assert np.all(x >= 0)
+
+def test_insufficient_source_well_is_replaced():
+    layout = make_layout()
+    layout.add_well_to_rack('Stock', Well(rack_id='Stock', well_number=2, volume=2.0,
+                                          composition=Composition(solvents=[Solvent(name='H2O', fraction=1.0)],
+                                                                  solutes=[Solute(name='NaCl', concentration=2.0, units='M')])))
+    target = Composition(solvents=[Solvent(name='H2O', fraction=1.0)],
+                         solutes=[Solute(name='NaCl', concentration=0.5, units='M')])
+
+    # the 2 M stock cannot supply 2.5 mL, so the 1 M stock is used instead
+    result = solve_formulation(layout, target, 10.0)
+
+    assert result['success']
+    volumes = {(w.rack_id, w.well_number): v for v, w in zip(result['volumes'], result['wells'])}
+    assert ('Stock', 2) not in volumes
+    assert volumes[('Stock', 1)] == pytest.approx(5.0)
+
+def test_minimize_transfers_uses_fewest_wells():
+    layout = make_layout()
+    layout.add_well_to_rack('Stock', Well(rack_id='Stock', well_number=2, volume=20.0,
+                                          composition=Composition(solvents=[Solvent(name='H2O', fraction=1.0)],
+                                                                  solutes=[Solute(name='NaCl', concentration=0.5, units='M')])))
+    target = Composition(solvents=[Solvent(name='H2O', fraction=1.0)],
+                         solutes=[Solute(name='NaCl', concentration=0.5, units='M')])
+
+    result = solve_formulation(layout, target, 5.0, transfer_costs=(1.0, 0.0))
+
+    assert result['success']
+    assert [(w.rack_id, w.well_number) for v, w in zip(result['volumes'], result['wells']) if v > 0] == [('Stock', 2)]
+    assert sum(result['volumes']) == pytest.approx(5.0)
+
+    formulation = Formulation(target_composition=target, target_volume=5.0, minimize='transfers',
+                              Target=WellLocation(rack_id='Mix', well_number=1))
+    assert formulation.get_transfer_costs(layout) == (1.0, 0.0)
+    assert Formulation(target_composition=target, target_volume=5.0).get_transfer_costs(layout) is None
+
+def make_source_wells() -> list:
+    compositions = [Composition(solvents=[Solvent(name='H2O', fraction=2.0)]),
+                    Composition(solvents=[Solvent(name='H2O', fraction=1.0), Solvent(name='D2O', fraction=3.0)],
+                                solutes=[Solute(name='NaCl', concentration=58.44, units='mg/mL', molecular_weight=58.44)]),
+                    Composition(solvents=[Solvent(name='D2O', fraction=1.0)],
+                                solutes=[Solute(name='KCl', concentration=20.0, units='mM')]),
+                    Composition(solutes=[Solute(name='NaCl', concentration=0.5, units='M')])]
+
+    return [Well(rack_id='Stock', well_number=i + 1, volume=10.0, composition=composition)
+            for i, composition in enumerate(compositions)]
+
+def test_source_wells_select():
+    wells = make_source_wells()
+    sources = SourceWells(wells)
+
+    selected, components = sources.select(['H2O', 'NaCl'], exact_match=True)
+    assert [w.well_number for w in selected] == [1, 4]
+    selected, _ = sources.select(['H2O', 'NaCl'], exact_match=False)
+    assert [w.well_number for w in selected] == [1, 2, 4]
+    assert set(components) == {'H2O', 'D2O', 'NaCl', 'KCl'}
+
+def test_source_matrix_matches_per_well_columns():
+    wells = make_source_wells()
+    sources = SourceWells(wells)
+    names = ['H2O', 'D2O', 'NaCl', 'KCl']
+    units = {'NaCl': 'mM', 'KCl': 'M'}
+
+    matrix, relevant = sources.make_source_matrix(names, wells, units)
+
+    assert relevant == wells
+    expected = np.array([sources.get_column(well, names, units) for well in wells]).T
+    np.testing.assert_allclose(matrix, expected)
+    np.testing.assert_allclose(np.array(matrix)[:, 1], [0.25, 0.75, 1000.0, 0.0])
+
+def test_formulation_results_follow_source_wells():
+    layout = make_layout()
+    target = Composition(solvents=[Solvent(name='H2O', fraction=1.0)],
+                         solutes=[Solute(name='NaCl', concentration=0.1, units='M')])
+    formulation = Formulation(target_composition=target, target_volume=5.0,
+                              Target=WellLocation(rack_id='Mix', well_number=1))
+    results = formulation.get_formulation_results(layout)
+    assert results[2]
+
+    # a change outside the source zones keeps the results
+    layout.add_well_to_rack('Mix', Well(rack_id='Mix', well_number=1, volume=0.0, composition=Composition()))
+    assert formulation.get_formulation_results(layout) is results
+
+    # not enough stock left for the 0.5 mL transfer plus the dead volume
+    layout.remove_from_well('Stock', 1, 18.4)
+    assert not formulation.get_formulation_results(layout)[2]
+
+class Nested(MethodContainer):
+    formulation: Formulation
+
+    def get_methods(self, layout):
+        return [self.formulation]
+
+def test_joint_results_are_held_for_dry_run_layout_only():
+    layout = make_layout()
+    target = Composition(solvents=[Solvent(name='H2O', fraction=1.0)],
+                         solutes=[Solute(name='NaCl', concentration=0.1, units='M')])
+    formulation = Formulation(target_composition=target, target_volume=5.0,
+                              Target=WellLocation(rack_id='Mix', well_number=1))
+    snapshot = layout.snapshot()
+
+    formulations = find_formulations([Nested(formulation=formulation)], snapshot)
+    assert len(formulations) == 1
+    joint_result = solve_joint_formulations(snapshot, formulations)
+    assert joint_result['success']
+    hold_joint_results(snapshot, formulations, joint_result['results'])
+    try:
+        # held results resolve wells in the dry run layout and are not stored on the formulation
+        _, wells, success = formulation.get_formulation_results(snapshot)
+        assert success
+        assert all(well is snapshot.get_well_and_rack(well.rack_id, well.well_number)[0] for well in wells)
+        assert formulation._formulation_results is None
+
+        _, wells, _ = formulation.get_formulation_results(layout)
+        assert all(well is layout.get_well_and_rack(well.rack_id, well.well_number)[0] for well in wells)
+    finally:
+        release_joint_results(snapshot)
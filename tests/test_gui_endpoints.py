@@ -0,0 +1,74 @@
+import importlib
+import sys
+import types
+
+import pytest
+from flask import Flask
+
+import lh_manager.liquid_handler as liquid_handler
+from lh_manager.liquid_handler.bedlayout import LHBedLayout
+from lh_manager.liquid_handler.samplecontainer import SampleContainer
+from lh_manager.liquid_handler.samplelist import Sample
+
+@pytest.fixture
+def client(monkeypatch):
+    """Test client of the GUI API, using a stand-in for the persistent state module, which is not loaded"""
+
+    state = types.ModuleType('lh_manager.liquid_handler.state')
+    state.samples = SampleContainer()
+    for name in ('a', 'b', 'c', 'd', 'e'):
+        state.samples.addSample(Sample(name=name, description='d'))
+    state.layout = LHBedLayout(racks={})
+    monkeypatch.setitem(sys.modules, 'lh_manager.liquid_handler.state', state)
+    monkeypatch.setattr(liquid_handler, 'state', state, raising=False)
+    gui_api = importlib.import_module('lh_manager.gui_api')
+    monkeypatch.setattr(gui_api.endpoints, 'samples', state.samples)
+    monkeypatch.setattr(gui_api.endpoints, 'layout', state.layout)
+
+    app = Flask(__name__)
+    app.register_blueprint(gui_api.gui_blueprint)
+
+    return app.test_client()
+
+@pytest.mark.parametrize('endpoint', ['/GUI/GetAllMethods/', '/GUI/GetAllDevices/'])
+def test_schema_etag(client, endpoint):
+    response = client.get(endpoint)
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+
+    revalidated = client.get(endpoint, headers={'If-None-Match': etag})
+    assert revalidated.status_code == 304
+    assert revalidated.data == b''
+
+    changed = client.get(endpoint, headers={'If-None-Match': '"other"'})
+    assert changed.status_code == 200
+    assert changed.data == response.data
+
+def test_get_samples_pagination(client):
+    response = client.get('/GUI/GetSamples/?offset=1&limit=2&fields=name,status').json
+
+    assert response['total'] == 5
+    assert [s['name'] for s in response['samples']['samples']] == ['b', 'c']
+    assert set(response['samples']['samples'][0].keys()) == {'name', 'status'}
+    assert 'ids' not in response
+
+def test_get_samples_bad_request(client):
+    assert client.get('/GUI/GetSamples/?fields=name,unknown').status_code == 400
+    assert client.get('/GUI/GetSamples/?status=bogus').status_code == 400
+
+def test_get_samples_since_version(client):
+    from lh_manager.gui_api import endpoints
+
+    samples = endpoints.samples
+    version = client.get('/GUI/GetSamples/').json['version']
+    samples.samples[1].description = 'changed'
+    samples.mark_changed(samples.samples[1].id)
+    samples.deleteSample(samples.samples[3])
+    samples.update_versions()
+
+    response = client.get(f'/GUI/GetSamples/?since_version={version}&fields=name').json
+
+    assert response['version'] > version
+    assert [s['name'] for s in response['samples']['samples']] == ['b']
+    assert response['ids'] == [s.id for s in samples.samples]
+    assert client.get(f'/GUI/GetSamples/?since_version={response["version"]}').json['samples']['samples'] == []
@@ -0,0 +1,48 @@
+import json
+
+from lh_manager.liquid_handler.journal import SampleJournal, _Replay
+from lh_manager.liquid_handler.samplecontainer import SampleContainer
+from lh_manager.liquid_handler.samplelist import Sample
+
+def record(journal: SampleJournal, samples: SampleContainer) -> None:
+    samples.update_versions()
+    journal.record(samples.get_state())
+
+def test_journal_replay(tmp_path):
+    samples = SampleContainer()
+    for name in ('a', 'b', 'c'):
+        samples.addSample(Sample(name=name, description='d'))
+
+    journal = SampleJournal(tmp_path / 'samples.json', tmp_path / 'samples.journal')
+    journal.attach(samples.get_state())
+    record(journal, samples)
+    # wait for the initial snapshot, so that the following changes are only in the journal
+    journal.close()
+
+    samples.samples[0].description = 'changed'
+    samples.mark_changed(samples.samples[0].id)
+    record(journal, samples)
+    samples.deleteSample(samples.samples[1])
+    samples.addSample(Sample(name='d', description='d'))
+    record(journal, samples)
+    samples.samples.reverse()
+    samples.n_channels = 2
+    record(journal, samples)
+    journal.close()
+
+    assert (tmp_path / 'samples.journal').stat().st_size > 0
+    loaded = SampleJournal(tmp_path / 'samples.json', tmp_path / 'samples.journal').load()
+    assert loaded == json.loads(samples.model_dump_json())
+
+def test_replay_put_delete_order():
+    replay = _Replay({'samples': [{'id': 'a'}, {'id': 'b'}], 'n_channels': 1})
+    for record in ({'op': 'put', 'sample': {'id': 'b', 'name': 'changed'}},
+                   {'op': 'delete', 'id': 'a'},
+                   {'op': 'put', 'sample': {'id': 'c'}},
+                   {'op': 'put', 'sample': {'id': 'a'}},
+                   {'op': 'order', 'ids': ['c', 'b', 'a']},
+                   {'op': 'delete', 'id': 'b'},
+                   {'op': 'container', 'fields': {'n_channels': 2}}):
+        replay.apply(record)
+
+    assert replay.finish() == {'samples': [{'id': 'c'}, {'id': 'a'}], 'n_channels': 2}
@@ -0,0 +1,56 @@
+from typing import Literal
+
+from lh_manager.liquid_handler.bedlayout import LHBedLayout
+from lh_manager.liquid_handler.methods import BaseMethod, MethodContainer, MethodManager
+from lh_manager.liquid_handler.status import SampleStatus
+
+expansions = []
+
+class Counting(MethodContainer):
+    tag: str = ''
+    inner: BaseMethod | None = None
+
+    def get_methods(self, layout):
+        expansions.append(self.tag)
+        return [BaseMethod()]
+
+def test_cached_methods_are_independent_copies():
+    layout = LHBedLayout(racks={})
+    container = Counting(tag='copies')
+
+    first = container.get_cached_methods(layout)
+    first[0].status = SampleStatus.ERROR
+    second = container.get_cached_methods(layout)
+
+    assert second[0] is not first[0]
+    assert second[0].status == SampleStatus.INACTIVE
+
+def test_cache_ignores_method_ids():
+    layout = LHBedLayout(racks={})
+    for _ in range(3):
+        Counting(tag='ids', inner=BaseMethod()).get_cached_methods(layout)
+
+    assert expansions.count('ids') == 1
+
+class Discriminated(BaseMethod):
+    method_name: Literal['Discriminated'] = 'Discriminated'
+
+class Undiscriminated(BaseMethod):
+    method_name: str = 'Undiscriminated'
+
+def test_validate_methods_without_list_validator():
+    manager = MethodManager()
+    manager.register(Discriminated)
+    manager.register(Undiscriminated)
+
+    methods = manager.validate_methods([{'method_name': 'Discriminated'}, {'method_name': 'Undiscriminated'}])
+
+    assert [type(m) for m in methods] == [Discriminated, Undiscriminated]
+
+def test_cached_methods_have_new_ids():
+    layout = LHBedLayout(racks={})
+
+    methods = [m for _ in range(3) for m in Counting(tag='new ids').get_cached_methods(layout)]
+
+    assert expansions.count('new ids') == 1
+    assert len(set(m.id for m in methods)) == 3
@@ -0,0 +1,51 @@
+import random
+
+import pytest
+
+from lh_manager.liquid_handler.bedlayout import Solution, Composition, Solvent, Solute
+
+UNITS = ['M', 'mM', 'mg/mL', 'mg/L']
+
+def random_composition(rng: random.Random) -> Composition:
+    return Composition(solvents=[Solvent(name=name, fraction=rng.choice([0.25, 0.5, 1.0]))
+                                 for name in rng.sample(['H2O', 'D2O', 'EtOH'], rng.randint(0, 2))],
+                       solutes=[Solute(name=name, concentration=rng.choice([1e-3, 0.1, 100.0]),
+                                       units=rng.choice(UNITS), molecular_weight=58.4)
+                                for name in rng.sample(['KCl', 'NaCl', 'X'], rng.randint(0, 2))])
+
+def assert_same_mixture(expected: Solution, actual: Solution) -> None:
+    assert actual.volume == pytest.approx(expected.volume)
+
+    expected_solvents = dict(zip(*expected.composition.get_solvent_fractions()))
+    actual_solvents = dict(zip(*actual.composition.get_solvent_fractions()))
+    assert actual_solvents == pytest.approx(expected_solvents, rel=1e-12, abs=1e-15)
+
+    # solutes keep the units of the first solution containing them
+    expected_solutes = {s.name: (s.units, s.concentration) for s in expected.composition.solutes}
+    actual_solutes = {s.name: (s.units, s.concentration) for s in actual.composition.solutes}
+    assert actual_solutes.keys() == expected_solutes.keys()
+    for name, (units, concentration) in expected_solutes.items():
+        assert actual_solutes[name][0] == units
+        assert actual_solutes[name][1] == pytest.approx(concentration, rel=1e-12, abs=1e-15)
+
+@pytest.mark.parametrize('seed', range(200))
+def test_mix_many_matches_mix_with(seed):
+    rng = random.Random(seed)
+    volume = rng.choice([0.0, 1.0, 2.5])
+    composition = random_composition(rng)
+    solutions = [(rng.choice([0.5, 1.0, 3.0]), random_composition(rng)) for _ in range(rng.randint(1, 6))]
+
+    sequential = Solution(volume=volume, composition=composition.model_copy(deep=True))
+    batch = Solution(volume=volume, composition=composition.model_copy(deep=True))
+    try:
+        for v, c in solutions:
+            sequential.mix_with(v, c)
+    except ZeroDivisionError:
+        # e.g. mixing into an empty solution without solvents
+        with pytest.raises(ZeroDivisionError):
+            batch.mix_many(solutions)
+        return
+
+    batch.mix_many(solutions)
+
+    assert_same_mixture(sequential, batch)
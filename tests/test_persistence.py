@@ -0,0 +1,49 @@
+import threading
+
+from lh_manager.liquid_handler.persistence import PersistenceWriter
+
+class FlakySaver:
+    """Fails the first save, then records the saved snapshots"""
+
+    def __init__(self) -> None:
+        self.saved = []
+        self.failures = 1
+        self.done = threading.Event()
+
+    def __call__(self, data) -> None:
+        if self.failures:
+            self.failures -= 1
+            raise OSError('disk full')
+        self.saved.append(data)
+        self.done.set()
+
+def test_failed_save_is_retried():
+    writer = PersistenceWriter(flush_interval=0.0, retry_interval=0.01)
+    saver = FlakySaver()
+    state = {'value': 1}
+    writer.register('state', lambda: dict(state), saver)
+
+    writer.mark_dirty('state')
+    # the snapshot was taken when marked dirty
+    state['value'] = 2
+
+    assert saver.done.wait(5.0)
+    assert saver.saved == [{'value': 1}]
+    writer.close()
+
+def test_failed_save_remains_dirty():
+    writer = PersistenceWriter()
+    saver = FlakySaver()
+    state = {'value': 1}
+    writer.register('state', lambda: dict(state), saver)
+    # after shutdown, state is saved immediately
+    writer.close()
+
+    writer.mark_dirty('state')
+    assert saver.saved == []
+    assert writer.flush()
+    assert saver.saved == [{'value': 1}]
+
+    state['value'] = 2
+    writer.mark_dirty('state')
+    assert saver.saved == [{'value': 1}, {'value': 2}]
@@ -0,0 +1,97 @@
+from lh_manager.liquid_handler.samplecontainer import SampleContainer
+from lh_manager.liquid_handler.samplelist import Sample
+
+def make_samples() -> SampleContainer:
+    samples = SampleContainer()
+    for name in ('a', 'b', 'c'):
+        samples.addSample(Sample(name=name, description='d'))
+
+    return samples
+
+def test_reads_do_not_change_version():
+    samples = make_samples()
+    version = samples.version
+
+    samples.get_changed_since(0)
+    samples.get_state()
+
+    assert samples.version == version
+    assert samples.update_versions() == version
+
+def test_changed_since_follows_updates():
+    samples = make_samples()
+    version = samples.version
+
+    samples.samples[1].description = 'changed'
+    # in-place changes are found once announced, at the next update
+    assert samples.update_versions() == version
+    samples.mark_changed(samples.samples[1].id)
+    assert samples.update_versions() > version
+    assert [s.name for s in samples.get_changed_since(version)] == ['b']
+
+    version = samples.version
+    samples.addSample(Sample(name='d', description='d'))
+    assert [s.name for s in samples.get_changed_since(version)] == ['d']
+
+    state = samples.get_state()
+    assert state.order == tuple(s.id for s in samples.samples)
+    assert state.samples_json == tuple(s.model_dump_json() for s in samples.samples)
+
+def test_update_serializes_changed_samples_only(monkeypatch):
+    samples = make_samples()
+    samples.update_versions()
+    serialized = []
+    model_dump_json = Sample.model_dump_json
+    def counting_dump(self, *args, **kwargs):
+        serialized.append(self.name)
+        return model_dump_json(self, *args, **kwargs)
+    monkeypatch.setattr(Sample, 'model_dump_json', counting_dump)
+
+    samples.samples[0].description = 'changed'
+    samples.mark_changed(samples.samples[0].id)
+    samples.replaceSample(2, Sample(name='e', description='d'))
+    samples.update_versions()
+
+    assert sorted(serialized) == ['a', 'e']
+    assert samples.get_state().samples_json[1] == model_dump_json(samples.samples[1])
+
+def test_lookups_follow_list_changes():
+    samples = make_samples()
+    a, b, c = samples.samples
+    assert samples.getSampleById(b.id) == (1, b)
+
+    d = Sample(name='d', description='d')
+    samples.insertSample(1, d)
+    assert samples.getSampleById(b.id) == (2, b)
+    assert samples.getSamplebyName('d') is d
+
+    e = Sample(name='e', description='d')
+    samples.replaceSample(0, e)
+    assert samples.getSampleById(a.id) == (None, None)
+    assert samples.getSamplebyName('e') is e
+
+    samples.deleteSample(b)
+    assert samples.getSampleById(b.id) == (None, None)
+    assert samples.getSampleById(c.id) == (2, c)
+
+def test_lookups_follow_in_place_changes():
+    samples = make_samples()
+    a, b, _ = samples.samples
+    samples.getSamplebyName('b')
+
+    b.name = 'renamed'
+    a.name = 'b'
+
+    # the stale index hit is verified, and the indices are rebuilt
+    assert samples.getSamplebyName('b') is a
+    assert samples.getSamplebyName('renamed') is b
+    assert samples.getSamplebyName('a') is None
+
+def test_duplicate_id_not_added():
+    samples = make_samples()
+    duplicate = samples.samples[0].model_copy(update={'name': 'duplicate'})
+
+    samples.addSample(duplicate)
+
+    assert len(samples.samples) == 3
+    assert samples.getSamplebyName('duplicate') is None